@@ -0,0 +1,180 @@
+"""
+Sweep HNSW parameters over a sample of the live index.
+
+Chunk vectors are read from the live index version; a held-out part of the
+sample serves as queries, so no embedding calls are made. For every
+combination of M and ef_construction an index is built with the chosen
+backend, and every ef_search is measured for recall@k against exact search,
+p50/p99 latency of single queries, build time and the size of the HNSW
+files. Pick the cheapest row that meets the latency budget and set
+HNSW_M, HNSW_EF_CONSTRUCTION and HNSW_EF_SEARCH accordingly.
+
+Chroma fixes ef_search when a collection is created, so the chroma backend
+builds one collection per ef_search; memmap stores reuse the graph.
+hnswlib never searches with ef below k, so ef_search values below -k are
+rejected rather than reported as rows they would not measure.
+
+With --synthetic, neither the index nor the ingestion module is loaded.
+
+Run from the agentic_rag directory:
+    python -m benchmarks.ann_tuning --sample 20000 --m 8 16 32 --ef-search 32 64 128
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from indexing.memmap_vectorstore import MemmapVectorStore, vector_collection
+from indexing.versions import IndexVersions, read_index_info
+from settings import rag_settings
+
+
+def sample_vectors(persist_directory: str, count: int, seed: int = 0) -> np.ndarray:
+    """Read up to `count` random chunk vectors of the live index version, normalized."""
+    # Importing ingestion opens the live retriever, so only done when the index is sampled
+    from ingestion import open_vectorstore
+
+    versions = IndexVersions(persist_directory)
+    if versions.current() is None:
+        raise SystemExit(f"No index found in {persist_directory}; use --synthetic")
+    path = versions.path(versions.current())
+    backend = read_index_info(path).get("vectorstore_backend", "chroma")
+    collection = vector_collection(open_vectorstore(path, None, backend))
+    ids = collection.get(include=[])["ids"]
+    rng = np.random.default_rng(seed)
+    sampled = [ids[i] for i in rng.permutation(len(ids))[:count]]
+    vectors = []
+    for start in range(0, len(sampled), 5000):
+        result = collection.get(ids=sampled[start:start + 5000], include=["embeddings"])
+        vectors.extend(result["embeddings"])
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def directory_size(path: str, exclude: Tuple[str, ...] = ()) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names if not name.startswith(exclude))
+
+
+def build_memmap(directory: str, corpus: np.ndarray, m: int, ef_construction: int):
+    """Memmap store with its HNSW graph built; returns (store, build seconds, graph bytes)."""
+    store = MemmapVectorStore(
+        directory, embedding_function=None, brute_force_limit=0,
+        hnsw_m=m, hnsw_ef_construction=ef_construction)
+    start = time.perf_counter()
+    ids = [str(i) for i in range(len(corpus))]
+    for offset in range(0, len(corpus), 5000):
+        store.upsert(ids[offset:offset + 5000], corpus[offset:offset + 5000])
+    store.query(corpus[:1], n_results=1)  # Builds and saves the graph
+    return store, time.perf_counter() - start, os.path.getsize(store.index_path)
+
+
+def build_chroma(directory: str, corpus: np.ndarray, m: int, ef_construction: int, ef_search: int):
+    """Chroma collection; returns (collection, build seconds, HNSW segment bytes)."""
+    import chromadb
+
+    client = chromadb.PersistentClient(directory)
+    collection = client.create_collection("ann_tuning", metadata={
+        "hnsw:M": m, "hnsw:construction_ef": ef_construction, "hnsw:search_ef": ef_search})
+    start = time.perf_counter()
+    ids = [str(i) for i in range(len(corpus))]
+    for offset in range(0, len(corpus), 5000):
+        collection.add(ids=ids[offset:offset + 5000], embeddings=corpus[offset:offset + 5000])
+    collection.query(query_embeddings=corpus[:1], n_results=1)
+    build = time.perf_counter() - start
+    return collection, build, directory_size(directory, exclude=("chroma.sqlite3",))
+
+
+def measure(
+    search: Callable[[np.ndarray, int], List[str]],
+    queries: np.ndarray,
+    truth: np.ndarray,
+    k: int
+) -> Tuple[float, float, float]:
+    """(recall@k, p50 ms, p99 ms) of single-query searches."""
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len({int(i) for i in found} & set(expected.tolist())) / k)
+    return float(np.mean(recalls)), float(np.percentile(latencies, 50)), float(np.percentile(latencies, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["chroma", "memmap"],
+                        default=rag_settings.VECTORSTORE_BACKEND)
+    parser.add_argument("--persist-directory", default=rag_settings.CHROMA_DB_DIR)
+    parser.add_argument("--sample", type=int, default=20000, help="Vectors indexed")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=rag_settings.HYBRID_CANDIDATES,
+                        help="Chunks fetched per query (HYBRID_CANDIDATES by default)")
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[32, 64, 128, 256])
+    parser.add_argument("--synthetic", type=int, default=0, metavar="DIMENSIONS",
+                        help="Use clustered random vectors instead of the live index")
+    args = parser.parse_args()
+    below_k = [ef_search for ef_search in args.ef_search if ef_search < args.k]
+    if below_k:
+        parser.error(f"--ef-search values {below_k} are below k={args.k}; "
+                     f"hnswlib would search them with ef={args.k}")
+
+    count = args.sample + args.queries
+    if args.synthetic:
+        from benchmarks.quantization import synthetic_corpus
+        vectors = synthetic_corpus(count, args.synthetic, clusters=200)
+    else:
+        vectors = sample_vectors(args.persist_directory, count)
+    if len(vectors) <= args.queries:
+        raise SystemExit(f"Only {len(vectors)} vectors available; lower --queries")
+    queries, corpus = vectors[:args.queries], vectors[args.queries:]
+    truth = np.argsort(-(queries @ corpus.T), axis=1)[:, :args.k]
+
+    exact = measure(
+        lambda q, k: np.argpartition(-(corpus @ q), k)[:k].tolist(), queries, truth, args.k)
+    print(f"{args.backend}: {len(corpus)} x {corpus.shape[1]} vectors, "
+          f"{len(queries)} queries, k={args.k}")
+    print(f"Exact NumPy search: p50 {exact[1]:.2f} ms, p99 {exact[2]:.2f} ms")
+    print(f"{'M':>4}{'ef_c':>6}{'ef_s':>6}{'recall@k':>10}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'build s':>9}{'index MB':>10}")
+
+    def report(m, ef_construction, ef_search, result, build, size):
+        recall, p50, p99 = result
+        print(f"{m:>4}{ef_construction:>6}{ef_search:>6}{recall:>10.3f}{p50:>9.2f}{p99:>9.2f}"
+              f"{build:>9.1f}{size / 2**20:>10.1f}")
+
+    with tempfile.TemporaryDirectory() as root:
+        for m in args.m:
+            for ef_construction in args.ef_construction:
+                if args.backend == "memmap":
+                    directory = os.path.join(root, f"memmap-{m}-{ef_construction}")
+                    store, build, size = build_memmap(directory, corpus, m, ef_construction)
+                    for ef_search in args.ef_search:
+                        store.hnsw_ef_search = ef_search
+                        result = measure(
+                            lambda q, k: store.query([q], n_results=k)["ids"][0],
+                            queries, truth, args.k)
+                        report(m, ef_construction, ef_search, result, build, size)
+                    continue
+
+                for ef_search in args.ef_search:
+                    directory = os.path.join(root, f"chroma-{m}-{ef_construction}-{ef_search}")
+                    collection, build, size = build_chroma(
+                        directory, corpus, m, ef_construction, ef_search)
+                    result = measure(
+                        lambda q, k: collection.query(query_embeddings=[q], n_results=k)["ids"][0],
+                        queries, truth, args.k)
+                    report(m, ef_construction, ef_search, result, build, size)
+
+
+if __name__ == "__main__":
+    main()
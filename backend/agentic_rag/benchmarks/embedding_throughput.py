@@ -0,0 +1,98 @@
+"""
+Benchmark the bulk embedding pipeline against a stubbed slow embedder.
+
+The fake embedder sleeps per request like a provider round trip and
+throttles (HTTP 429) when more than --provider-concurrency requests are in
+flight, so the run also exercises backoff. Chunks are written to an
+in-memory Chroma collection; once embedding is fast enough, the serial
+Chroma writes become the ceiling.
+
+Run from the agentic_rag directory:
+    python -m benchmarks.embedding_throughput --chunks 4000 --latency 0.5
+"""
+
+import argparse
+import threading
+import time
+from typing import List
+
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from indexing.embedding_pipeline import EmbeddingPipeline, RateLimitedEmbeddings, RateLimiter
+
+
+class ThrottledError(Exception):
+    status_code = 429
+
+
+class SlowFakeEmbeddings(Embeddings):
+    """Embedder stub with fixed per-request latency and a concurrency quota."""
+
+    def __init__(self, latency: float, max_in_flight: int, size: int = 32):
+        self.latency = latency
+        self.max_in_flight = max_in_flight
+        self.size = size
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                raise ThrottledError("rate limited")
+            self.in_flight += 1
+        try:
+            time.sleep(self.latency)
+            return [[float(len(text) % 7)] * self.size for text in texts]
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def run(chunks: List[Document], embeddings: Embeddings, batch_size: int,
+        concurrency: int) -> float:
+    vectorstore = Chroma(
+        collection_name=f"benchmark_{concurrency}", embedding_function=embeddings)
+    pipeline = EmbeddingPipeline(
+        embeddings, vectorstore, batch_size=batch_size, max_concurrency=concurrency)
+    start = time.perf_counter()
+    written = pipeline.add_documents(chunks)
+    elapsed = time.perf_counter() - start
+    assert written == len(chunks)
+    vectorstore.delete_collection()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=4000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--provider-concurrency", type=int, default=6)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    chunks = [
+        Document(page_content=f"chunk {i} " + "lorem ipsum " * 80, metadata={"doc_id": str(i)})
+        for i in range(args.chunks)
+    ]
+
+    print(f"Chunks: {args.chunks}, batch size: {args.batch_size}, "
+          f"request latency: {args.latency:.2f}s, "
+          f"provider allows {args.provider_concurrency} concurrent requests")
+    for concurrency in args.concurrency:
+        provider = SlowFakeEmbeddings(args.latency, args.provider_concurrency)
+        embeddings = RateLimitedEmbeddings(
+            provider, RateLimiter(), initial_backoff=args.latency)
+        elapsed = run(chunks, embeddings, args.batch_size, concurrency)
+        print(f"max_concurrency={concurrency}: {elapsed:.2f}s, "
+              f"{args.chunks / elapsed:.0f} chunks/sec, "
+              f"{embeddings.retries} throttled retries")
+
+
+if __name__ == "__main__":
+    main()
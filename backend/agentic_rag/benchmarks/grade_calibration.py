@@ -0,0 +1,153 @@
+"""
+Calibrate the similarity pre-filter of document grading from logged LLM grades.
+
+Reads the grade log written by grade_documents while GRADE_LOG_PATH is set
+(e.g. GRADE_LOG_PATH=grade_log.jsonl for a day of traffic) and picks
+the lowest GRADE_ACCEPT_SIMILARITY whose documents the LLM graded relevant
+at least --agreement of the time, and the highest GRADE_REJECT_SIMILARITY
+whose documents it graded irrelevant at least as often. Each bound needs
+--min-samples logged grades behind it, or it stays disabled. Audited
+documents count with their sample weight, so the reported share of LLM
+calls saved reflects real traffic.
+
+Only grades of one grader (by default, the grader of the latest line) are
+used: a new grading model or prompt needs a new calibration.
+
+Run from the agentic_rag directory:
+    python -m benchmarks.grade_calibration --log grade_log.jsonl --agreement 0.98
+"""
+
+import argparse
+from typing import List, Optional, Tuple
+
+from graph.grade_prefilter import read_grade_log
+from settings import rag_settings
+
+
+def pick_accept(
+    samples: List[Tuple[float, bool, float]], agreement: float, min_samples: int
+) -> Optional[float]:
+    """
+    Lowest similarity above which relevant grades reach the agreement rate.
+
+    Args:
+        samples: (similarity, relevant, weight) per logged grade
+        agreement: Required share of relevant grades at or above the bound
+        min_samples: Logged grades required at or above the bound
+
+    Returns:
+        The bound, or None if no similarity qualifies
+    """
+    best = None
+    relevant = total = count = 0.0
+    for similarity, is_relevant, weight in sorted(samples, key=lambda s: -s[0]):
+        relevant += weight * is_relevant
+        total += weight
+        count += 1
+        if count >= min_samples and relevant / total >= agreement:
+            best = similarity
+    return best
+
+
+def pick_reject(
+    samples: List[Tuple[float, bool, float]], agreement: float, min_samples: int
+) -> Optional[float]:
+    """
+    Highest similarity below which irrelevant grades reach the agreement rate.
+
+    Args:
+        samples: (similarity, relevant, weight) per logged grade
+        agreement: Required share of irrelevant grades below the bound
+        min_samples: Logged grades required below the bound
+
+    Returns:
+        The bound, or None if no similarity qualifies
+    """
+    ordered = sorted(samples, key=lambda s: s[0])
+    best = None
+    irrelevant = total = count = 0.0
+    for i, (similarity, is_relevant, weight) in enumerate(ordered):
+        irrelevant += weight * (not is_relevant)
+        total += weight
+        count += 1
+        # The bound is exclusive: halfway to the next similarity keeps this one below it
+        if count >= min_samples and irrelevant / total >= agreement and i + 1 < len(ordered):
+            best = (similarity + ordered[i + 1][0]) / 2
+    return best
+
+
+def evaluate(
+    samples: List[Tuple[float, bool, float]], accept: Optional[float], reject: Optional[float]
+) -> Tuple[float, float, float]:
+    """
+    Share of grades the bounds decide, and how often they agree with the LLM.
+
+    Returns:
+        (share of LLM calls saved, agreement of accepted, agreement of rejected)
+    """
+    total = sum(weight for _, _, weight in samples)
+    accepted = [(r, w) for s, r, w in samples if accept is not None and s >= accept]
+    rejected = [(r, w) for s, r, w in samples
+                if reject is not None and s < reject and not (accept is not None and s >= accept)]
+
+    def agreement(decided, verdict):
+        weight = sum(w for _, w in decided)
+        return sum(w for r, w in decided if r == verdict) / weight if weight else float("nan")
+
+    saved = sum(w for _, w in accepted + rejected) / total if total else 0.0
+    return saved, agreement(accepted, True), agreement(rejected, False)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", default=rag_settings.GRADE_LOG_PATH or "grade_log.jsonl")
+    parser.add_argument("--grader", help="Grader key to calibrate (latest in the log by default)")
+    parser.add_argument("--agreement", type=float, default=0.98,
+                        help="Required agreement of pre-filter verdicts with the LLM")
+    parser.add_argument("--min-samples", type=int, default=50)
+    args = parser.parse_args()
+
+    records = [r for r in read_grade_log(args.log) if r.get("similarity") is not None]
+    if not records:
+        raise SystemExit(f"No grades with a similarity in {args.log}")
+    grader = args.grader or records[-1]["grader"]
+    samples = [
+        (float(r["similarity"]), r["grade"] == "yes", float(r.get("weight", 1)))
+        for r in records if r["grader"] == grader
+    ]
+    print(f"Grader {grader}: {len(samples)} logged grades "
+          f"({sum(relevant for _, relevant, _ in samples)} relevant)")
+
+    # Relevant share by similarity decile, to judge how well similarity separates grades
+    ordered = sorted(samples)
+    print(f"{'similarity':>21}{'grades':>8}{'relevant':>10}")
+    for decile in range(10):
+        part = ordered[len(ordered) * decile // 10:len(ordered) * (decile + 1) // 10]
+        if part:
+            weight = sum(w for _, _, w in part)
+            print(f"{part[0][0]:>10.3f} - {part[-1][0]:<8.3f}{len(part):>8}"
+                  f"{sum(w for _, r, w in part if r) / weight:>10.1%}")
+
+    accept = pick_accept(samples, args.agreement, args.min_samples)
+    reject = pick_reject(samples, args.agreement, args.min_samples)
+    if accept is not None and reject is not None and reject > accept:
+        reject = accept
+    saved, accept_agreement, reject_agreement = evaluate(samples, accept, reject)
+
+    if accept is None:
+        print("Accept bound: no similarity reaches the agreement rate")
+    else:
+        print(f"Accepted without LLM: {accept_agreement:.1%} graded relevant by the LLM")
+    if reject is None:
+        print("Reject bound: no similarity reaches the agreement rate")
+    else:
+        print(f"Rejected without LLM: {reject_agreement:.1%} graded irrelevant by the LLM")
+    print(f"LLM grading calls saved: {saved:.1%}")
+    print()
+    print(f"GRADE_ACCEPT_SIMILARITY={'' if accept is None else accept}")
+    print(f"GRADE_REJECT_SIMILARITY={'' if reject is None else reject}")
+
+
+if __name__ == "__main__":
+    main()
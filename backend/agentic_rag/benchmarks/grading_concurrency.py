@@ -0,0 +1,70 @@
+"""
+Benchmark sequential vs. concurrent document grading in the grade_documents node.
+
+The grading pipeline of the node (graph.grading.grade_retrieved_documents) is
+timed with a retrieval grader stub that sleeps like an LLM round trip, once
+with max_concurrency=1 (sequential) and once with --max-concurrency. No grade
+cache or grade log is passed and the documents carry no similarity, so every
+document reaches the grader. graph.grading creates no LLM client and opens no
+index, so the benchmark needs no API keys.
+
+Run from the agentic_rag directory:
+    python -m benchmarks.grading_concurrency --documents 4 --latency 0.5
+"""
+
+import argparse
+import time
+from types import SimpleNamespace
+
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+from graph.grading import grade_individually, grade_retrieved_documents
+
+
+def make_slow_grader(latency: float) -> RunnableLambda:
+    """Build a grader stub that sleeps like an LLM round trip and always answers 'yes'."""
+
+    def grade_document(inputs):
+        time.sleep(latency)
+        return SimpleNamespace(binary_score="yes")
+
+    return RunnableLambda(grade_document)
+
+
+def time_pipeline(documents, grader: RunnableLambda, max_concurrency: int) -> float:
+    """Seconds the grading pipeline takes with at most max_concurrency grader calls in flight."""
+    start = time.perf_counter()
+    result = grade_retrieved_documents(
+        "What is agent memory?",
+        documents,
+        lambda question, docs: grade_individually(grader, question, docs, max_concurrency),
+        grader_key="benchmark",
+    )
+    elapsed = time.perf_counter() - start
+    assert len(result["documents"]) == len(documents)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    grader = make_slow_grader(args.latency)
+    documents = [Document(page_content=f"document {i}") for i in range(args.documents)]
+
+    sequential = time_pipeline(documents, grader, 1)
+    concurrent = time_pipeline(documents, grader, args.max_concurrency)
+
+    print(f"Documents: {args.documents}, grader latency: {args.latency:.2f}s")
+    print(f"Sequential: {sequential:.2f}s ({sequential / args.latency:.1f}x latency)")
+    print(f"Concurrent (max_concurrency={args.max_concurrency}): "
+          f"{concurrent:.2f}s ({concurrent / args.latency:.1f}x latency)")
+    print(f"Speedup: {sequential / concurrent:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark recall@k, memory and latency of the memmap vectorstore settings.
+
+A synthetic corpus of clustered, normalized vectors stands in for chunk
+embeddings; queries are perturbed corpus vectors, like paraphrases of
+indexed passages. Ground truth is exact float32 search. For each setting the
+benchmark reports recall@k, the size of the vectors a search scans (what
+has to stay in memory), the total size on disk and the latency of single
+queries. "none" without HNSW is the exact baseline.
+
+Run from the agentic_rag directory:
+    python -m benchmarks.quantization --vectors 200000 --dimensions 1536
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from indexing.memmap_vectorstore import MemmapVectorStore
+
+
+def synthetic_corpus(count: int, dimensions: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimensions)).astype(np.float32)
+    vectors = centers[rng.integers(clusters, size=count)]
+    vectors += rng.normal(scale=0.6, size=(count, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_neighbours(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def file_size(directory: str, *names: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(directory, name))
+        for name in names if os.path.exists(os.path.join(directory, name)))
+
+
+def measure(store: MemmapVectorStore, queries: np.ndarray, truth: np.ndarray, k: int):
+    store.query(queries[:1], n_results=k)  # Map files, build HNSW if used
+    found = []
+    start = time.perf_counter()
+    for query in queries:
+        found.append([int(i) for i in store.query([query], n_results=k)["ids"][0]])
+    latency = (time.perf_counter() - start) / len(queries)
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth.tolist())])
+    return recall, latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--rescore-factors", type=int, nargs="+", default=[1, 4, 10])
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.vectors, args.dimensions, args.clusters)
+    rng = np.random.default_rng(1)
+    queries = corpus[rng.integers(args.vectors, size=args.queries)]
+    queries = queries + rng.normal(scale=0.05, size=queries.shape).astype(np.float32)
+    truth = exact_neighbours(corpus, queries, args.k)
+    ids = [str(i) for i in range(args.vectors)]
+
+    print(f"Vectors: {args.vectors} x {args.dimensions}, queries: {args.queries}, k={args.k}")
+    print(f"{'setting':<26}{'recall@k':>10}{'scanned MB':>12}{'disk MB':>10}{'ms/query':>10}")
+
+    def report(name, recall, latency, scanned, disk):
+        print(f"{name:<26}{recall:>10.3f}{scanned / 2**20:>12.1f}"
+              f"{disk / 2**20:>10.1f}{latency * 1000:>10.2f}")
+
+    with tempfile.TemporaryDirectory() as root:
+        for quantization in ("none", "int8", "binary"):
+            directory = os.path.join(root, quantization)
+            store = MemmapVectorStore(
+                directory, embedding_function=None, quantization=quantization,
+                brute_force_limit=args.vectors)
+            for start in range(0, args.vectors, 10000):
+                store.upsert(ids[start:start + 10000], corpus[start:start + 10000])
+            vectors_size = file_size(directory, "vectors.f32")
+
+            if quantization == "none":
+                recall, latency = measure(store, queries, truth, args.k)
+                report("float32 exact", recall, latency, vectors_size, vectors_size)
+                store.brute_force_limit = 0
+                recall, latency = measure(store, queries, truth, args.k)
+                hnsw_size = file_size(directory, "hnsw.bin")
+                report("float32 HNSW", recall, latency, hnsw_size, vectors_size + hnsw_size)
+                continue
+
+            codes_size = file_size(directory, "vectors.i8", "scales.f32", "vectors.bits")
+            for factor in args.rescore_factors:
+                store.rescore_factor = factor
+                recall, latency = measure(store, queries, truth, args.k)
+                report(f"{quantization} rescore x{factor}", recall, latency,
+                       codes_size, vectors_size + codes_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import asyncio
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from langchain_core.runnables.utils import accepts_config
+
+from graph.state import GraphState
+from settings import rag_settings
+
+
+def new_budget(
+    max_regenerations: Optional[int] = None,
+    max_web_searches: Optional[int] = None,
+    deadline_seconds: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Build the per-request budget fields for the initial graph state.
+
+    Args:
+        max_regenerations: Regenerations allowed after the first generation
+        max_web_searches: Web searches allowed for the request
+        deadline_seconds: Wall-clock seconds the request may take
+
+    Returns:
+        Dict to merge into the graph input alongside the question
+    """
+    if deadline_seconds is None:
+        deadline_seconds = rag_settings.GRAPH_DEADLINE_SECONDS
+    return {
+        "max_regenerations": rag_settings.MAX_REGENERATIONS
+        if max_regenerations is None else max_regenerations,
+        "max_web_searches": rag_settings.MAX_WEB_SEARCHES
+        if max_web_searches is None else max_web_searches,
+        "deadline": time.time() + deadline_seconds,
+    }
+
+
+def deadline_passed(state: GraphState) -> bool:
+    """Check whether the request's wall-clock deadline has passed."""
+    deadline = state.get("deadline")
+    return deadline is not None and time.time() >= deadline
+
+
+def can_regenerate(state: GraphState) -> bool:
+    """Check whether another generation fits in the request budget."""
+    max_regenerations = state.get("max_regenerations")
+    if max_regenerations is None:
+        max_regenerations = rag_settings.MAX_REGENERATIONS
+    regenerations = max(0, (state.get("generation_count") or 0) - 1)
+    return regenerations < max_regenerations and not deadline_passed(state)
+
+
+def can_web_search(state: GraphState) -> bool:
+    """Check whether another web search fits in the request budget."""
+    max_web_searches = state.get("max_web_searches")
+    if max_web_searches is None:
+        max_web_searches = rag_settings.MAX_WEB_SEARCHES
+    return ((state.get("web_search_count") or 0) < max_web_searches
+            and not deadline_passed(state))
+
+
+def remaining_seconds(state: GraphState) -> Optional[float]:
+    """Seconds left before the request's deadline (negative once passed), or None without a deadline."""
+    deadline = state.get("deadline")
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def call_within_deadline(
+    name: str,
+    call: Callable[..., Any],
+    fallback: Callable[[GraphState], Any],
+    state: GraphState,
+    *args: Any
+) -> Any:
+    """
+    Run call(state, *args), giving up when the request's deadline passes.
+
+    The call runs on a worker thread bounded by the remaining budget. A
+    thread cannot be interrupted, so a call that overruns finishes in the
+    background and its result is dropped. Once the deadline has passed the
+    call is skipped.
+
+    Args:
+        name: Name of the step, for logging
+        call: Node or edge function
+        fallback: Builds the result used when the deadline passes
+        state: The current state of the graph
+        *args: Further arguments of call
+
+    Returns:
+        The result of call, or fallback(state) when the deadline passes first
+    """
+    remaining = remaining_seconds(state)
+    if remaining is None:
+        return call(state, *args)
+    if remaining <= 0:
+        print(f"---DEADLINE PASSED: SKIP {name.upper()}---")
+        return fallback(state)
+
+    executor = ContextThreadPoolExecutor(max_workers=1)
+    future = executor.submit(call, state, *args)
+    try:
+        return future.result(timeout=remaining)
+    except FutureTimeoutError:
+        print(f"---DEADLINE PASSED DURING {name.upper()}---")
+        return fallback(state)
+    finally:
+        executor.shutdown(wait=False)
+
+
+async def acall_within_deadline(
+    name: str,
+    call: Callable[..., Awaitable[Any]],
+    fallback: Callable[[GraphState], Any],
+    state: GraphState,
+    *args: Any
+) -> Any:
+    """Async version of call_within_deadline; an overrunning call is cancelled."""
+    remaining = remaining_seconds(state)
+    if remaining is None:
+        return await call(state, *args)
+    if remaining <= 0:
+        print(f"---DEADLINE PASSED: SKIP {name.upper()}---")
+        return fallback(state)
+
+    try:
+        return await asyncio.wait_for(call(state, *args), timeout=remaining)
+    except asyncio.TimeoutError:
+        print(f"---DEADLINE PASSED DURING {name.upper()}---")
+        return fallback(state)
+
+
+def within_deadline(
+    name: str,
+    node: Callable[..., Dict[str, Any]],
+    fallback: Callable[[GraphState], Dict[str, Any]],
+    anode: Optional[Callable[..., Awaitable[Dict[str, Any]]]] = None
+) -> RunnableLambda:
+    """
+    Wrap a graph node so that it returns fallback(state) once the deadline passes.
+
+    LLM, retriever and web search calls have no timeout of their own, so
+    without this a slow call could run far past GRAPH_DEADLINE_SECONDS.
+
+    Args:
+        name: Node name in the graph
+        node: Node function, taking the state and optionally the config
+        fallback: State update used when the deadline passes
+        anode: Async version of node for the async graph API
+
+    Returns:
+        Runnable to add to the graph under name
+    """
+
+    def run(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
+        args = (config,) if accepts_config(node) else ()
+        return call_within_deadline(name, node, fallback, state, *args)
+
+    async def arun(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
+        args = (config,) if accepts_config(anode) else ()
+        return await acall_within_deadline(name, anode, fallback, state, *args)
+
+    return RunnableLambda(run, afunc=arun if anode is not None else None, name=name)
+
+
+# Generation verdicts from worst to best; a generation left ungraded by the
+# deadline ranks above one known to be hallucinated
+VERDICT_RANKS = {"not_supported": 0, None: 1, "not_useful": 2, "useful": 3}
+
+
+def keep_best_generation(state: GraphState, verdict: Optional[str]) -> Dict[str, Any]:
+    """
+    Record the verdict of the latest generation and keep the best-graded one so far.
+
+    A generation replaces the best one when its verdict ranks at least as
+    high, so among equally graded attempts the latest (with the most
+    context) is kept. Nothing is kept when no generation was produced.
+
+    Returns:
+        state (dict): The verdict of the latest generation and the best generation
+    """
+    update = {"generation_verdict": verdict}
+    generation = state.get("generation")
+    if generation is None:
+        return update
+    if (state.get("best_generation") is None
+            or VERDICT_RANKS[verdict] >= VERDICT_RANKS[state.get("best_generation_verdict")]):
+        update["best_generation"] = generation
+        update["best_generation_verdict"] = verdict
+    return update
+
+
+def decide_after_generation_grading(state: GraphState) -> str:
+    """
+    Pick the next step from the generation verdict, enforcing the request budget.
+
+    Returns "budget_exhausted" when the deadline has passed or the next step
+    would exceed the regeneration or web search budget.
+    """
+    decision = state.get("generation_verdict")
+    if decision is None:
+        return "budget_exhausted"
+    if decision == "not_supported" and not can_regenerate(state):
+        print("---DECISION: REGENERATION BUDGET EXHAUSTED---")
+        return "budget_exhausted"
+    if decision == "not_useful" and not can_web_search(state):
+        print("---DECISION: WEB SEARCH BUDGET EXHAUSTED---")
+        return "budget_exhausted"
+    return decision
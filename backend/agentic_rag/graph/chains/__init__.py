@@ -1,6 +1,7 @@
 from graph.chains.generation import generation_chain
 from graph.chains.hallucination_grader import hallucination_grader
 from graph.chains.retrieval_grader import retrieval_grader
+from graph.chains.batch_retrieval_grader import batch_retrieval_grader
 from graph.chains.answer_grader import answer_grader
 from graph.chains.router import question_router
 
@@ -9,6 +10,7 @@ __all__ = [
     "generation_chain",
     "hallucination_grader",
     "retrieval_grader",
+    "batch_retrieval_grader",
     "answer_grader",
     "question_router",
 ]
@@ -3,6 +3,8 @@ from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain_core.runnables import RunnableSequence
 from langchain_openai import ChatOpenAI
 
+from graph.llm_cache import get_llm_cache
+
 
 class GradeAnswer(BaseModel):
     """Binary score for assessing the answer is relevant to the question."""
@@ -12,7 +14,7 @@ class GradeAnswer(BaseModel):
     )
 
 
-llm = ChatOpenAI(temperature=0)
+llm = ChatOpenAI(temperature=0, cache=get_llm_cache("answer_grader"))
 structured_llm_grader = llm.with_structured_output(GradeAnswer)
 
 message = """You are a grader assessing whether an answer addresses / resolves a question \n 
@@ -0,0 +1,79 @@
+import hashlib
+from typing import List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.pydantic_v1 import BaseModel, Field
+from langchain_openai import ChatOpenAI
+
+from graph.llm_cache import get_llm_cache
+from graph.grading import grade_in_batch
+from settings import rag_settings
+
+
+llm = ChatOpenAI(temperature=0, cache=get_llm_cache("batch_retrieval_grader"))
+
+
+class DocumentGrade(BaseModel):
+    """Binary score for the relevance check of one retrieved document"""
+
+    index: int = Field(
+        description="Index of the graded document, as given in the list",
+    )
+    binary_score: str = Field(
+        description="Document is relevant to the question? 'yes' or 'no'",
+    )
+
+
+class GradeDocumentsBatch(BaseModel):
+    """Binary scores for the relevance check of a list of retrieved documents"""
+
+    grades: List[DocumentGrade] = Field(
+        description="One grade per retrieved document, in the order they were given",
+    )
+
+
+# include_raw keeps parsing failures as data so callers can fall back
+structured_llm_grader = llm.with_structured_output(
+    GradeDocumentsBatch, include_raw=True)
+
+message = """You are a grader assessing relevance of each retrieved document in a numbered list to a user question. \n
+    If a document contains keyword(s) or semantic meaning related to the question, grade it as relevant. \n
+    Grade every document independently and return exactly one grade per document, using the document's index. \n
+    Give a binary score 'yes' or 'no' score to indicate whether each document is relevant to the question."""
+batch_grade_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", message),
+        ("human", "Retrieved documents: \n\n {documents} \n\n User question: {question}"),
+    ]
+)
+
+batch_retrieval_grader = batch_grade_prompt | structured_llm_grader
+
+# Identifies the grading model and prompt in the grade cache
+GRADER_KEY = hashlib.sha256(f"{llm.model_name}\0{message}".encode("utf-8")).hexdigest()[:16]
+
+
+def grade_documents_in_batch(
+    question: str,
+    documents: List[Document]
+) -> Optional[List[str]]:
+    """
+    Grade all documents against the question with a single LLM call.
+
+    Args:
+        question: User question
+        documents: Retrieved documents to grade
+
+    Returns:
+        'yes' / 'no' grades in document order, or None when the batch exceeds
+        BATCH_GRADING_TOKEN_BUDGET or the structured output cannot be used,
+        in which case the caller should grade documents one by one.
+    """
+    return grade_in_batch(
+        batch_retrieval_grader,
+        llm.get_num_tokens,
+        question,
+        documents,
+        rag_settings.BATCH_GRADING_TOKEN_BUDGET,
+    )
@@ -2,8 +2,11 @@ from langchain import hub
 from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
 
+from graph.consts import ANSWER_TOKENS_TAG
+
 
 llm = ChatOpenAI(temperature=0)
 prompt = hub.pull("rlm/rag-prompt")
 
-generation_chain = prompt | llm | StrOutputParser()
+generation_chain = (prompt | llm | StrOutputParser()).with_config(
+    tags=[ANSWER_TOKENS_TAG])
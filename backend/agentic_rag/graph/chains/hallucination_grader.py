@@ -3,6 +3,8 @@ from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain_core.runnables import RunnableSequence
 from langchain_openai import ChatOpenAI
 
+from graph.llm_cache import get_llm_cache
+
 
 class GradeHallucinations(BaseModel):
     """Binary score for hallucination present in generated answer."""
@@ -12,7 +14,7 @@ class GradeHallucinations(BaseModel):
     )
 
 
-llm = ChatOpenAI(temperature=0)
+llm = ChatOpenAI(temperature=0, cache=get_llm_cache("hallucination_grader"))
 
 structured_llm_grader = llm.with_structured_output(GradeHallucinations)
 
@@ -1,9 +1,13 @@
+import hashlib
+
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain_openai import ChatOpenAI
 
+from graph.llm_cache import get_llm_cache
+
 
-llm = ChatOpenAI(temperature=0)
+llm = ChatOpenAI(temperature=0, cache=get_llm_cache("retrieval_grader"))
 
 
 class GradeDocuments(BaseModel):
@@ -27,3 +31,6 @@ grade_prompt = ChatPromptTemplate.from_messages(
 )
 
 retrieval_grader = grade_prompt | structured_llm_grader
+
+# Identifies the grading model and prompt in the grade cache
+GRADER_KEY = hashlib.sha256(f"{llm.model_name}\0{message}".encode("utf-8")).hexdigest()[:16]
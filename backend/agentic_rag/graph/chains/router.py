@@ -4,6 +4,8 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain_openai import ChatOpenAI
 
+from graph.llm_cache import get_llm_cache
+
 
 class RouteQuery(BaseModel):
     """Route a user query to the most relevant datasource."""
@@ -14,7 +16,7 @@ class RouteQuery(BaseModel):
     )
 
 
-llm = ChatOpenAI(temperature=0)
+llm = ChatOpenAI(temperature=0, cache=get_llm_cache("question_router"))
 structured_llm_router = llm.with_structured_output(RouteQuery)
 
 message = """You are an expert at routing a user question to the most appropriate source.
@@ -1,5 +1,10 @@
 RETRIEVE = "retrieve"
 GENERATE = "generate"
+GRADE_GENERATION = "grade_generation"
 GRADE_DOCUMENTS = "grade_documents"
 WEBSEARCH = "web_search"
 DIRECT_LLM = "direct_llm"
+DEGRADED_ANSWER = "degraded_answer"
+
+# Tag on chains whose LLM tokens make up the user-facing answer
+ANSWER_TOKENS_TAG = "answer_tokens"
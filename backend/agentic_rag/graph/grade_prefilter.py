@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from settings import rag_settings
+
+
+def similarity_verdict(
+    similarity: Optional[float],
+    accept: Optional[float] = None,
+    reject: Optional[float] = None
+) -> Optional[str]:
+    """
+    Grade a document from the similarity of its best chunk alone.
+
+    Args:
+        similarity: Cosine similarity of the document to the question
+        accept: Similarity at or above which the document is relevant (None: never)
+        reject: Similarity below which the document is irrelevant (None: never)
+
+    Returns:
+        'yes' or 'no', or None when the document needs the LLM grader
+    """
+    if similarity is None:
+        return None
+    if accept is not None and similarity >= accept:
+        return "yes"
+    if reject is not None and similarity < reject:
+        return "no"
+    return None
+
+
+class GradeLog:
+    """
+    Append-only JSONL log of LLM grades and the similarity of the graded document.
+
+    One line per grade: time, grader key, doc_id, similarity, grade, the
+    verdict the pre-filter would have given (set for audited documents) and
+    the sample weight of the line. Audited documents are only a
+    GRADE_AUDIT_RATE sample of the pre-filtered ones, so they weigh
+    1 / GRADE_AUDIT_RATE. Lines are written with one append per request,
+    so worker processes can share the file.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path of the JSONL file
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, grader: str, records: List[Dict[str, Any]]) -> None:
+        """
+        Append grades to the log.
+
+        Args:
+            grader: Key of the grading model and prompt
+            records: Dicts with doc_id, similarity, grade, prefilter and weight
+        """
+        if not records:
+            return
+        now = round(time.time(), 3)
+        lines = "".join(
+            json.dumps({"time": now, "grader": grader, **record}) + "\n" for record in records)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+def read_grade_log(path: str) -> Iterator[Dict[str, Any]]:
+    """Read the records of a grade log, skipping lines cut short by a crash."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+# LLM grades for threshold calibration, None if GRADE_LOG_PATH is empty
+grade_log = GradeLog(rag_settings.GRADE_LOG_PATH) if rag_settings.GRADE_LOG_PATH else None
@@ -0,0 +1,383 @@
+"""
+Grading pipelines of the grade_documents and grade_generation nodes.
+
+Graders, the grade cache and the grade log are passed in, so this module
+creates no LLM client and opens no index: benchmarks and tests import it
+without API keys.
+"""
+
+import asyncio
+import random
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+from graph.grade_prefilter import GradeLog, similarity_verdict
+from indexing.grade_cache import GradeCache
+from settings import rag_settings
+
+
+# Grades documents against a question with an LLM, one 'yes' / 'no' per document
+LLMGrader = Callable[[str, List[Document]], List[str]]
+# Same, returning None when the grades cannot be used
+FallibleGrader = Callable[[str, List[Document]], Optional[List[str]]]
+
+
+def grade_individually(
+    retrieval_grader: Runnable,
+    question: str,
+    documents: List[Document],
+    max_concurrency: int
+) -> List[str]:
+    """
+    Grade each document with its own retrieval_grader call.
+
+    Calls run concurrently, at most max_concurrency at a time, and the grades
+    are returned in retrieval order.
+
+    Args:
+        retrieval_grader: Runnable returning an object with a binary_score
+        question: User question
+        documents: Retrieved documents to grade
+        max_concurrency: Number of grader calls in flight
+
+    Returns:
+        List of 'yes' / 'no' grades, one per document
+    """
+    results = retrieval_grader.batch(
+        [{"question": question, "document": doc.page_content}
+            for doc in documents],
+        config={"max_concurrency": max_concurrency},
+    )
+    return [result.binary_score for result in results]
+
+
+def format_documents(documents: List[Document]) -> str:
+    """
+    Render documents as a numbered list for the batch grading prompt.
+
+    Args:
+        documents: Documents to grade
+
+    Returns:
+        One string with every document prefixed by its index
+    """
+    return "\n\n".join(
+        f"Document [{index}]:\n{doc.page_content}"
+        for index, doc in enumerate(documents)
+    )
+
+
+def grade_in_batch(
+    batch_grader: Runnable,
+    count_tokens: Callable[[str], int],
+    question: str,
+    documents: List[Document],
+    token_budget: int
+) -> Optional[List[str]]:
+    """
+    Grade all documents against the question with a single batch_grader call.
+
+    Args:
+        batch_grader: Runnable with structured output and include_raw=True,
+            whose parsed result holds one indexed grade per document
+        count_tokens: Token counter of the grading model
+        question: User question
+        documents: Retrieved documents to grade
+        token_budget: Largest prompt, in tokens, graded in one call
+
+    Returns:
+        'yes' / 'no' grades in document order, or None when the batch exceeds
+        token_budget or the structured output cannot be used, in which case
+        the caller should grade documents one by one.
+    """
+    formatted_documents = format_documents(documents)
+    num_tokens = count_tokens(formatted_documents + question)
+    if num_tokens > token_budget:
+        print(
+            f"---BATCH GRADING SKIPPED: {num_tokens} TOKENS OVER BUDGET---")
+        return None
+
+    result = batch_grader.invoke(
+        {"question": question, "documents": formatted_documents}
+    )
+    parsed = result["parsed"]
+    if result["parsing_error"] is not None or parsed is None:
+        print("---BATCH GRADING FAILED TO PARSE---")
+        return None
+
+    grades = {grade.index: grade.binary_score.lower()
+              for grade in parsed.grades}
+    if sorted(grades) != list(range(len(documents))):
+        print("---BATCH GRADING RETURNED INCOMPLETE GRADES---")
+        return None
+
+    return [grades[index] for index in range(len(documents))]
+
+
+def grade_with_fallback(
+    question: str,
+    documents: List[Document],
+    grade_batch: Optional[FallibleGrader],
+    grade_each: LLMGrader
+) -> List[str]:
+    """
+    Grade documents in one batch call, falling back to per-document grading.
+
+    Args:
+        question: User question
+        documents: Documents to grade
+        grade_batch: Batch grader, or None to grade documents one by one
+        grade_each: Per-document grader used when the batch grades are unusable
+
+    Returns:
+        List of 'yes' / 'no' grades, one per document
+    """
+    grades = None
+    if grade_batch is not None and documents:
+        grades = grade_batch(question, documents)
+        if grades is None:
+            print("---FALLING BACK TO PER-DOCUMENT GRADING---")
+    if grades is None:
+        grades = grade_each(question, documents)
+    return grades
+
+
+def grade_retrieved_documents(
+    question: str,
+    documents: List[Document],
+    grade_with_llm: LLMGrader,
+    grader_key: str,
+    grade_cache: Optional[GradeCache] = None,
+    grade_log: Optional[GradeLog] = None
+) -> Dict[str, Any]:
+    """
+    Grade retrieved documents and keep the relevant ones.
+
+    Documents whose retrieval similarity is above GRADE_ACCEPT_SIMILARITY or
+    below GRADE_REJECT_SIMILARITY are graded without the LLM, except for a
+    GRADE_AUDIT_RATE sample kept for calibration. Grades found in the grade
+    cache are reused; only the remaining documents reach grade_with_llm, and
+    their grades are cached and logged.
+
+    Args:
+        question: User question
+        documents: Retrieved documents to grade
+        grade_with_llm: LLM grader for the documents left ungraded
+        grader_key: Key of the grading model and prompt in the cache and the log
+        grade_cache: Grade cache of the index, if enabled
+        grade_log: Grade log for calibration, if enabled
+
+    Returns:
+        Dict with the relevant documents, the use_web_search flag (set when
+        any document is irrelevant) and the question
+    """
+    # Clear-cut documents are graded by their similarity alone
+    grades: List[Optional[str]] = [None] * len(documents)
+    audited: Dict[int, str] = {}
+    for i, doc in enumerate(documents):
+        verdict = similarity_verdict(
+            doc.metadata.get("similarity"),
+            rag_settings.GRADE_ACCEPT_SIMILARITY,
+            rag_settings.GRADE_REJECT_SIMILARITY)
+        if verdict is None:
+            continue
+        if random.random() < rag_settings.GRADE_AUDIT_RATE:
+            audited[i] = verdict
+        else:
+            grades[i] = verdict
+    prefiltered = len(documents) - grades.count(None)
+    if prefiltered:
+        print(f"---SIMILARITY PRE-FILTER: {prefiltered} GRADED WITHOUT LLM---")
+
+    pending = [i for i, grade in enumerate(grades) if grade is None]
+    # Retrieved parents carry their docstore key; web results have none and are not cached
+    doc_ids = [doc.metadata.get("doc_id") for doc in documents]
+    if grade_cache is not None:
+        cached = grade_cache.get_many(
+            grader_key, question, [doc_ids[i] for i in pending if doc_ids[i]])
+        if cached:
+            print(f"---GRADE CACHE: {len(cached)} HITS---")
+        for i in pending:
+            grades[i] = cached.get(doc_ids[i])
+
+    ungraded = [i for i in pending if grades[i] is None]
+    if ungraded:
+        new_grades = grade_with_llm(question, [documents[i] for i in ungraded])
+        for i, grade in zip(ungraded, new_grades):
+            grades[i] = grade.lower()
+        if grade_cache is not None:
+            grade_cache.set_many(grader_key, question, {
+                doc_ids[i]: grades[i] for i in ungraded if doc_ids[i]})
+        if grade_log is not None:
+            grade_log.write(grader_key, [
+                {
+                    "doc_id": doc_ids[i],
+                    "similarity": documents[i].metadata.get("similarity"),
+                    "grade": grades[i],
+                    "prefilter": audited.get(i),
+                    "weight": 1 / rag_settings.GRADE_AUDIT_RATE if i in audited else 1,
+                }
+                for i in ungraded if documents[i].metadata.get("similarity") is not None
+            ])
+
+    filtered_documents = []
+    use_web_search = False
+    for doc, grade in zip(documents, grades):
+        if grade.lower() == "yes":
+            print("---DOCUMENT IS RELEVANT---")
+            filtered_documents.append(doc)
+        else:
+            print("---DOCUMENT IS NOT RELEVANT---")
+            use_web_search = True
+            continue
+    return {
+        "documents": filtered_documents,
+        "use_web_search": use_web_search,
+        "question": question,
+    }
+
+
+def generation_grading_mode(config: Optional[RunnableConfig] = None) -> str:
+    """
+    Generation grading mode of a request.
+
+    Args:
+        config: Graph config; configurable.generation_grading_mode overrides
+            GENERATION_GRADING_MODE for the request
+
+    Returns:
+        'sequential' or 'parallel'
+    """
+    configurable = (config or {}).get("configurable") or {}
+    return configurable.get("generation_grading_mode") or rag_settings.GENERATION_GRADING_MODE
+
+
+def is_grade_yes(score) -> bool:
+    """Return True when a structured grader returned a 'yes' binary score."""
+    return score.binary_score.lower() == "yes"
+
+
+def generation_verdict(grounded: bool, answers_question: bool = False) -> str:
+    """
+    Turn the hallucination and answer grades into the verdict of a generation.
+
+    Returns:
+        "useful", "not_useful" or "not_supported"
+    """
+    if not grounded:
+        print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS---")
+        return "not_supported"
+    print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
+    if answers_question:
+        print("---DECISION: ANSWER ADDRESSES THE USER QUESTION---")
+        return "useful"
+    print("---DECISION: ANSWER DOES NOT ADDRESS THE USER QUESTION---")
+    return "not_useful"
+
+
+def grade_generation_sequentially(
+    hallucination_grader: Runnable,
+    answer_grader: Runnable,
+    question: str,
+    documents,
+    generation: str
+) -> str:
+    """
+    Run the hallucination grader and, if the generation is grounded, the answer grader.
+
+    Returns:
+        "useful", "not_useful" or "not_supported"
+    """
+    score = hallucination_grader.invoke(
+        {"documents": documents, "generation": generation}
+    )
+    if not is_grade_yes(score):
+        return generation_verdict(False)
+    print("---CHECK ANSWER---")
+    score = answer_grader.invoke({"question": question, "generation": generation})
+    return generation_verdict(True, is_grade_yes(score))
+
+
+def grade_generation_in_parallel(
+    hallucination_grader: Runnable,
+    answer_grader: Runnable,
+    question: str,
+    documents,
+    generation: str
+) -> str:
+    """
+    Run the hallucination and answer graders at the same time on threads.
+
+    A failed hallucination check returns at once, without waiting for the
+    answer check. A thread cannot be interrupted, so the answer grader call
+    still runs to completion in the background and its tokens are spent;
+    agrade_generation_in_parallel, used by the async graph API, cancels it.
+
+    Returns:
+        "useful", "not_useful" or "not_supported"
+    """
+    executor = ContextThreadPoolExecutor(max_workers=2)
+    hallucination_future = executor.submit(
+        hallucination_grader.invoke,
+        {"documents": documents, "generation": generation},
+    )
+    answer_future = executor.submit(
+        answer_grader.invoke, {"question": question, "generation": generation}
+    )
+    try:
+        if not is_grade_yes(hallucination_future.result()):
+            return generation_verdict(False)
+        return generation_verdict(True, is_grade_yes(answer_future.result()))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def agrade_generation_sequentially(
+    hallucination_grader: Runnable,
+    answer_grader: Runnable,
+    question: str,
+    documents,
+    generation: str
+) -> str:
+    """Async version of grade_generation_sequentially."""
+    score = await hallucination_grader.ainvoke(
+        {"documents": documents, "generation": generation}
+    )
+    if not is_grade_yes(score):
+        return generation_verdict(False)
+    print("---CHECK ANSWER---")
+    score = await answer_grader.ainvoke({"question": question, "generation": generation})
+    return generation_verdict(True, is_grade_yes(score))
+
+
+async def agrade_generation_in_parallel(
+    hallucination_grader: Runnable,
+    answer_grader: Runnable,
+    question: str,
+    documents,
+    generation: str
+) -> str:
+    """
+    Run the hallucination and answer graders at the same time as asyncio tasks.
+
+    The answer task is cancelled as soon as the hallucination check fails,
+    which aborts its request, so a failed generation costs one grader round
+    trip while a successful one costs the slower of the two.
+
+    Returns:
+        "useful", "not_useful" or "not_supported"
+    """
+    hallucination_task = asyncio.create_task(hallucination_grader.ainvoke(
+        {"documents": documents, "generation": generation}))
+    answer_task = asyncio.create_task(answer_grader.ainvoke(
+        {"question": question, "generation": generation}))
+    try:
+        if not is_grade_yes(await hallucination_task):
+            return generation_verdict(False)
+        return generation_verdict(True, is_grade_yes(await answer_task))
+    finally:
+        for task in (hallucination_task, answer_task):
+            task.cancel()
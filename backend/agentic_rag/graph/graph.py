@@ -1,11 +1,30 @@
+from typing import Any, Dict, Optional
+
 from dotenv import load_dotenv
 
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, StateGraph
 
 from graph.state import GraphState
-from graph.consts import RETRIEVE, GENERATE, GRADE_DOCUMENTS, WEBSEARCH, DIRECT_LLM
+from graph.budget import (
+    call_within_deadline,
+    can_web_search,
+    decide_after_generation_grading,
+    keep_best_generation,
+    within_deadline,
+)
+from graph.consts import (
+    RETRIEVE, GENERATE, GRADE_DOCUMENTS, GRADE_GENERATION, WEBSEARCH, DIRECT_LLM, DEGRADED_ANSWER
+)
 from graph.chains import hallucination_grader, answer_grader, question_router
-from graph.nodes import generate, grade_documents, retrieve, web_search, direct_llm_response
+from graph.grading import (
+    agrade_generation_in_parallel,
+    agrade_generation_sequentially,
+    generation_grading_mode,
+    grade_generation_in_parallel,
+    grade_generation_sequentially,
+)
+from graph.nodes import generate, grade_documents, retrieve, web_search, direct_llm_response, degraded_answer
 
 
 load_dotenv()
@@ -15,6 +34,9 @@ def decide_to_generate(state):
     print("---ASSESS GRADED DOCUMENTS---")
 
     if state["use_web_search"]:
+        if not can_web_search(state):
+            print("---DECISION: WEB SEARCH BUDGET EXHAUSTED, GENERATE---")
+            return GENERATE
         print("---DECISION: NOT ALL DOCUMENTS ARE RELEVANT, GO TO WEB---")
         return WEBSEARCH
     else:
@@ -22,30 +44,60 @@ def decide_to_generate(state):
         return GENERATE
 
 
-def grade_generation_grounded_in_documents_and_question(state: GraphState):
+def grade_generation_grounded_in_documents_and_question(
+    state: GraphState, config: Optional[RunnableConfig] = None
+) -> str:
     print("---CHECK HALLUCINATIONS---")
 
     question = state["question"]
     documents = state["documents"]
     generation = state["generation"]
 
-    score = hallucination_grader.invoke(
-        {"documents": documents, "generation": generation}
-    )
-    if hallucination_grade := score.binary_score:
-        print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
+    if generation_grading_mode(config) == "parallel":
         print("---CHECK ANSWER---")
-        score = answer_grader.invoke(
-            {"question": question, "generation": generation})
-        if answer_grade := score.binary_score:
-            print("---DECISION: ANSWER ADDRESSES THE USER QUESTION---")
-            return "useful"
-        else:
-            print("---DECISION: ANSWER DOES NOT ADDRESS THE USER QUESTION---")
-            return "not_useful"
-    else:
-        print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS---")
-        return "not_supported"
+        return grade_generation_in_parallel(
+            hallucination_grader, answer_grader, question, documents, generation)
+
+    return grade_generation_sequentially(
+        hallucination_grader, answer_grader, question, documents, generation)
+
+
+async def agrade_generation_grounded_in_documents_and_question(
+    state: GraphState, config: Optional[RunnableConfig] = None
+) -> str:
+    print("---CHECK HALLUCINATIONS---")
+
+    question = state["question"]
+    documents = state["documents"]
+    generation = state["generation"]
+
+    if generation_grading_mode(config) == "parallel":
+        print("---CHECK ANSWER---")
+        return await agrade_generation_in_parallel(
+            hallucination_grader, answer_grader, question, documents, generation)
+
+    return await agrade_generation_sequentially(
+        hallucination_grader, answer_grader, question, documents, generation)
+
+
+def grade_generation(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
+    """
+    Grade the latest generation and keep the best-graded one so far.
+
+    The grading mode comes from configurable.generation_grading_mode in the
+    graph config, falling back to GENERATION_GRADING_MODE.
+
+    Returns:
+        state (dict): The verdict of the latest generation and the best generation
+    """
+    verdict = grade_generation_grounded_in_documents_and_question(state, config)
+    return keep_best_generation(state, verdict)
+
+
+async def agrade_generation(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
+    """Async version of grade_generation, used by the async graph API (ainvoke, astream_events)."""
+    verdict = await agrade_generation_grounded_in_documents_and_question(state, config)
+    return keep_best_generation(state, verdict)
 
 
 def route_question(state: GraphState):
@@ -65,17 +117,38 @@ def route_question(state: GraphState):
         return DIRECT_LLM
 
 
+def route_question_within_deadline(state: GraphState):
+    """Route the question, or go straight to the degraded answer once the deadline passes."""
+    return call_within_deadline(
+        "route question", route_question, lambda state: DEGRADED_ANSWER, state)
+
+
 flow = StateGraph(state_schema=GraphState)
 
-flow.add_node(RETRIEVE, retrieve)
-flow.add_node(GRADE_DOCUMENTS, grade_documents)
-flow.add_node(GENERATE, generate)
-flow.add_node(WEBSEARCH, web_search)
-flow.add_node(DIRECT_LLM, direct_llm_response)
+# Nodes that call the LLM, the retriever or the web search give up when the
+# deadline passes, leaving the state as it was so the run can finish degraded
+flow.add_node(RETRIEVE, within_deadline(
+    RETRIEVE, retrieve, lambda state: {"documents": [], "question": state["question"]}))
+flow.add_node(GRADE_DOCUMENTS, within_deadline(
+    GRADE_DOCUMENTS, grade_documents,
+    lambda state: {"documents": state["documents"], "use_web_search": False}))
+flow.add_node(GENERATE, within_deadline(
+    GENERATE, generate, lambda state: {"generation": None}))
+flow.add_node(GRADE_GENERATION, within_deadline(
+    GRADE_GENERATION, grade_generation,
+    lambda state: keep_best_generation(state, None), anode=agrade_generation))
+flow.add_node(WEBSEARCH, within_deadline(
+    WEBSEARCH, web_search,
+    lambda state: {"documents": state.get("documents"),
+                   "web_search_count": (state.get("web_search_count") or 0) + 1}))
+flow.add_node(DIRECT_LLM, within_deadline(
+    DIRECT_LLM, direct_llm_response, lambda state: {"documents": [], "degraded": True}))
+flow.add_node(DEGRADED_ANSWER, degraded_answer)
 
 flow.set_conditional_entry_point(
-    route_question, path_map={RETRIEVE: RETRIEVE,
-                              WEBSEARCH: WEBSEARCH, DIRECT_LLM: DIRECT_LLM}
+    route_question_within_deadline,
+    path_map={RETRIEVE: RETRIEVE, WEBSEARCH: WEBSEARCH,
+              DIRECT_LLM: DIRECT_LLM, DEGRADED_ANSWER: DEGRADED_ANSWER}
 )
 
 flow.add_edge(RETRIEVE, GRADE_DOCUMENTS)
@@ -85,15 +158,17 @@ flow.add_conditional_edges(
     decide_to_generate,
     path_map={WEBSEARCH: WEBSEARCH, GENERATE: GENERATE},
 )
+flow.add_edge(GENERATE, GRADE_GENERATION)
 flow.add_conditional_edges(
-    GENERATE,
-    grade_generation_grounded_in_documents_and_question,
+    GRADE_GENERATION,
+    decide_after_generation_grading,
     path_map={"useful": END, "not_useful": WEBSEARCH,
-              "not_supported": GENERATE},
+              "not_supported": GENERATE, "budget_exhausted": DEGRADED_ANSWER},
 )
 
 flow.add_edge(WEBSEARCH, GENERATE)
 flow.add_edge(DIRECT_LLM, END)
+flow.add_edge(DEGRADED_ANSWER, END)
 
 app = flow.compile()
 app.get_graph().draw_mermaid_png(output_file_path="graph.png")
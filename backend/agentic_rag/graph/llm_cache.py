@@ -0,0 +1,140 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from typing import Any, Dict, Optional
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from settings import rag_settings
+
+
+class BoundedSQLiteCache(BaseCache):
+    """
+    Persistent exact-match LLM cache with least-recently-used eviction.
+
+    Responses are keyed by the SHA256 of the serialized prompt and the LLM
+    string, which covers the model, temperature and bound tools (the
+    structured output schema), so any change to them is a miss. The SQLite
+    file is shared by every chain and worker process; once it holds more
+    than max_entries responses, the least recently used are dropped.
+    Hits and misses are counted per instance, i.e. per chain.
+
+    The file is opened on the first lookup, so building the chains (at
+    import) creates nothing on disk.
+    """
+
+    # Updates between evictions
+    PRUNE_INTERVAL = 100
+
+    def __init__(self, path: str, max_entries: int, name: str = ""):
+        """
+        Args:
+            path: SQLite file of the cache
+            max_entries: Number of responses kept
+            name: Name of the chain using this instance, for stats
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._updates = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the SQLite file on first use; called with _lock held."""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key BLOB PRIMARY KEY, response TEXT NOT NULL, last_used REAL NOT NULL)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> bytes:
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).digest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", LangChainBetaWarning)
+            return loads(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        response = dumps(list(return_val))
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, last_used) VALUES (?, ?, ?)",
+                (self._key(prompt, llm_string), response, time.time()))
+            self._updates += 1
+            if self._updates % self.PRUNE_INTERVAL == 0:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,))
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counts of this instance."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+
+# Cache instances by chain name, for stats
+_chain_caches: Dict[str, BoundedSQLiteCache] = {}
+
+
+def get_llm_cache(chain: str) -> Optional[BaseCache]:
+    """
+    Response cache of a chain's LLM.
+
+    Args:
+        chain: Chain name, as listed in LLM_CACHE_CHAINS
+
+    Returns:
+        Cache instance, or None if caching is disabled for the chain
+    """
+    enabled = {name.strip() for name in rag_settings.LLM_CACHE_CHAINS.split(",")}
+    if not rag_settings.LLM_CACHE_PATH or chain not in enabled:
+        return None
+    if chain not in _chain_caches:
+        _chain_caches[chain] = BoundedSQLiteCache(
+            rag_settings.LLM_CACHE_PATH, rag_settings.LLM_CACHE_MAX_ENTRIES, name=chain)
+    return _chain_caches[chain]
+
+
+def llm_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit rate of the LLM response cache, by chain."""
+    return {chain: cache.stats() for chain, cache in _chain_caches.items()}
@@ -3,7 +3,8 @@ from graph.nodes.retrieve import retrieve
 from graph.nodes.grade import grade_documents
 from graph.nodes.web_search import web_search
 from graph.nodes.direct_llm import direct_llm_response
+from graph.nodes.degraded import degraded_answer
 
 
 __all__ = ["generate", "retrieve", "grade_documents",
-           "web_search", "direct_llm_response"]
+           "web_search", "direct_llm_response", "degraded_answer"]
@@ -0,0 +1,25 @@
+from typing import Any, Dict
+
+from graph.state import GraphState
+
+
+def degraded_answer(state: GraphState) -> Dict[str, Any]:
+    """
+    Finish the run with the best-graded generation once the request budget is spent.
+
+    Generations that passed the hallucination check are preferred over
+    ungraded ones, and those over generations that failed it.
+
+    Args:
+        state (dict): The current state of the graph.
+
+    Returns:
+        state (dict): The best generation so far flagged as degraded quality
+    """
+    verdict = state.get("best_generation_verdict") or "ungraded"
+    print(f"---BUDGET EXHAUSTED: RETURNING BEST ANSWER SO FAR ({verdict.upper()})---")
+    generation = state.get("best_generation")
+    if generation is None:
+        # No generation at all when the deadline passed before the first one
+        generation = state.get("generation") or ""
+    return {"generation": generation, "degraded": True}
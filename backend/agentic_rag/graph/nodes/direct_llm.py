@@ -4,6 +4,7 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 
+from graph.consts import ANSWER_TOKENS_TAG
 from graph.state import GraphState
 
 
@@ -16,7 +17,8 @@ direct_llm_prompt = ChatPromptTemplate.from_messages([
     ("human", "{question}")
 ])
 
-direct_llm_chain = direct_llm_prompt | llm | StrOutputParser()
+direct_llm_chain = (direct_llm_prompt | llm | StrOutputParser()).with_config(
+    tags=[ANSWER_TOKENS_TAG])
 
 
 def direct_llm_response(state: GraphState) -> Dict[str, Any]:
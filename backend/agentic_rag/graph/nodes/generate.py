@@ -18,4 +18,9 @@ def generate(state: GraphState) -> Dict[str, Any]:
     question = state["question"]
     documents = state["documents"]
     generation = generation_chain.invoke({"context": documents, "question": question})
-    return {"generation": generation, "documents": documents, "question": question}
+    return {
+        "generation": generation,
+        "documents": documents,
+        "question": question,
+        "generation_count": (state.get("generation_count") or 0) + 1,
+    }
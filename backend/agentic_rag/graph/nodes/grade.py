@@ -1,7 +1,35 @@
-from typing import Any, Dict
+from typing import Any, Dict, List
 
-from graph.chains.retrieval_grader import retrieval_grader
+from langchain_core.documents import Document
+
+from graph.chains.batch_retrieval_grader import GRADER_KEY as BATCH_GRADER_KEY
+from graph.chains.batch_retrieval_grader import grade_documents_in_batch
+from graph.chains.retrieval_grader import GRADER_KEY, retrieval_grader
+from graph.grade_prefilter import grade_log
+from graph.grading import grade_individually, grade_retrieved_documents, grade_with_fallback
 from graph.state import GraphState
+from ingestion import get_grade_cache, get_retriever, index_directory
+from settings import rag_settings
+
+
+def grade_with_llm(question: str, documents: List[Document]) -> List[str]:
+    """
+    Grade documents with the grader selected by GRADING_MODE.
+
+    Args:
+        question: User question
+        documents: Documents to grade
+
+    Returns:
+        List of 'yes' / 'no' grades, one per document
+    """
+    return grade_with_fallback(
+        question,
+        documents,
+        grade_documents_in_batch if rag_settings.GRADING_MODE == "batch" else None,
+        lambda question, documents: grade_individually(
+            retrieval_grader, question, documents, rag_settings.GRADING_MAX_CONCURRENCY),
+    )
 
 
 def grade_documents(state: GraphState) -> Dict[str, Any]:
@@ -9,6 +37,11 @@ def grade_documents(state: GraphState) -> Dict[str, Any]:
     Determines whether the retrieved documents are relevant to the user question.
     If any document is not relevant, we will set a flag to run web search.
 
+    With GRADING_MODE set to 'batch' all documents are graded in one LLM call,
+    falling back to per-document grading when that is not possible. The
+    similarity pre-filter, the grade cache and the grade log are applied by
+    graph.grading.grade_retrieved_documents.
+
     Args:
         state (dict): The current state of the graph.
 
@@ -16,25 +49,12 @@ def grade_documents(state: GraphState) -> Dict[str, Any]:
         state (dict): Filtered out irrelevant documents and updated use_web_search state.
     """
     print("---GRADE DOCUMENTS---")
-    question = state["question"]
-    documents = state["documents"]
-
-    filtered_documents = []
-    use_web_search = False
-    for doc in documents:
-        result = retrieval_grader.invoke(
-            {"question": question, "document": doc.page_content}
-        )
-        grade = result.binary_score
-        if grade.lower() == "yes":
-            print("---DOCUMENT IS RELEVANT---")
-            filtered_documents.append(doc)
-        else:
-            print("---DOCUMENT IS NOT RELEVANT---")
-            use_web_search = True
-            continue
-    return {
-        "documents": filtered_documents,
-        "use_web_search": use_web_search,
-        "question": question,
-    }
+    grader = BATCH_GRADER_KEY if rag_settings.GRADING_MODE == "batch" else GRADER_KEY
+    return grade_retrieved_documents(
+        state["question"],
+        state["documents"],
+        grade_with_llm,
+        grader,
+        grade_cache=get_grade_cache(index_directory(get_retriever())),
+        grade_log=grade_log,
+    )
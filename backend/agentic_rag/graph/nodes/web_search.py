@@ -31,10 +31,12 @@ def web_search(state: GraphState) -> Dict[str, Any]:
     # create a document object
     web_search_result = Document(page_content=tavily_results_joined)
 
-    # append web search to the list of documents
-    if documents is not None:
-        documents.append(web_search_result)
-    else:
-        documents = [web_search_result]
-
-    return {"documents": documents, "question": question}
+    # append web search to a new list of documents, as the state's list may
+    # still be in use when the deadline cut this node short
+    documents = list(documents or []) + [web_search_result]
+
+    return {
+        "documents": documents,
+        "question": question,
+        "web_search_count": (state.get("web_search_count") or 0) + 1,
+    }
@@ -1,4 +1,4 @@
-from typing import List, TypedDict
+from typing import List, Optional, TypedDict
 
 
 class GraphState(TypedDict):
@@ -7,12 +7,31 @@ class GraphState(TypedDict):
 
     Attributes:
         question: Question
-        generation: LLM Generation
+        generation: LLM Generation (None when the deadline cut the generation short)
         use_web_search: wether to use web search
         documents: List of documents
+        generation_count: number of generations produced so far
+        web_search_count: number of web searches run so far
+        max_regenerations: regenerations allowed after the first generation
+        max_web_searches: web searches allowed for the request
+        deadline: wall-clock deadline for the request (epoch seconds)
+        degraded: whether the request budget ran out before the answer passed grading
+        generation_verdict: grade of the latest generation ('useful', 'not_useful',
+            'not_supported', or None when it was not graded)
+        best_generation: best-graded generation so far, returned if the budget runs out
+        best_generation_verdict: grade of best_generation
     """
 
     question: str
-    generation: str
+    generation: Optional[str]
     use_web_search: bool
     documents: List[str]
+    generation_count: int
+    web_search_count: int
+    max_regenerations: int
+    max_web_searches: int
+    deadline: float
+    degraded: bool
+    generation_verdict: Optional[str]
+    best_generation: str
+    best_generation_verdict: Optional[str]
@@ -0,0 +1,36 @@
+from indexing.chunking import LoadedFile, iter_load_and_split
+from indexing.docstore import SQLiteDocStore
+from indexing.embedding_cache import CachedEmbeddings
+from indexing.embedding_pipeline import EmbeddingPipeline, RateLimitedEmbeddings, RateLimiter
+from indexing.grade_cache import GradeCache
+from indexing.hash_registry import ContentHashRegistry
+from indexing.hybrid_retriever import HybridRetriever
+from indexing.keyword_index import KeywordIndex
+from indexing.memmap_vectorstore import MemmapVectorStore
+from indexing.migration import MigrationCheckpoint
+from indexing.query_cache import QueryCachedEmbeddings, QueryEmbeddingCache
+from indexing.sync_manifest import ManifestEntry, SyncManifest
+from indexing.versions import IndexVersions, SwappableRetriever
+
+
+__all__ = [
+    "LoadedFile",
+    "iter_load_and_split",
+    "SQLiteDocStore",
+    "CachedEmbeddings",
+    "EmbeddingPipeline",
+    "RateLimitedEmbeddings",
+    "RateLimiter",
+    "GradeCache",
+    "ContentHashRegistry",
+    "HybridRetriever",
+    "KeywordIndex",
+    "MemmapVectorStore",
+    "MigrationCheckpoint",
+    "QueryCachedEmbeddings",
+    "QueryEmbeddingCache",
+    "ManifestEntry",
+    "SyncManifest",
+    "IndexVersions",
+    "SwappableRetriever",
+]
@@ -0,0 +1,325 @@
+import hashlib
+import multiprocessing
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.document_loaders import TextLoader
+from langchain_core.documents import Document
+
+
+# Namespace for content-derived document IDs
+DOC_ID_NAMESPACE = uuid.UUID("6f1c1c3e-8d4b-4f55-9a3e-2b7d0c9e5a41")
+
+# Below this many files per worker, process start-up costs more than it saves
+MIN_FILES_PER_WORKER = 16
+
+# Splitter of the current worker process, created once by _init_worker
+_splitter: Optional[RecursiveCharacterTextSplitter] = None
+
+
+class LoadedFile(NamedTuple):
+    """A source file loaded and split by a worker."""
+
+    path: str
+    document: Document
+    doc_id: str
+    chunks: List[Tuple[str, Document]]
+    seconds: float
+
+
+def make_splitter(chunk_size: int = 1000, chunk_overlap: int = 200) -> RecursiveCharacterTextSplitter:
+    """Create the text splitter used for every parent document."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", " ", ""]
+    )
+
+
+def document_id(content_hash: str) -> str:
+    """Derive a stable doc_id from a document's content hash."""
+    return str(uuid.uuid5(DOC_ID_NAMESPACE, content_hash))
+
+
+def split_document(
+    document: Document,
+    doc_id: str,
+    splitter: RecursiveCharacterTextSplitter
+) -> List[Tuple[str, Document]]:
+    """
+    Split a parent document into chunks with deterministic IDs.
+
+    Args:
+        document: Parent document
+        doc_id: ID of the parent document
+        splitter: Text splitter to use
+
+    Returns:
+        List of (chunk_id, chunk) pairs, chunk IDs being "<doc_id>-<index>"
+    """
+    return span_chunks(document.page_content, document.metadata, doc_id,
+                       split_with_offsets(document.page_content, splitter))
+
+
+def to_byte_spans(text: str, spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Convert character spans of text into byte spans of its UTF-8 encoding."""
+    if text.isascii():
+        return spans
+    byte_spans = []
+    char_pos = byte_pos = 0
+    for start, end in spans:
+        if start < char_pos:
+            char_pos = byte_pos = 0
+        byte_pos += len(text[char_pos:start].encode("utf-8"))
+        char_pos = start
+        byte_spans.append((byte_pos, byte_pos + len(text[start:end].encode("utf-8"))))
+    return byte_spans
+
+
+def span_chunks(
+    text: str,
+    metadata: dict,
+    doc_id: str,
+    spans: List[Tuple[int, int]]
+) -> List[Tuple[str, Document]]:
+    """
+    Build chunks that reference their parent by byte span.
+
+    Chunks carry doc_id, span_start and span_end (byte offsets into the
+    parent's UTF-8 text), so their text can be dropped from the vectorstore
+    and sliced from the docstore when needed (see SQLiteDocStore.materialize).
+
+    Args:
+        text: Parent text
+        metadata: Parent metadata, copied into every chunk
+        doc_id: ID of the parent document
+        spans: Character spans of the chunks in text
+
+    Returns:
+        List of (chunk_id, chunk) pairs, chunk IDs being "<doc_id>-<index>"
+    """
+    chunks = []
+    for i, ((start, end), (span_start, span_end)) in enumerate(
+            zip(spans, to_byte_spans(text, spans))):
+        chunk_metadata = {
+            **metadata, "doc_id": doc_id, "span_start": span_start, "span_end": span_end}
+        chunks.append((f"{doc_id}-{i}", Document(
+            page_content=text[start:end], metadata=chunk_metadata)))
+    return chunks
+
+
+def _init_worker(chunk_size: int, chunk_overlap: int) -> None:
+    global _splitter
+    _splitter = make_splitter(chunk_size, chunk_overlap)
+
+
+def load_and_split_file(path: str) -> LoadedFile:
+    """Load one text file, hash its content and split it (runs in a worker)."""
+    start = time.perf_counter()
+    document = TextLoader(path, encoding="utf-8").load()[0]
+    # Same digest as ingestion.get_document_hash
+    content_hash = hashlib.sha256(document.page_content.encode("utf-8")).hexdigest()
+    document.metadata["content_hash"] = content_hash
+    doc_id = document_id(content_hash)
+    chunks = split_document(document, doc_id, _splitter)
+    return LoadedFile(path, document, doc_id, chunks, time.perf_counter() - start)
+
+
+def iter_load_and_split(
+    paths: Sequence[str],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    max_workers: int = 4,
+    window: Optional[int] = None
+) -> Iterator[LoadedFile]:
+    """
+    Load and split files on a process pool, yielding results in input order.
+
+    Only `window` files are in flight at a time, so a slow consumer (the
+    embedding stage) holds back the workers instead of letting results pile
+    up in memory. Small inputs are processed in the calling process.
+
+    Args:
+        paths: Paths of the text files
+        chunk_size: Chunk size of the splitter
+        chunk_overlap: Chunk overlap of the splitter
+        max_workers: Maximum number of worker processes
+        window: Maximum number of files in flight (4 per worker by default)
+
+    Returns:
+        Iterator of LoadedFile, in the order of paths
+    """
+    workers = min(max_workers, len(paths) // MIN_FILES_PER_WORKER)
+    if workers <= 1:
+        _init_worker(chunk_size, chunk_overlap)
+        for path in paths:
+            yield load_and_split_file(path)
+        return
+
+    window = window or 4 * workers
+    # spawn rather than fork: the API process runs threads and holds SQLite handles
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(chunk_size, chunk_overlap)
+    ) as executor:
+        remaining = iter(paths)
+        pending = deque(
+            executor.submit(load_and_split_file, path)
+            for _, path in zip(range(window), remaining)
+        )
+        while pending:
+            loaded = pending.popleft().result()
+            path = next(remaining, None)
+            if path is not None:
+                pending.append(executor.submit(load_and_split_file, path))
+            yield loaded
+
+
+def iter_text_windows(path: str, window_chars: int) -> Iterator[str]:
+    """Read a UTF-8 text file in windows of window_chars characters (newlines as TextLoader)."""
+    with open(path, encoding="utf-8") as f:
+        while True:
+            text = f.read(window_chars)
+            if not text:
+                return
+            yield text
+
+
+def hash_text_file(path: str, window_chars: int = 1 << 20) -> str:
+    """Content hash of a text file computed in windows, equal to hashing its full text."""
+    digest = hashlib.sha256()
+    for text in iter_text_windows(path, window_chars):
+        digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def split_with_offsets(
+    text: str,
+    splitter: RecursiveCharacterTextSplitter
+) -> List[Tuple[int, int]]:
+    """
+    Split text and return the (start, end) character span of each chunk.
+
+    A chunk overlaps the previous one by at most the splitter's chunk_overlap,
+    so it is searched from that point on (and past the previous start); in
+    repetitive text, searching from the previous start alone would match an
+    occurrence inside the previous chunk.
+
+    Raises:
+        ValueError: If a chunk is not found in text, e.g. because the splitter
+            rewrote it; storing a bogus span would corrupt its materialized text
+    """
+    chunk_overlap = getattr(splitter, "_chunk_overlap", 0)
+    spans = []
+    search_from = 0
+    for index, chunk in enumerate(splitter.split_text(text)):
+        start = text.find(chunk, search_from)
+        if start < 0:
+            raise ValueError(
+                f"Chunk {index} is not a substring of the text after offset {search_from}")
+        spans.append((start, start + len(chunk)))
+        search_from = max(start + 1, start + len(chunk) - chunk_overlap)
+    return spans
+
+
+def iter_text_segments(
+    path: str,
+    splitter: RecursiveCharacterTextSplitter,
+    window_chars: int
+) -> Iterator[Tuple[int, str, List[Tuple[int, int]]]]:
+    """
+    Stream a text file as segments of whole chunks.
+
+    The file is read in windows. Each buffer is split, and all chunks but the
+    last are emitted; the last one may be cut by the window boundary, so the
+    buffer is carried over from its start and re-split with the next window.
+    Chunks therefore keep their overlap across windows (boundaries next to a
+    window edge may differ by a few characters from splitting the whole
+    text), and memory depends on window_chars, not on the file size.
+
+    Args:
+        path: Path of the text file
+        splitter: Text splitter to use
+        window_chars: Number of characters read per window
+
+    Returns:
+        Iterator of (segment offset in the file, segment text, chunk spans
+        relative to the segment)
+    """
+    windows = iter_text_windows(path, window_chars)
+    buffer = ""
+    buffer_offset = 0
+    emitted_end = 0
+    eof = False
+
+    while not eof:
+        text = next(windows, None)
+        if text is None:
+            eof = True
+        else:
+            buffer += text
+        if not buffer:
+            break
+
+        spans = split_with_offsets(buffer, splitter)
+        if eof:
+            keep, carry_start = spans, len(buffer)
+        elif len(spans) > 1:
+            keep, carry_start = spans[:-1], spans[-1][0]
+        else:
+            # Not even one complete chunk yet
+            continue
+
+        # Skip leftovers of a carried chunk that are already covered
+        keep = [(start, end) for start, end in keep if buffer_offset + end > emitted_end]
+        if keep:
+            segment_end = keep[-1][1]
+            emitted_end = buffer_offset + segment_end
+            yield buffer_offset, buffer[:segment_end], keep
+        buffer = buffer[carry_start:]
+        buffer_offset += carry_start
+
+
+def iter_segment_documents(
+    path: str,
+    doc_id: str,
+    content_hash: str,
+    splitter: RecursiveCharacterTextSplitter,
+    window_chars: int
+) -> Iterator[Tuple[str, Document, List[Tuple[str, Document]]]]:
+    """
+    Stream a large file as segment parents and their chunks.
+
+    A multi-gigabyte file cannot be a single parent, so each segment becomes
+    its own parent "<doc_id>:<n>". Chunks carry the segment as doc_id and
+    the file as source_id.
+
+    Args:
+        path: Path of the text file
+        doc_id: ID of the file as a whole
+        content_hash: Content hash of the whole file
+        splitter: Text splitter to use
+        window_chars: Number of characters read per window
+
+    Returns:
+        Iterator of (segment_id, segment document, list of (chunk_id, chunk))
+    """
+    segments = iter_text_segments(path, splitter, window_chars)
+    for index, (offset, text, spans) in enumerate(segments):
+        segment_id = f"{doc_id}:{index}"
+        metadata = {
+            "source": path,
+            "content_hash": content_hash,
+            "source_id": doc_id,
+            "segment": index,
+            "segment_start": offset,
+        }
+        chunks = span_chunks(text, metadata, segment_id, spans)
+        yield segment_id, Document(page_content=text, metadata=metadata), chunks
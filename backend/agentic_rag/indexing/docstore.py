@@ -0,0 +1,280 @@
+import json
+import mmap
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.stores import BaseStore
+
+
+class SQLiteDocStore(BaseStore[str, Document]):
+    """
+    Durable store for parent documents, keyed by doc_id.
+
+    Documents live next to the vectorstore, so they survive restarts and are
+    shared by every worker process instead of each one holding a full copy
+    in RAM. Parent text is appended once to a memory-mapped text file and
+    SQLite keeps its byte offset, length and metadata. Chunks reference their
+    parent by (doc_id, span_start, span_end) byte offsets and their text is
+    sliced straight out of the mapping on demand, so it is never stored
+    twice. A small in-process LRU keeps hot documents in memory, so resident
+    memory depends on cache_size, not corpus size.
+
+    Setting a key again with identical text reuses its bytes. Text of deleted
+    or replaced documents stays in the file (see dead_bytes): the file is only
+    ever appended to, because other processes slice it by offset. To reclaim
+    the space, rebuild the index (rebuild_index / POST /reindex), which copies
+    the live documents into the fresh docstore of a new version and prunes
+    the old one.
+    """
+
+    def __init__(self, path: str, cache_size: int = 256, batch_size: int = 500):
+        """
+        Args:
+            path: Path of the SQLite file (the text file is stored as <path>.text)
+            cache_size: Number of documents kept in the in-process LRU
+            batch_size: Maximum number of keys per SQL query in mget / mdelete
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.text_path = f"{path}.text"
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self._cache: "OrderedDict[str, Document]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        open(self.text_path, "ab").close()
+
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "doc_id TEXT PRIMARY KEY, page_content TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(documents)")}
+        if "text_offset" not in columns:
+            # Rows written before the text file existed keep their text inline
+            self._conn.execute("ALTER TABLE documents ADD COLUMN text_offset INTEGER")
+            self._conn.execute("ALTER TABLE documents ADD COLUMN text_length INTEGER")
+
+    def _remember(self, key: str, document: Document) -> None:
+        """Put a document in the LRU, evicting the least recently used one."""
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = document
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _batches(self, keys: Sequence[str]) -> Iterator[Sequence[str]]:
+        for start in range(0, len(keys), self.batch_size):
+            yield keys[start:start + self.batch_size]
+
+    def _decode(self, offset: int, length: int) -> str:
+        """Decode a byte range of the text file in place, remapping the file if it grew."""
+        if length <= 0:
+            return ""
+        end = offset + length
+        if self._mmap is None or len(self._mmap) < end:
+            if self._mmap is not None:
+                self._mmap.close()
+            with open(self.text_path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with memoryview(self._mmap) as view, view[offset:end] as text:
+            return str(text, "utf-8")
+
+    def _text(self, page_content: str, offset: Optional[int], length: Optional[int]) -> str:
+        if offset is None:
+            return page_content
+        return self._decode(offset, length)
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[Document]]:
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    found[key] = self._cache[key]
+                else:
+                    missing.append(key)
+
+            for batch in self._batches(missing):
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT doc_id, page_content, metadata, text_offset, text_length "
+                    f"FROM documents WHERE doc_id IN ({placeholders})",
+                    list(batch),
+                ).fetchall()
+                for doc_id, page_content, metadata, offset, length in rows:
+                    document = Document(
+                        page_content=self._text(page_content, offset, length),
+                        metadata=json.loads(metadata))
+                    found[doc_id] = document
+                    self._remember(doc_id, document)
+
+        return [found.get(key) for key in keys]
+
+    def _stored_spans(self, keys: Sequence[str]) -> dict:
+        """(text_offset, text_length) of the keys already stored in the text file."""
+        spans = {}
+        for batch in self._batches(list(keys)):
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT doc_id, text_offset, text_length FROM documents "
+                f"WHERE doc_id IN ({placeholders}) AND text_offset IS NOT NULL",
+                list(batch),
+            ).fetchall()
+            spans.update({doc_id: (offset, length) for doc_id, offset, length in rows})
+        return spans
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, Document]]) -> None:
+        encoded = [document.page_content.encode("utf-8") for _, document in key_value_pairs]
+        with self._lock:
+            # BEGIN IMMEDIATE serializes appends from every process sharing the store
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Re-ingesting unchanged documents keeps their bytes instead of appending them again
+                stored = self._stored_spans([key for key, _ in key_value_pairs])
+                spans = {}
+                for (key, document), data in zip(key_value_pairs, encoded):
+                    span = stored.get(key)
+                    if span is not None and span[1] == len(data) \
+                            and self._decode(*span) == document.page_content:
+                        spans[key] = span
+
+                appended = [
+                    data for (key, _), data in zip(key_value_pairs, encoded) if key not in spans]
+                with open(self.text_path, "r+b") as f:
+                    f.seek(0, os.SEEK_END)
+                    offset = f.tell()
+                    if appended:
+                        f.write(b"".join(appended))
+                        f.flush()
+                        os.fsync(f.fileno())
+
+                rows = []
+                for (key, document), data in zip(key_value_pairs, encoded):
+                    if key in spans:
+                        text_offset, length = spans[key]
+                    else:
+                        text_offset, length = offset, len(data)
+                        offset += len(data)
+                    rows.append((
+                        key, json.dumps(document.metadata, default=str), text_offset, length))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO documents "
+                    "(doc_id, page_content, metadata, text_offset, text_length) "
+                    "VALUES (?, '', ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            for key, document in key_value_pairs:
+                self._remember(key, document)
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        with self._lock:
+            for batch in self._batches(list(keys)):
+                placeholders = ",".join("?" * len(batch))
+                self._conn.execute(
+                    f"DELETE FROM documents WHERE doc_id IN ({placeholders})",
+                    list(batch),
+                )
+                for key in batch:
+                    self._cache.pop(key, None)
+
+    def dead_bytes(self) -> int:
+        """Bytes of the text file no longer referenced by any document."""
+        with self._lock:
+            (live,) = self._conn.execute(
+                "SELECT COALESCE(SUM(text_length), 0) FROM ("
+                "SELECT DISTINCT text_offset, text_length FROM documents "
+                "WHERE text_offset IS NOT NULL)").fetchone()
+        return os.path.getsize(self.text_path) - live
+
+    def yield_keys(self, prefix: Optional[str] = None) -> Iterator[str]:
+        with self._lock:
+            if prefix:
+                rows = self._conn.execute(
+                    "SELECT doc_id FROM documents WHERE substr(doc_id, 1, ?) = ? "
+                    "ORDER BY doc_id",
+                    (len(prefix), prefix),
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT doc_id FROM documents ORDER BY doc_id").fetchall()
+        for (doc_id,) in rows:
+            yield doc_id
+
+    def mget_spans(self, spans: Sequence[Tuple[str, int, int]]) -> List[Optional[str]]:
+        """
+        Read chunk texts by their (doc_id, span_start, span_end) byte spans.
+
+        Only the requested bytes are decoded; the parent text is not copied.
+
+        Args:
+            spans: Parent doc_id and byte offsets into its UTF-8 text
+
+        Returns:
+            Chunk texts, None where the parent is missing
+        """
+        doc_ids = list({doc_id for doc_id, _, _ in spans})
+        locations = {}
+        with self._lock:
+            for batch in self._batches(doc_ids):
+                placeholders = ",".join("?" * len(batch))
+                for doc_id, page_content, offset, length in self._conn.execute(
+                    f"SELECT doc_id, page_content, text_offset, text_length "
+                    f"FROM documents WHERE doc_id IN ({placeholders})",
+                    list(batch),
+                ):
+                    locations[doc_id] = (page_content, offset, length)
+
+            texts = []
+            for doc_id, start, end in spans:
+                if doc_id not in locations:
+                    texts.append(None)
+                    continue
+                page_content, offset, length = locations[doc_id]
+                if offset is None:
+                    texts.append(page_content.encode("utf-8")[start:end].decode("utf-8"))
+                else:
+                    texts.append(self._decode(offset + start, end - start))
+        return texts
+
+    def materialize(self, chunks: Sequence[Document]) -> List[Document]:
+        """
+        Fill in the text of span-referencing chunks read from the vectorstore.
+
+        Args:
+            chunks: Chunks carrying doc_id, span_start and span_end metadata
+
+        Returns:
+            The chunks, with page_content set from their parent's text
+        """
+        pending = [
+            chunk for chunk in chunks
+            if not chunk.page_content and "span_start" in chunk.metadata
+        ]
+        texts = self.mget_spans([
+            (chunk.metadata["doc_id"], chunk.metadata["span_start"], chunk.metadata["span_end"])
+            for chunk in pending
+        ])
+        for chunk, text in zip(pending, texts):
+            if text is not None:
+                chunk.page_content = text
+        return list(chunks)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper backed by a persistent, content-addressed vector cache.
+
+    Vectors are keyed by (embedding model, SHA256 of the text). Each model has
+    its own directory holding the vectors as raw float32 rows in one
+    append-only file, plus a SQLite index mapping text hash -> row number.
+    Only cache misses are sent to the provider, in batches of batch_size, so
+    re-indexing a mostly known corpus costs a fraction of the API calls.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache_dir: str,
+        model_name: Optional[str] = None,
+        batch_size: int = 512
+    ):
+        """
+        Args:
+            embeddings: Embedding provider to wrap
+            cache_dir: Root directory of the cache
+            model_name: Model name used in the cache key (read from the provider if omitted)
+            batch_size: Maximum number of texts per provider call
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name or getattr(
+            embeddings, "model", None) or type(embeddings).__name__
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+
+        model_dir = os.path.join(
+            cache_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", self.model_name))
+        os.makedirs(model_dir, exist_ok=True)
+        self.vectors_path = os.path.join(model_dir, "vectors.f32")
+        open(self.vectors_path, "ab").close()
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(model_dir, "index.sqlite3"),
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (key BLOB PRIMARY KEY, row INTEGER NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.dimensions: Optional[int] = None
+        self._load_dimensions()
+
+    def _load_dimensions(self) -> None:
+        """Read the vector size, which is fixed by the first stored vector."""
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE name = 'dimensions'").fetchone()
+        if row:
+            self.dimensions = row[0]
+
+    @staticmethod
+    def text_key(text: str) -> bytes:
+        """Content hash used as the cache key for a text."""
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def _lookup(self, keys: Sequence[bytes]) -> Dict[bytes, List[float]]:
+        """Read cached vectors for the given keys."""
+        if self.dimensions is None:
+            # Another process may have written the first vectors since
+            with self._lock:
+                self._load_dimensions()
+        if not keys or self.dimensions is None:
+            return {}
+
+        rows: Dict[bytes, int] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = list(keys[start:start + 500])
+                placeholders = ",".join("?" * len(batch))
+                rows.update(self._conn.execute(
+                    f"SELECT key, row FROM vectors WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall())
+
+        row_bytes = self.dimensions * 4
+        vectors = {}
+        with open(self.vectors_path, "rb") as f:
+            # Read in file order to keep the disk access sequential
+            for key, row in sorted(rows.items(), key=lambda item: item[1]):
+                f.seek(row * row_bytes)
+                data = f.read(row_bytes)
+                if len(data) != row_bytes:
+                    continue
+                vector = array("f")
+                vector.frombytes(data)
+                vectors[key] = vector.tolist()
+        return vectors
+
+    def _store(self, keys: Sequence[bytes], vectors: Sequence[List[float]]) -> None:
+        """Append vectors to the cache file and index them."""
+        if not keys:
+            return
+        with self._lock:
+            # BEGIN IMMEDIATE takes the SQLite write lock, which serializes
+            # appends from every process sharing the cache
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._load_dimensions()
+                if self.dimensions is None:
+                    self.dimensions = len(vectors[0])
+                    self._conn.execute(
+                        "INSERT INTO meta (name, value) VALUES ('dimensions', ?)",
+                        (self.dimensions,))
+                row_bytes = self.dimensions * 4
+
+                with open(self.vectors_path, "r+b") as f:
+                    f.seek(0, os.SEEK_END)
+                    # Round up so a torn row from a crashed writer is skipped
+                    first_row = -(-f.tell() // row_bytes)
+                    f.seek(first_row * row_bytes)
+                    f.write(array("f", [value for vector in vectors for value in vector]).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO vectors (key, row) VALUES (?, ?)",
+                    [(key, first_row + offset) for offset, key in enumerate(keys)],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self.text_key(text) for text in texts]
+        cached = self._lookup(list(set(keys)))
+
+        # Unique misses, in input order
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        # Repeats of a missing text are embedded once and count as hits
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        missing_keys = list(missing)
+        for start in range(0, len(missing_keys), self.batch_size):
+            batch_keys = missing_keys[start:start + self.batch_size]
+            vectors = self.embeddings.embed_documents(
+                [missing[key] for key in batch_keys])
+            self._store(batch_keys, vectors)
+            cached.update(zip(batch_keys, vectors))
+
+        return [list(cached[key]) for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
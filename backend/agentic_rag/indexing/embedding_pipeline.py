@@ -0,0 +1,310 @@
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from indexing.keyword_index import KeywordIndex
+from indexing.memmap_vectorstore import vector_collection
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether a provider error means the request was throttled."""
+    return (
+        getattr(error, "status_code", None) == 429
+        or type(error).__name__ == "RateLimitError"
+    )
+
+
+class RateLimiter:
+    """
+    Token-bucket scheduler for requests-per-minute and tokens-per-minute limits.
+
+    Both buckets start full and refill continuously; acquire() blocks until a
+    request of the given size fits in both. A throttled caller can pause()
+    the limiter so every thread backs off together instead of hammering the
+    provider. A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        """
+        Args:
+            requests_per_minute: Maximum requests per minute (0 for unlimited)
+            tokens_per_minute: Maximum tokens per minute (0 for unlimited)
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(
+            self.requests_per_minute,
+            self._requests + elapsed * self.requests_per_minute / 60)
+        self._tokens = min(
+            self.tokens_per_minute,
+            self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def acquire(self, tokens: int = 1) -> None:
+        """Block until one request of `tokens` tokens may be sent."""
+        if self.tokens_per_minute:
+            # A request larger than the bucket would otherwise wait forever
+            tokens = min(tokens, self.tokens_per_minute)
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                waits = [self._paused_until - now]
+                if self.requests_per_minute and self._requests < 1:
+                    waits.append((1 - self._requests) * 60 / self.requests_per_minute)
+                if self.tokens_per_minute and self._tokens < tokens:
+                    waits.append((tokens - self._tokens) * 60 / self.tokens_per_minute)
+                delay = max(waits)
+                if delay <= 0:
+                    if self.requests_per_minute:
+                        self._requests -= 1
+                    if self.tokens_per_minute:
+                        self._tokens -= tokens
+                    return
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for the given time."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class RateLimitedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that schedules provider calls under a RateLimiter and
+    retries throttled calls with exponential backoff and jitter.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        limiter: RateLimiter,
+        max_retries: int = 6,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 60.0
+    ):
+        """
+        Args:
+            embeddings: Embedding provider to wrap
+            limiter: Shared rate limiter
+            max_retries: Retries of a throttled call before giving up
+            initial_backoff: Backoff before the first retry, in seconds
+            max_backoff: Upper bound of a single backoff, in seconds
+        """
+        self.embeddings = embeddings
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.model = getattr(embeddings, "model", None)
+        self.retries = 0
+
+    def _call(self, func: Callable, payload, tokens: int):
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(tokens)
+            try:
+                return func(payload)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                delay = min(self.max_backoff, self.initial_backoff * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.0)
+                print(f"Embedding request throttled, retrying in {delay:.1f}s")
+                self.limiter.pause(delay)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        tokens = sum(estimate_tokens(text) for text in texts)
+        return self._call(self.embeddings.embed_documents, texts, tokens)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._call(self.embeddings.embed_query, text, estimate_tokens(text))
+
+
+def write_embeddings(
+    vectorstore: VectorStore,
+    ids: List[str],
+    documents: List[Document],
+    vectors: List[List[float]],
+    store_text: bool = True
+) -> None:
+    """
+    Write pre-computed chunk embeddings to the vectorstore in one bulk call.
+
+    Args:
+        vectorstore: Chroma or memmap vectorstore to write to
+        ids: Chunk IDs
+        documents: Chunks
+        vectors: Embeddings of the chunks
+        store_text: Whether to store the text of chunks that reference a parent span
+    """
+    vector_collection(vectorstore).upsert(
+        ids=ids,
+        embeddings=vectors,
+        metadatas=[doc.metadata for doc in documents],
+        documents=[
+            doc.page_content if store_text or "span_start" not in doc.metadata else ""
+            for doc in documents
+        ],
+    )
+
+
+class EmbeddingPipeline:
+    """
+    Bulk embedding stage between chunking and the vectorstore.
+
+    Chunks are grouped into batches bounded by both count and estimated
+    tokens, several batches are embedded concurrently, and each batch is
+    written to the vectorstore as soon as it completes. At most
+    2 * max_concurrency batches are in flight, so chunks can be streamed in
+    without holding the whole corpus in memory. Rate limiting and retries
+    are left to the embedding function (see RateLimitedEmbeddings).
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        vectorstore: VectorStore,
+        batch_size: int = 512,
+        batch_tokens: int = 100000,
+        max_concurrency: int = 4,
+        store_chunk_text: bool = True,
+        keyword_index: Optional[KeywordIndex] = None
+    ):
+        """
+        Args:
+            embeddings: Embedding function used for the chunks
+            vectorstore: Vectorstore receiving the chunks
+            batch_size: Maximum chunks per embedding request
+            batch_tokens: Maximum estimated tokens per embedding request
+            max_concurrency: Number of embedding requests in flight
+            store_chunk_text: Store chunk text in the vectorstore even when it
+                can be sliced from the parent
+            keyword_index: Keyword index updated along with the vectorstore
+        """
+        self.embeddings = embeddings
+        self.vectorstore = vectorstore
+        self.batch_size = batch_size
+        self.batch_tokens = batch_tokens
+        self.max_concurrency = max(1, max_concurrency)
+        self.store_chunk_text = store_chunk_text
+        self.keyword_index = keyword_index
+        self.stats = {"chunks": 0, "batches": 0, "embed_seconds": 0.0, "write_seconds": 0.0}
+
+    def _batches(
+        self,
+        items: Iterable[Tuple[str, Document]]
+    ) -> Iterator[List[Tuple[str, Document]]]:
+        batch: List[Tuple[str, Document]] = []
+        batch_tokens = 0
+        for item in items:
+            tokens = estimate_tokens(item[1].page_content)
+            if batch and (len(batch) >= self.batch_size
+                          or batch_tokens + tokens > self.batch_tokens):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(item)
+            batch_tokens += tokens
+        if batch:
+            yield batch
+
+    def _embed(self, batch: List[Tuple[str, Document]]) -> Tuple[List[List[float]], float]:
+        start = time.perf_counter()
+        vectors = self.embeddings.embed_documents([doc.page_content for _, doc in batch])
+        return vectors, time.perf_counter() - start
+
+    def add_documents(
+        self,
+        documents: Iterable[Document],
+        ids: Optional[Iterable[str]] = None
+    ) -> int:
+        """
+        Embed chunks and write them to the vectorstore.
+
+        Args:
+            documents: Chunks to add; may be a generator
+            ids: Chunk IDs in the same order (random UUIDs if omitted)
+
+        Returns:
+            Number of chunks written
+        """
+        if ids is None:
+            return self.add_chunks((str(uuid.uuid4()), doc) for doc in documents)
+        return self.add_chunks(zip(ids, documents))
+
+    def add_chunks(
+        self,
+        items: Iterable[Tuple[str, Document]],
+        on_write: Optional[Callable[[List[Tuple[str, Document]]], None]] = None
+    ) -> int:
+        """
+        Embed (chunk_id, chunk) pairs and write them to the vectorstore.
+
+        Args:
+            items: Pairs to add; may be a generator, consumed as batches free up
+            on_write: Called with each batch once it is written (batches
+                complete out of order), e.g. to checkpoint progress
+
+        Returns:
+            Number of chunks written
+        """
+        batches = self._batches(items)
+        written = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            in_flight = {}
+
+            def submit_next() -> None:
+                batch = next(batches, None)
+                if batch is not None:
+                    in_flight[executor.submit(self._embed, batch)] = batch
+
+            for _ in range(2 * self.max_concurrency):
+                submit_next()
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = in_flight.pop(future)
+                    vectors, embed_seconds = future.result()
+                    start = time.perf_counter()
+                    write_embeddings(
+                        self.vectorstore,
+                        [chunk_id for chunk_id, _ in batch],
+                        [doc for _, doc in batch],
+                        vectors,
+                        store_text=self.store_chunk_text
+                    )
+                    if self.keyword_index is not None:
+                        self.keyword_index.add(batch)
+                    self.stats["write_seconds"] += time.perf_counter() - start
+                    self.stats["embed_seconds"] += embed_seconds
+                    self.stats["batches"] += 1
+                    self.stats["chunks"] += len(batch)
+                    written += len(batch)
+                    if on_write is not None:
+                        on_write(batch)
+                    submit_next()
+
+        return written
@@ -0,0 +1,144 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Sequence
+
+from indexing.query_cache import normalize_query
+
+
+class GradeCache:
+    """
+    Persistent memo of document relevance grades.
+
+    Grades are keyed by (grader, SHA256 of the normalized question, doc_id).
+    doc_ids are derived from the document content, so a grade always refers
+    to the exact text it was given; the grader key changes with the grading
+    model and prompt. The SQLite file lives next to the docstore and is
+    shared by every worker process. Grades of a document are dropped when it
+    is removed or ingested again, and the least recently used grades are
+    evicted beyond max_entries.
+    """
+
+    # Writes between evictions
+    PRUNE_INTERVAL = 200
+
+    def __init__(self, path: str, max_entries: int = 200000):
+        """
+        Args:
+            path: Path of the SQLite file
+            max_entries: Number of grades kept
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS grades ("
+            "grader TEXT NOT NULL, question BLOB NOT NULL, doc_id TEXT NOT NULL, "
+            "source_id TEXT NOT NULL, grade TEXT NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (grader, question, doc_id))")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS grades_source ON grades (source_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS grades_last_used ON grades (last_used)")
+
+    @staticmethod
+    def question_key(question: str) -> bytes:
+        return hashlib.sha256(normalize_query(question).encode("utf-8")).digest()
+
+    @staticmethod
+    def source_id(doc_id: str) -> str:
+        """Document a parent belongs to (segments of a large file are '<doc_id>:<n>')."""
+        return doc_id.split(":", 1)[0]
+
+    def get_many(self, grader: str, question: str, doc_ids: Sequence[str]) -> Dict[str, str]:
+        """
+        Look up the grades of documents for a question.
+
+        Args:
+            grader: Key of the grading model and prompt
+            question: User question
+            doc_ids: IDs of the graded documents
+
+        Returns:
+            Dict of doc_id -> grade for the documents graded before
+        """
+        if not doc_ids:
+            return {}
+        question_key = self.question_key(question)
+        unique_ids = list(dict.fromkeys(doc_ids))
+        placeholders = ",".join("?" * len(unique_ids))
+        with self._lock:
+            grades = dict(self._conn.execute(
+                f"SELECT doc_id, grade FROM grades WHERE grader = ? AND question = ? "
+                f"AND doc_id IN ({placeholders})",
+                [grader, question_key, *unique_ids]).fetchall())
+            if grades:
+                self._conn.execute(
+                    f"UPDATE grades SET last_used = ? WHERE grader = ? AND question = ? "
+                    f"AND doc_id IN ({','.join('?' * len(grades))})",
+                    [time.time(), grader, question_key, *grades])
+            self.hits += len(grades)
+            self.misses += len(unique_ids) - len(grades)
+        return grades
+
+    def set_many(self, grader: str, question: str, grades: Dict[str, str]) -> None:
+        """
+        Record the grades of documents for a question.
+
+        Args:
+            grader: Key of the grading model and prompt
+            question: User question
+            grades: Dict of doc_id -> grade
+        """
+        if not grades:
+            return
+        question_key = self.question_key(question)
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO grades "
+                "(grader, question, doc_id, source_id, grade, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                [(grader, question_key, doc_id, self.source_id(doc_id), grade, now)
+                 for doc_id, grade in grades.items()])
+            self._writes += len(grades)
+            if self._writes >= self.PRUNE_INTERVAL:
+                self._writes = 0
+                self._conn.execute(
+                    "DELETE FROM grades WHERE rowid IN ("
+                    " SELECT rowid FROM grades ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,))
+
+    def invalidate(self, doc_ids: Iterable[str]) -> None:
+        """Drop every grade of the given documents, segments included."""
+        source_ids = list({self.source_id(doc_id) for doc_id in doc_ids})
+        with self._lock:
+            for start in range(0, len(source_ids), 500):
+                batch = source_ids[start:start + 500]
+                self._conn.execute(
+                    f"DELETE FROM grades WHERE source_id IN ({','.join('?' * len(batch))})",
+                    batch)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM grades").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and size of the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
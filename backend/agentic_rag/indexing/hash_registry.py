@@ -0,0 +1,148 @@
+import os
+import sqlite3
+import threading
+from typing import Callable, Iterable, Optional
+
+
+class BloomFilter:
+    """
+    Bloom filter over SHA256 digests.
+
+    The digests are already uniformly distributed, so the bit positions are
+    taken straight from 4-byte slices of the digest instead of rehashing.
+    """
+
+    def __init__(self, capacity: int, bits_per_item: int = 10, num_hashes: int = 7):
+        self.capacity = max(capacity, 1024)
+        self.num_bits = self.capacity * bits_per_item
+        self.num_hashes = min(num_hashes, 8)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest: bytes):
+        for i in range(self.num_hashes):
+            yield int.from_bytes(digest[i * 4:i * 4 + 4], "little") % self.num_bits
+
+    def add(self, digest: bytes) -> None:
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(digest)
+        )
+
+
+class ContentHashRegistry:
+    """
+    Persistent registry of document content hashes for duplicate detection.
+
+    Digests are stored as 32-byte blobs in a SQLite file next to the
+    vectorstore, so they survive restarts and are shared by every worker
+    process. An in-memory Bloom filter sits in front: most checks for new
+    documents are answered in O(1) without touching disk, and only possible
+    duplicates fall through to an indexed lookup. Digests added by other
+    processes are picked up incrementally by rowid.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        rebuild_from: Optional[Callable[[], Iterable[str]]] = None
+    ):
+        """
+        Args:
+            path: Path of the SQLite file
+            rebuild_from: Callable yielding the hex hashes of already indexed
+                documents, used to fill a registry that did not exist yet
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._needs_rebuild = rebuild_from is not None and not os.path.exists(path)
+        self._rebuild_from = rebuild_from
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS content_hashes ("
+            "id INTEGER PRIMARY KEY, digest BLOB NOT NULL UNIQUE)"
+        )
+        self._conn.commit()
+
+        self._bloom: Optional[BloomFilter] = None
+        self._last_id = 0
+
+    def _load(self) -> None:
+        """Build the Bloom filter, rebuilding the registry first if needed."""
+        if self._needs_rebuild:
+            self._needs_rebuild = False
+            print(f"Rebuilding content hash registry at {self.path}")
+            self._insert(bytes.fromhex(h) for h in self._rebuild_from())
+
+        count = self._conn.execute(
+            "SELECT COUNT(*) FROM content_hashes").fetchone()[0]
+        self._bloom = BloomFilter(capacity=2 * count)
+        self._last_id = 0
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Add digests written since the last refresh (by any process) to the Bloom filter."""
+        rows = self._conn.execute(
+            "SELECT id, digest FROM content_hashes WHERE id > ? ORDER BY id",
+            (self._last_id,),
+        ).fetchall()
+        for row_id, digest in rows:
+            self._bloom.add(digest)
+            self._last_id = row_id
+        if self._bloom.count > self._bloom.capacity:
+            # Too full for a useful false-positive rate; rebuild at twice the size
+            self._load()
+
+    def _insert(self, digests: Iterable[bytes]) -> None:
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO content_hashes (digest) VALUES (?)",
+            ((digest,) for digest in digests),
+        )
+        self._conn.commit()
+
+    def __contains__(self, content_hash: str) -> bool:
+        digest = bytes.fromhex(content_hash)
+        with self._lock:
+            if self._bloom is None:
+                self._load()
+            else:
+                self._refresh()
+            if digest not in self._bloom:
+                return False
+            return self._conn.execute(
+                "SELECT 1 FROM content_hashes WHERE digest = ?", (digest,)
+            ).fetchone() is not None
+
+    def add_many(self, content_hashes: Iterable[str]) -> None:
+        """Register the hashes of documents that have been indexed."""
+        with self._lock:
+            if self._bloom is None:
+                self._load()
+            self._insert(bytes.fromhex(h) for h in content_hashes)
+            self._refresh()
+
+    def discard_many(self, content_hashes: Iterable[str]) -> None:
+        """Forget hashes of documents removed from the index."""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM content_hashes WHERE digest = ?",
+                ((bytes.fromhex(h),) for h in content_hashes),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._bloom is None:
+                self._load()
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM content_hashes").fetchone()[0]
@@ -0,0 +1,111 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain.retrievers.multi_vector import MultiVectorRetriever, SearchType
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.runnables.config import run_in_executor
+
+from indexing.keyword_index import KeywordIndex
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    weights: Sequence[float],
+    k: int = 60
+) -> List[str]:
+    """
+    Merge rankings by weighted reciprocal rank fusion.
+
+    Each item scores sum(weight / (k + rank)) over the rankings it appears
+    in, ranks starting at 1. A larger k flattens the advantage of the top
+    ranks; a weight of 0 ignores that ranking.
+
+    Args:
+        rankings: Ranked item IDs, best first
+        weights: Weight of each ranking
+        k: Rank offset
+
+    Returns:
+        Item IDs by fused score, best first
+    """
+    scores: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        if weight <= 0:
+            continue
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + weight / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridRetriever(MultiVectorRetriever):
+    """
+    MultiVectorRetriever that fuses dense and BM25 keyword search.
+
+    The top `candidates` chunks of the vectorstore and of the keyword index
+    are mapped to their parents, and the two parent rankings are merged by
+    reciprocal rank fusion. search_kwargs["k"] (4 by default) parents are
+    returned. Without a keyword index it behaves as a MultiVectorRetriever.
+
+    Each returned parent carries the relevance score of its best chunk
+    (cosine similarity for both vectorstore backends) in
+    metadata[score_key], None if only the keyword search found it or the
+    search type is MMR, and its docstore key in metadata[id_key]. The
+    parents are copies, so docstore entries are left untouched.
+    """
+
+    keyword_index: Optional[KeywordIndex] = None
+    vector_weight: float = 1.0
+    keyword_weight: float = 1.0
+    rrf_k: int = 60
+    candidates: int = 20
+    score_key: str = "similarity"
+
+    def _vector_search(self, query: str, k: int) -> List[Tuple[Document, Optional[float]]]:
+        """Search chunks, with their relevance scores unless the search type is MMR."""
+        search_kwargs = {**self.search_kwargs, "k": k}
+        if self.search_type == SearchType.mmr:
+            return [(doc, None) for doc in
+                    self.vectorstore.max_marginal_relevance_search(query, **search_kwargs)]
+        return self.vectorstore.similarity_search_with_relevance_scores(query, **search_kwargs)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        top_k = self.search_kwargs.get("k", 4)
+        if self.keyword_index is None:
+            sub_docs = self._vector_search(query, top_k)
+        else:
+            sub_docs = self._vector_search(query, max(self.candidates, top_k))
+
+        # Parents in order of their best chunk, with that chunk's score
+        scores: Dict[str, Optional[float]] = {}
+        for doc, score in sub_docs:
+            doc_id = doc.metadata.get(self.id_key)
+            if doc_id is not None and doc_id not in scores:
+                scores[doc_id] = score
+        ids = list(scores)
+        if self.keyword_index is not None:
+            keyword_ids = list(dict.fromkeys(
+                doc_id for _, doc_id, _ in self.keyword_index.search(query, self.candidates)))
+            ids = reciprocal_rank_fusion(
+                [ids, keyword_ids],
+                [self.vector_weight, self.keyword_weight],
+                k=self.rrf_k
+            )[:top_k]
+
+        return [
+            Document(
+                page_content=doc.page_content,
+                metadata={**doc.metadata, self.id_key: doc_id, self.score_key: scores.get(doc_id)})
+            for doc_id, doc in zip(ids, self.docstore.mget(ids))
+            if doc is not None
+        ]
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return await run_in_executor(
+            None, self._get_relevant_documents, query, run_manager=run_manager.get_sync())
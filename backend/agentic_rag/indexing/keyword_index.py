@@ -0,0 +1,162 @@
+import os
+import re
+import sqlite3
+import threading
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+
+# Identifiers such as error codes, dotted names and snake_case are kept whole
+# and searched as phrases; FTS5 splits them into tokens of the same sequence
+QUERY_TERM_PATTERN = re.compile(r"\w+(?:[.:/-]\w+)*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it of on or "
+    "that the this to was what when where which who why with you".split()
+)
+
+
+def keyword_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching any of its terms."""
+    terms = []
+    for term in QUERY_TERM_PATTERN.findall(text):
+        if term.lower() in STOPWORDS or term in terms:
+            continue
+        terms.append(term)
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class KeywordIndex:
+    """
+    BM25 inverted index over chunks, kept next to the vectorstore.
+
+    Backed by a SQLite FTS5 table (porter stemming, unicode61 tokens), so it
+    is persistent, shared by every worker process and updated incrementally
+    with the vectorstore. Exact identifiers that dense embeddings blur, such
+    as error codes or function names, are matched by their terms.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        rebuild_from: Optional[Callable[[], Iterable[Tuple[str, Document]]]] = None
+    ):
+        """
+        Args:
+            path: Path of the SQLite file
+            rebuild_from: Callable yielding the (chunk_id, chunk) pairs already
+                in the vectorstore, used to fill an index that was never built
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._rebuild_from = rebuild_from
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "id INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL UNIQUE, doc_id TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS chunks_doc_id ON chunks (doc_id)")
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS chunk_text "
+            "USING fts5(text, tokenize='porter unicode61')"
+        )
+        self._conn.commit()
+        # user_version is set once the index holds every chunk of the vectorstore
+        self._built = self._conn.execute("PRAGMA user_version").fetchone()[0] > 0
+
+    def _ensure_built(self) -> None:
+        """Fill the index from the vectorstore the first time it is used."""
+        if self._built:
+            return
+        if self._rebuild_from is not None:
+            print(f"Building keyword index at {self.path}")
+            batch = []
+            for item in self._rebuild_from():
+                batch.append(item)
+                if len(batch) >= 1000:
+                    self._insert(batch)
+                    batch = []
+            self._insert(batch)
+        self._conn.execute("PRAGMA user_version = 1")
+        self._built = True
+
+    def _delete_rows(self, row_ids: List[int]) -> None:
+        self._conn.executemany(
+            "DELETE FROM chunk_text WHERE rowid = ?", ((row_id,) for row_id in row_ids))
+        self._conn.executemany(
+            "DELETE FROM chunks WHERE id = ?", ((row_id,) for row_id in row_ids))
+
+    def _insert(self, items: List[Tuple[str, Document]]) -> None:
+        """Insert or replace chunks, keyed by chunk_id."""
+        if not items:
+            return
+        placeholders = ",".join("?" * len(items))
+        existing = self._conn.execute(
+            f"SELECT id FROM chunks WHERE chunk_id IN ({placeholders})",
+            [chunk_id for chunk_id, _ in items],
+        ).fetchall()
+        self._delete_rows([row_id for (row_id,) in existing])
+        for chunk_id, chunk in items:
+            row_id = self._conn.execute(
+                "INSERT INTO chunks (chunk_id, doc_id) VALUES (?, ?)",
+                (chunk_id, chunk.metadata["doc_id"]),
+            ).lastrowid
+            self._conn.execute(
+                "INSERT INTO chunk_text (rowid, text) VALUES (?, ?)",
+                (row_id, chunk.page_content))
+        self._conn.commit()
+
+    def add(self, items: List[Tuple[str, Document]]) -> None:
+        """Index (chunk_id, chunk) pairs; chunks carry their parent in metadata["doc_id"]."""
+        with self._lock:
+            self._ensure_built()
+            self._insert(items)
+
+    def delete_documents(self, doc_ids: List[str], batch_size: int = 500) -> None:
+        """Remove every chunk of the given parents."""
+        with self._lock:
+            for start in range(0, len(doc_ids), batch_size):
+                batch = doc_ids[start:start + batch_size]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT id FROM chunks WHERE doc_id IN ({placeholders})", batch
+                ).fetchall()
+                self._delete_rows([row_id for (row_id,) in rows])
+            self._conn.commit()
+
+    def search(self, query: str, k: int = 20) -> List[Tuple[str, str, float]]:
+        """
+        Find the chunks best matching a free-text query by BM25.
+
+        Args:
+            query: Query text
+            k: Maximum number of chunks to return
+
+        Returns:
+            List of (chunk_id, doc_id, score), best first (higher scores are better)
+        """
+        match = keyword_query(query)
+        if not match:
+            return []
+        with self._lock:
+            self._ensure_built()
+            rows = self._conn.execute(
+                "SELECT chunks.chunk_id, chunks.doc_id, chunk_text.rank "
+                "FROM chunk_text JOIN chunks ON chunks.id = chunk_text.rowid "
+                "WHERE chunk_text MATCH ? ORDER BY chunk_text.rank LIMIT ?",
+                (match, k),
+            ).fetchall()
+        # FTS5 ranks by negated BM25, lower meaning more relevant
+        return [(chunk_id, doc_id, -rank) for chunk_id, doc_id, rank in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_built()
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
@@ -0,0 +1,777 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+try:
+    import hnswlib
+except ImportError:  # Searches stay exhaustive
+    hnswlib = None
+
+
+# Rows scored per NumPy block in exhaustive search, bounding temporary memory
+SEARCH_BLOCK_ROWS = 65536
+# Rows of int8 codes widened to float32 at a time, small enough to stay in CPU cache
+DECODE_BLOCK_ROWS = 512
+
+QUANTIZATIONS = ("none", "int8", "binary")
+
+# Set bits per 16-bit word, for Hamming distances without np.bitwise_count (NumPy >= 2)
+POPCOUNT = np.unpackbits(np.arange(1 << 16, dtype=np.uint16).view(np.uint8)).reshape(-1, 16).sum(
+    axis=1, dtype=np.uint8)
+
+_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def vector_collection(vectorstore: VectorStore) -> Any:
+    """Low-level collection API (upsert, get, query, count) of a Chroma or memmap vectorstore."""
+    return getattr(vectorstore, "_collection", vectorstore)
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantize rows to int8 with a symmetric per-row scale; returns (codes, scales)."""
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """Quantize rows to their packed sign bits (one bit per dimension)."""
+    return np.packbits(vectors > 0, axis=1)
+
+
+def hamming_similarity(query_bits: np.ndarray, block_bits: np.ndarray) -> np.ndarray:
+    """Negated Hamming distances between packed bit rows, shape (queries, rows)."""
+    if block_bits.shape[1] % 2 == 0:
+        query_bits, block_bits = query_bits.view(np.uint16), block_bits.view(np.uint16)
+    distances = np.empty((len(query_bits), len(block_bits)), dtype=np.float32)
+    for i, bits in enumerate(query_bits):
+        distances[i] = POPCOUNT[block_bits ^ bits].sum(axis=1, dtype=np.int32)
+    return -distances
+
+
+def where_to_sql(where: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """
+    Translate a Chroma-style metadata filter into a SQL condition.
+
+    Supports field equality, $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin,
+    $and and $or.
+
+    Args:
+        where: Metadata filter
+
+    Returns:
+        (SQL condition on the metadata column, query parameters)
+    """
+    clauses = []
+    params: List[Any] = []
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            parts = [where_to_sql(part) for part in condition]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(sql for sql, _ in parts) + ")")
+            for _, part_params in parts:
+                params.extend(part_params)
+            continue
+
+        if not re.fullmatch(r"\w+", key):
+            raise ValueError(f"Unsupported metadata key: {key!r}")
+        column = f"json_extract(metadata, '$.{key}')"
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for operator, value in condition.items():
+            if operator in ("$in", "$nin"):
+                placeholders = ",".join("?" * len(value)) or "NULL"
+                negation = "NOT " if operator == "$nin" else ""
+                clauses.append(f"{column} {negation}IN ({placeholders})")
+                params.extend(value)
+            elif operator in _OPERATORS:
+                clauses.append(f"{column} {_OPERATORS[operator]} ?")
+                params.append(value)
+            else:
+                raise ValueError(f"Unsupported filter operator: {operator}")
+    return " AND ".join(clauses) or "1", params
+
+
+class MemmapVectorStore(VectorStore):
+    """
+    Vectorstore keeping vectors in a memory-mapped matrix next to a SQLite table.
+
+    Vectors are L2-normalized and appended as rows of a raw float32 file;
+    SQLite maps each row to its ID, text and metadata, with expression
+    indexes on the metadata keys the index filters on. Every worker process
+    maps the same files, so the vectors are shared through the page cache
+    rather than loaded per process, and rows appended by another process are
+    picked up on the next search.
+
+    Without quantization, small collections are searched exhaustively with
+    blocked NumPy matrix products; above brute_force_limit live vectors, an
+    HNSW graph (hnswlib, inner product) is built over the rows, saved as
+    hnsw.bin and extended incrementally.
+
+    With int8 (per-row scale, 4x smaller) or binary (sign bits, 32x
+    smaller) quantization, a compact copy of every row is kept as well. The
+    first pass scans only that copy, so it is all that needs to stay in
+    memory; the top rescore_factor * k candidates are then re-scored with
+    their float32 rows, read from disk on demand.
+
+    Deleted and replaced rows stay in the files until the index is rebuilt
+    (a rebuild copies only live documents into a new store). Searches mask
+    them with a live-row bitmap, so they cost no extra candidates; the HNSW
+    graph skips them through a search filter and is rebuilt from the live
+    rows once most of its nodes are dead.
+
+    Also implements the Chroma collection calls used by the ingestion code
+    (upsert, get, query, count, delete); see vector_collection().
+    """
+
+    def __init__(
+        self,
+        persist_directory: str,
+        embedding_function: Embeddings,
+        quantization: str = "none",
+        rescore_factor: int = 4,
+        brute_force_limit: int = 20000,
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 200,
+        hnsw_ef_search: int = 64,
+        indexed_keys: Sequence[str] = ("doc_id", "source_id", "content_hash")
+    ):
+        """
+        Args:
+            persist_directory: Directory holding the vector files
+            embedding_function: Embedding function for queries and add_texts
+            quantization: First-pass vectors of new stores, 'none', 'int8' or
+                'binary' (an existing store keeps its own)
+            rescore_factor: Candidates re-scored in full precision per result
+                of a quantized search
+            brute_force_limit: Live vectors up to which unquantized searches are exhaustive
+            hnsw_m: Links per HNSW node
+            hnsw_ef_construction: Candidate list size while building the HNSW graph
+            hnsw_ef_search: Minimum candidate list size while searching the HNSW graph
+            indexed_keys: Metadata keys with a SQLite index for filtered lookups
+        """
+        os.makedirs(persist_directory, exist_ok=True)
+        self.persist_directory = persist_directory
+        self._embedding_function = embedding_function
+        self.rescore_factor = max(1, rescore_factor)
+        self.brute_force_limit = brute_force_limit
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_ef_search = hnsw_ef_search
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(
+            os.path.join(persist_directory, "vectors.sqlite3"),
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            "row INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, "
+            "document TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        for key in indexed_keys:
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS vectors_{key} "
+                f"ON vectors (json_extract(metadata, '$.{key}'))"
+            )
+
+        meta = dict(self._conn.execute("SELECT name, value FROM meta").fetchall())
+        if "quantization" not in meta:
+            if quantization not in QUANTIZATIONS:
+                raise ValueError(f"Unsupported quantization: {quantization}")
+            self._conn.execute(
+                "INSERT OR IGNORE INTO meta VALUES ('quantization', ?)", (quantization,))
+            meta = dict(self._conn.execute("SELECT name, value FROM meta").fetchall())
+        self.quantization = meta["quantization"]
+        self.dimensions: Optional[int] = int(meta["dimensions"]) if "dimensions" in meta else None
+
+        # Row files: full-precision vectors plus the first-pass representation
+        self._files = {"vectors": ("vectors.f32", np.float32)}
+        if self.quantization == "int8":
+            self._files.update(codes=("vectors.i8", np.int8), scales=("scales.f32", np.float32))
+        elif self.quantization == "binary":
+            self._files.update(codes=("vectors.bits", np.uint8))
+        for filename, _ in self._files.values():
+            open(os.path.join(persist_directory, filename), "ab").close()
+        self.index_path = os.path.join(persist_directory, "hnsw.bin")
+
+        self._maps: Dict[str, np.memmap] = {}
+        self._rows = 0
+        self._hnsw = None
+        self._hnsw_rows = 0
+        self._hnsw_saved_rows = 0
+        self._hnsw_lock = threading.Lock()
+        self._live = 0
+        self._live_version: Optional[Tuple[int, int]] = None
+        self._live_rows = np.zeros(0, dtype=bool)
+        self._live_rows_version: Optional[Tuple[int, int, int]] = None
+        self._writes = 0
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding_function
+
+    # Storage
+
+    def _row_width(self, name: str) -> int:
+        """Number of values per row in a row file."""
+        if name == "scales":
+            return 1
+        if name == "codes" and self.quantization == "binary":
+            return (self.dimensions + 7) // 8
+        return self.dimensions
+
+    def _row_bytes(self, name: str) -> int:
+        return self._row_width(name) * np.dtype(self._files[name][1]).itemsize
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.persist_directory, self._files[name][0])
+
+    def _map(self) -> int:
+        """Map rows appended since the last call (by any process); return the row count."""
+        with self._lock:
+            if self.dimensions is None:
+                row = self._conn.execute(
+                    "SELECT value FROM meta WHERE name = 'dimensions'").fetchone()
+                if row is None:
+                    return 0
+                self.dimensions = int(row[0])
+            # A row is complete once it is in every file
+            rows = min(
+                os.path.getsize(self._path(name)) // self._row_bytes(name) for name in self._files)
+            if rows != self._rows:
+                self._maps = {
+                    name: np.memmap(
+                        self._path(name), dtype=dtype, mode="r",
+                        shape=(rows, self._row_width(name)))
+                    for name, (_, dtype) in self._files.items()
+                }
+                self._rows = rows
+            return self._rows
+
+    def _encode(self, vectors: np.ndarray) -> Dict[str, bytes]:
+        """Serialize normalized vectors as rows of every row file."""
+        encoded = {"vectors": vectors.astype(np.float32).tobytes()}
+        if self.quantization == "int8":
+            codes, scales = quantize_int8(vectors)
+            encoded.update(codes=codes.tobytes(), scales=scales.tobytes())
+        elif self.quantization == "binary":
+            encoded["codes"] = quantize_binary(vectors).tobytes()
+        return encoded
+
+    def _decode(self, start: int, end: int) -> np.ndarray:
+        """Full-precision rows [start, end)."""
+        return np.asarray(self._maps["vectors"][start:end], dtype=np.float32)
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Optional[List[dict]] = None,
+        documents: Optional[List[str]] = None
+    ) -> None:
+        """Insert vectors, replacing those with the same IDs."""
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        metadatas = metadatas or [{} for _ in ids]
+        documents = documents or ["" for _ in ids]
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.dimensions is None:
+                    self.dimensions = vectors.shape[1]
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO meta VALUES ('dimensions', ?)", (self.dimensions,))
+                if vectors.shape[1] != self.dimensions:
+                    raise ValueError(
+                        f"Expected {self.dimensions}-dimensional vectors, got {vectors.shape[1]}")
+
+                # Rows are appended under the SQLite write lock, so processes never interleave
+                start = min(
+                    os.path.getsize(self._path(name)) // self._row_bytes(name)
+                    for name in self._files)
+                for name, data in self._encode(vectors).items():
+                    with open(self._path(name), "r+b") as f:
+                        # Drop partial rows left by an interrupted write
+                        f.truncate(start * self._row_bytes(name))
+                        f.seek(0, os.SEEK_END)
+                        f.write(data)
+                        f.flush()
+                        os.fsync(f.fileno())
+
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO vectors (row, id, document, metadata) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (start + i, id_, document or "", json.dumps(metadata or {}, default=str))
+                        for i, (id_, document, metadata) in enumerate(zip(ids, documents, metadatas))
+                    ],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            finally:
+                self._writes += 1
+
+    def count(self) -> int:
+        """Number of live vectors, re-counted only after a write by this or another connection."""
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._live_version != (data_version, self._writes):
+                self._live = self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+                self._live_version = (data_version, self._writes)
+            return self._live
+
+    def live_rows(self, rows: int) -> np.ndarray:
+        """Mask of the first `rows` rows still holding a vector, re-read only after a write."""
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            version = (data_version, self._writes, rows)
+            if self._live_rows_version != version:
+                live = np.fromiter(
+                    (row for (row,) in self._conn.execute("SELECT row FROM vectors")),
+                    dtype=np.int64)
+                mask = np.zeros(rows, dtype=bool)
+                mask[live[live < rows]] = True
+                self._live_rows = mask
+                self._live_rows_version = version
+            return self._live_rows
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        where_document: Optional[Dict[str, Any]] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Read stored vectors like Chroma's get.
+
+        Args:
+            ids: IDs to read (all if omitted)
+            where: Metadata filter
+            limit: Maximum number of results
+            offset: Number of results to skip
+            where_document: Not supported
+            include: Any of "documents", "metadatas", "embeddings" (documents and metadatas by default)
+
+        Returns:
+            Dict of ids, documents, metadatas and embeddings lists (None when not included)
+        """
+        if where_document:
+            raise ValueError("where_document filters are not supported")
+        include = ["documents", "metadatas"] if include is None else include
+        condition, params = where_to_sql(where or {})
+        if ids is not None:
+            ids = list(ids)
+            condition += f" AND id IN ({','.join('?' * len(ids)) or 'NULL'})"
+            params += ids
+        sql = f"SELECT row, id, document, metadata FROM vectors WHERE {condition} ORDER BY row"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params += [-1 if limit is None else limit, offset or 0]
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        result = {
+            "ids": [id_ for _, id_, _, _ in rows],
+            "documents": [document for _, _, document, _ in rows]
+            if "documents" in include else None,
+            "metadatas": [json.loads(metadata) for _, _, _, metadata in rows]
+            if "metadatas" in include else None,
+            "embeddings": None,
+        }
+        if "embeddings" in include:
+            self._map()
+            result["embeddings"] = [self._decode(row, row + 1)[0].tolist() for row, _, _, _ in rows]
+        return result
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> None:
+        if not ids:
+            return
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                self._conn.execute(
+                    f"DELETE FROM vectors WHERE id IN ({','.join('?' * len(batch))})", batch)
+            self._writes += 1
+
+    # Search
+
+    def _new_hnsw(self, rows: int) -> Any:
+        index = hnswlib.Index(space="ip", dim=self.dimensions)
+        index.init_index(
+            max_elements=max(2 * rows, 1024),
+            ef_construction=self.hnsw_ef_construction,
+            M=self.hnsw_m
+        )
+        return index
+
+    def _sync_hnsw(self, rows: int, live: np.ndarray) -> None:
+        """
+        Load or build the HNSW graph and add the live rows it does not cover yet.
+
+        Node labels are row numbers. Once dead rows make up most of the
+        graph, it is rebuilt from the live rows alone.
+        """
+        rebuilt = False
+        if self._hnsw is None:
+            if os.path.exists(self.index_path):
+                index = hnswlib.Index(space="ip", dim=self.dimensions)
+                index.load_index(self.index_path, max_elements=max(2 * rows, 1024))
+                labels = index.get_ids_list()
+                # Rows below the highest label were all added when live
+                self._hnsw_rows = self._hnsw_saved_rows = max(labels) + 1 if labels else 0
+            else:
+                index = self._new_hnsw(rows)
+            self._hnsw = index
+
+        covered = min(self._hnsw_rows, rows)
+        dead_nodes = self._hnsw.get_current_count() - int(live[:covered].sum())
+        if dead_nodes > max(1000, self._hnsw.get_current_count() // 2):
+            self._hnsw = self._new_hnsw(rows)
+            self._hnsw_rows = 0
+            rebuilt = True
+
+        if rows > self._hnsw_rows:
+            if rows > self._hnsw.get_max_elements():
+                self._hnsw.resize_index(2 * rows)
+            for start in range(self._hnsw_rows, rows, SEARCH_BLOCK_ROWS):
+                end = min(start + SEARCH_BLOCK_ROWS, rows)
+                labels = start + np.flatnonzero(live[start:end])
+                if len(labels):
+                    self._hnsw.add_items(
+                        np.asarray(self._maps["vectors"][labels], dtype=np.float32), labels)
+            self._hnsw_rows = rows
+            if rebuilt or rows - self._hnsw_saved_rows >= max(1000, self._hnsw_saved_rows // 10):
+                # Saved for the next process to start from; the swap is atomic
+                temp_path = f"{self.index_path}.{uuid.uuid4().hex}.tmp"
+                self._hnsw.save_index(temp_path)
+                os.replace(temp_path, self.index_path)
+                self._hnsw_saved_rows = rows
+
+    def _first_pass_scorer(self, queries: np.ndarray) -> Callable[[int, int], np.ndarray]:
+        """Score function of row blocks against the queries, on the first-pass representation."""
+        if self.quantization == "int8":
+            def score(start: int, end: int) -> np.ndarray:
+                # Widen small slices so the float32 copy stays in cache
+                scores = np.empty((len(queries), end - start), dtype=np.float32)
+                for offset in range(start, end, DECODE_BLOCK_ROWS):
+                    stop = min(offset + DECODE_BLOCK_ROWS, end)
+                    codes = np.asarray(self._maps["codes"][offset:stop], dtype=np.float32)
+                    scores[:, offset - start:stop - start] = queries @ codes.T
+                return scores * np.asarray(self._maps["scales"][start:end, 0])
+        elif self.quantization == "binary":
+            query_bits = quantize_binary(queries)
+
+            def score(start: int, end: int) -> np.ndarray:
+                return hamming_similarity(query_bits, np.asarray(self._maps["codes"][start:end]))
+        else:
+            def score(start: int, end: int) -> np.ndarray:
+                return queries @ self._decode(start, end).T
+        return score
+
+    def _scan(
+        self, queries: np.ndarray, fetch: int, rows: int, live: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exhaustive first pass; returns (scores, rows) of the top `fetch` rows per query, unsorted.
+
+        Dead rows score -inf, so they only fill the result when fewer than
+        `fetch` rows are live.
+        """
+        score = self._first_pass_scorer(queries)
+        # Scores are (queries, rows); fewer rows per block for query batches
+        block_rows = max(1024, SEARCH_BLOCK_ROWS // len(queries))
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, rows, block_rows):
+            end = min(start + block_rows, rows)
+            block_scores = score(start, end)
+            dead = ~live[start:end]
+            if dead.any():
+                block_scores[:, dead] = -np.inf
+            scores = np.concatenate([best_scores, block_scores], axis=1)
+            candidates = np.concatenate(
+                [best_rows, np.broadcast_to(np.arange(start, end), (len(queries), end - start))],
+                axis=1)
+            if scores.shape[1] > fetch:
+                top = np.argpartition(-scores, fetch - 1, axis=1)[:, :fetch]
+                scores = np.take_along_axis(scores, top, axis=1)
+                candidates = np.take_along_axis(candidates, top, axis=1)
+            best_scores, best_rows = scores, candidates
+        return best_scores, best_rows
+
+    def _rescore(
+        self, queries: np.ndarray, candidate_rows: np.ndarray, fetch: int, live: np.ndarray
+    ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """Re-score live first-pass candidates with their full-precision rows; keeps the top `fetch`."""
+        all_scores, all_rows = [], []
+        for query, rows in zip(queries, candidate_rows):
+            # Dead rows only fill the first pass when few rows are live; sorted reads
+            # touch the float32 file in order
+            rows = np.sort(rows[live[rows]])
+            scores = np.asarray(self._maps["vectors"][rows], dtype=np.float32) @ query
+            top = np.argsort(-scores)[:fetch]
+            all_scores.append(scores[top])
+            all_rows.append(rows[top])
+        return all_scores, all_rows
+
+    def _hnsw_search(
+        self, queries: np.ndarray, fetch: int, rows: int, live: np.ndarray
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Top `fetch` live rows per query from the HNSW graph; None if it cannot return them."""
+        with self._hnsw_lock:
+            self._sync_hnsw(rows, live)
+            self._hnsw.set_ef(max(self.hnsw_ef_search, fetch))
+            live_count = int(live.sum())
+            try:
+                if live_count == self._hnsw.get_current_count():
+                    candidates, distances = self._hnsw.knn_query(queries, k=min(fetch, live_count))
+                else:
+                    # Python filters need the GIL, so the query runs on one thread
+                    candidates, distances = self._hnsw.knn_query(
+                        queries, k=min(fetch, live_count), num_threads=1,
+                        filter=lambda label: bool(live[label]))
+            except RuntimeError:
+                # Too few live nodes reachable within ef
+                return None
+        return 1.0 - distances, candidates
+
+    def _candidates(self, queries: np.ndarray, fetch: int, rows: int) -> List[List[Tuple[int, float]]]:
+        """Top `fetch` live (row, similarity) pairs per query among the first `rows` rows."""
+        live = self.live_rows(rows)
+        if not live.any():
+            return [[] for _ in queries]
+        found = None
+        if self.quantization != "none":
+            first_pass_size = min(int(live.sum()), fetch * self.rescore_factor)
+            _, first_pass = self._scan(queries, first_pass_size, rows, live)
+            found = self._rescore(queries, first_pass, fetch, live)
+        elif hnswlib is not None and self.count() > self.brute_force_limit:
+            found = self._hnsw_search(queries, fetch, rows, live)
+        scores, candidates = found or self._scan(queries, fetch, rows, live)
+
+        results = []
+        for row_scores, row_ids in zip(scores, candidates):
+            order = np.argsort(-row_scores)
+            results.append([(int(row_ids[i]), float(row_scores[i])) for i in order])
+        return results
+
+    def _filtered_candidates(
+        self, queries: np.ndarray, fetch: int, rows: int, where: Dict[str, Any]
+    ) -> List[List[Tuple[int, float]]]:
+        """Exact search restricted to the mapped rows matching a metadata filter."""
+        condition, params = where_to_sql(where)
+        with self._lock:
+            allowed = np.array([
+                row for (row,) in self._conn.execute(
+                    f"SELECT row FROM vectors WHERE {condition} ORDER BY row", params)
+            ], dtype=np.int64)
+        allowed = allowed[allowed < rows]
+        if not len(allowed):
+            return [[] for _ in queries]
+        scores = queries @ np.asarray(self._maps["vectors"][allowed], dtype=np.float32).T
+        results = []
+        for row_scores in scores:
+            order = np.argsort(-row_scores)[:fetch]
+            results.append([(int(allowed[i]), float(row_scores[i])) for i in order])
+        return results
+
+    def _search(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        k: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[str, str, dict, float, int]]]:
+        """Return the k nearest live vectors per query as (id, document, metadata, cosine distance, row)."""
+        rows = self._map()
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if rows == 0 or k <= 0:
+            return [[] for _ in queries]
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        if where:
+            candidates = self._filtered_candidates(queries, k, rows, where)
+        else:
+            candidates = self._candidates(queries, k, rows)
+
+        wanted = sorted({row for query_candidates in candidates for row, _ in query_candidates})
+        records: Dict[int, Tuple[str, str, str]] = {}
+        with self._lock:
+            for start in range(0, len(wanted), 500):
+                batch = wanted[start:start + 500]
+                for row, id_, document, metadata in self._conn.execute(
+                    f"SELECT row, id, document, metadata FROM vectors "
+                    f"WHERE row IN ({','.join('?' * len(batch))})",
+                    batch,
+                ):
+                    records[row] = (id_, document, metadata)
+
+        results = []
+        for query_candidates in candidates:
+            hits = []
+            for row, similarity in query_candidates:
+                if row in records:
+                    id_, document, metadata = records[row]
+                    hits.append((id_, document, json.loads(metadata), 1.0 - similarity, row))
+                    if len(hits) == k:
+                        break
+            results.append(hits)
+        return results
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Nearest neighbours of several query vectors, in the shape of Chroma's query."""
+        results = self._search(query_embeddings, n_results, where)
+        return {
+            "ids": [[hit[0] for hit in hits] for hits in results],
+            "documents": [[hit[1] for hit in hits] for hits in results],
+            "metadatas": [[hit[2] for hit in hits] for hits in results],
+            "distances": [[hit[3] for hit in hits] for hits in results],
+        }
+
+    # VectorStore interface
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        texts = list(texts)
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        self.upsert(ids, self._embedding_function.embed_documents(texts), metadatas, texts)
+        return ids
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        return [
+            (Document(page_content=document, metadata=metadata), distance)
+            for _, document, metadata, distance, _ in self._search([embedding], k, filter)[0]
+        ]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self._embedding_function.embed_query(query), k, filter)
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        """
+        Return k documents chosen for relevance and diversity among the fetch_k nearest.
+
+        The candidates are re-ranked with their stored float32 rows, whatever
+        the quantization, so no text is embedded again.
+
+        Args:
+            embedding: Query vector
+            k: Number of documents to return
+            fetch_k: Number of nearest candidates to choose from
+            lambda_mult: 1 for pure relevance, 0 for maximum diversity
+            filter: Metadata filter
+
+        Returns:
+            Documents in MMR selection order
+        """
+        hits = self._search([embedding], fetch_k, filter)[0]
+        if not hits:
+            return []
+        vectors = np.asarray(
+            self._maps["vectors"][np.array([hit[4] for hit in hits])], dtype=np.float32)
+        selected = maximal_marginal_relevance(
+            np.asarray(embedding, dtype=np.float32), vectors, lambda_mult=lambda_mult, k=k)
+        return [Document(page_content=hits[i][1], metadata=hits[i][2]) for i in selected]
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(
+            self._embedding_function.embed_query(query), k, fetch_k, lambda_mult, filter)
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Scores are cosine distances of normalized vectors
+        return lambda distance: 1.0 - distance
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        persist_directory: str = "memmap_db",
+        **kwargs: Any
+    ) -> "MemmapVectorStore":
+        store = cls(persist_directory, embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids)
+        return store
@@ -0,0 +1,134 @@
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from langchain_core.vectorstores import VectorStore
+
+from indexing.memmap_vectorstore import vector_collection
+
+
+class MigrationCheckpoint:
+    """
+    Progress of an embedding migration, persisted so it can resume after a crash.
+
+    Holds the source and target index versions and the embedding model of
+    the migration, plus the IDs of the parent documents whose chunks are all
+    written to the target. Writes are idempotent upserts, so a resumed run
+    only redoes the parents that were in flight when it stopped.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path of the SQLite file
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS done (doc_id TEXT PRIMARY KEY)")
+        self._conn.commit()
+
+    def state(self) -> Optional[Dict[str, str]]:
+        """Return source_version, target_version and embedding_model, or None if no migration is recorded."""
+        with self._lock:
+            rows = self._conn.execute("SELECT name, value FROM meta").fetchall()
+        return dict(rows) or None
+
+    def start(self, source_version: str, target_version: str, embedding_model: str) -> None:
+        """Record a new migration, forgetting any previous progress."""
+        with self._lock:
+            self._conn.execute("DELETE FROM meta")
+            self._conn.execute("DELETE FROM done")
+            self._conn.executemany(
+                "INSERT INTO meta (name, value) VALUES (?, ?)",
+                [("source_version", source_version),
+                 ("target_version", target_version),
+                 ("embedding_model", embedding_model)],
+            )
+            self._conn.commit()
+
+    def done_ids(self) -> Set[str]:
+        """IDs of the parents already migrated."""
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT doc_id FROM done")}
+
+    def mark_done(self, doc_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO done (doc_id) VALUES (?)",
+                ((doc_id,) for doc_id in doc_ids))
+            self._conn.commit()
+
+    def close(self, remove: bool = False) -> None:
+        """Close the checkpoint, deleting its files once the migration is finished."""
+        self._conn.close()
+        if remove:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM done").fetchone()[0]
+
+
+def nearest_chunk_ids(vectorstore: VectorStore, queries: List[str], k: int) -> List[List[str]]:
+    """IDs of the k nearest chunks of each query, embedded with the vectorstore's own model."""
+    vectors = vectorstore.embeddings.embed_documents(queries)
+    result = vector_collection(vectorstore).query(
+        query_embeddings=vectors, n_results=k, include=[])
+    return result["ids"]
+
+
+def sample_recall(
+    source: VectorStore,
+    target: VectorStore,
+    queries: List[str],
+    expected_ids: List[str],
+    k: int = 10
+) -> Dict[str, Any]:
+    """
+    Compare retrieval of two collections holding the same chunks on sample queries.
+
+    Each collection embeds the queries with its own model. Recall is the
+    share of the source's top-k that the target also returns, averaged over
+    the queries; the self-hit rates give how often the chunk a query was
+    taken from is in each top-k.
+
+    Args:
+        source: Collection embedded with the old model
+        target: Collection embedded with the new model
+        queries: Sample query texts, typically chunk texts
+        expected_ids: ID of the chunk each query was taken from
+        k: Number of results compared per query
+
+    Returns:
+        Dict with recall_at_k, source_self_hit_rate, target_self_hit_rate and the number of queries
+    """
+    if not queries:
+        return {"queries": 0, "k": k, "recall_at_k": None,
+                "source_self_hit_rate": None, "target_self_hit_rate": None}
+
+    source_ids = nearest_chunk_ids(source, queries, k)
+    target_ids = nearest_chunk_ids(target, queries, k)
+    recalls = [
+        len(set(old) & set(new)) / len(old)
+        for old, new in zip(source_ids, target_ids) if old
+    ]
+    return {
+        "queries": len(queries),
+        "k": k,
+        "recall_at_k": sum(recalls) / len(recalls) if recalls else None,
+        "source_self_hit_rate": sum(
+            expected in ids for expected, ids in zip(expected_ids, source_ids)) / len(queries),
+        "target_self_hit_rate": sum(
+            expected in ids for expected, ids in zip(expected_ids, target_ids)) / len(queries),
+    }
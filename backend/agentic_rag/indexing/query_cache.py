@@ -0,0 +1,214 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_query(text: str) -> str:
+    """Cache form of a question: Unicode NFKC, case-folded, single spaces, no trailing punctuation."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return re.sub(r"\s+", " ", text).strip().rstrip("?!.").rstrip()
+
+
+class QueryEmbeddingCache:
+    """
+    LRU cache of query vectors with a time to live and a size limit in bytes.
+
+    Entries are keyed by (embedding model, SHA256 of the normalized query),
+    so repeated questions differing only in case, spacing or trailing
+    punctuation share one vector. With a path, vectors are also kept in a
+    SQLite file that every worker process on the host reads and writes, so
+    a question embedded by one worker is a hit in the others.
+    """
+
+    # Puts between prunes of the shared file
+    PRUNE_INTERVAL = 256
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        path: Optional[str] = None
+    ):
+        """
+        Args:
+            max_bytes: Size limit of the cached vectors, in memory and in the file each
+            ttl_seconds: Age after which a vector is embedded again
+            path: SQLite file shared across processes (in-process only if None)
+        """
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.file_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._entries: "OrderedDict[Tuple[str, bytes], Tuple[array, float]]" = OrderedDict()
+        self._bytes = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS queries ("
+                "model TEXT NOT NULL, key BLOB NOT NULL, vector BLOB NOT NULL, "
+                "created REAL NOT NULL, PRIMARY KEY (model, key))")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS queries_created ON queries (created)")
+
+    @staticmethod
+    def query_key(text: str) -> bytes:
+        return hashlib.sha256(normalize_query(text).encode("utf-8")).digest()
+
+    def _entry_bytes(self, vector: array) -> int:
+        return len(vector) * vector.itemsize + 32
+
+    def _remember(self, key: Tuple[str, bytes], vector: array, created: float) -> None:
+        """Insert into the LRU, evicting the least recently used entries over max_bytes."""
+        if key in self._entries:
+            self._bytes -= self._entry_bytes(self._entries.pop(key)[0])
+        self._entries[key] = (vector, created)
+        self._bytes += self._entry_bytes(vector)
+        while self._bytes > self.max_bytes and self._entries:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._bytes -= self._entry_bytes(evicted)
+            self.evictions += 1
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """
+        Look up the vector of a query.
+
+        Args:
+            model: Embedding model name
+            text: Query text
+
+        Returns:
+            Cached vector, or None on a miss
+        """
+        key = (model, self.query_key(text))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                vector, created = entry
+                if now - created < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector.tolist()
+                del self._entries[key]
+                self._bytes -= self._entry_bytes(vector)
+                self.expirations += 1
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT vector, created FROM queries WHERE model = ? AND key = ? AND created > ?",
+                    (model, key[1], now - self.ttl_seconds)).fetchone()
+                if row is not None:
+                    vector = array("f")
+                    vector.frombytes(row[0])
+                    self._remember(key, vector, row[1])
+                    self.file_hits += 1
+                    return vector.tolist()
+
+            self.misses += 1
+            return None
+
+    def put(self, model: str, text: str, vector: List[float]) -> None:
+        """
+        Cache the vector of a query.
+
+        Args:
+            model: Embedding model name
+            text: Query text
+            vector: Its embedding
+        """
+        key = (model, self.query_key(text))
+        stored = array("f", vector)
+        now = time.time()
+        with self._lock:
+            self._remember(key, stored, now)
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO queries (model, key, vector, created) VALUES (?, ?, ?, ?)",
+                (model, key[1], stored.tobytes(), now))
+            self._puts += 1
+            if self._puts % self.PRUNE_INTERVAL == 0:
+                self._prune_file(now)
+
+    def _prune_file(self, now: float) -> None:
+        """Drop expired rows, then the oldest rows until the file is within max_bytes."""
+        self._conn.execute("DELETE FROM queries WHERE created <= ?", (now - self.ttl_seconds,))
+        excess = self._conn.execute(
+            "SELECT COALESCE(SUM(length(vector)), 0) FROM queries").fetchone()[0] - self.max_bytes
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM queries WHERE rowid IN ("
+                " SELECT rowid FROM (SELECT rowid, SUM(length(vector)) OVER (ORDER BY created)"
+                " AS running FROM queries) WHERE running - length(vector) < ?)",
+                (excess,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM queries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and size of the cache."""
+        with self._lock:
+            lookups = self.hits + self.file_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "file_hits": self.file_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits + self.file_hits) / lookups if lookups else None,
+            }
+
+
+class QueryCachedEmbeddings(Embeddings):
+    """Embeddings wrapper answering embed_query from a QueryEmbeddingCache; documents pass through."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache: QueryEmbeddingCache,
+        model_name: Optional[str] = None
+    ):
+        """
+        Args:
+            embeddings: Embedding function to wrap
+            cache: Query vector cache, usually shared by every index of the process
+            model_name: Model name used in the cache key (read from the provider if omitted)
+        """
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name or getattr(
+            embeddings, "model", None) or type(embeddings).__name__
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.cache.get(self.model_name, text)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put(self.model_name, text, vector)
+        return vector
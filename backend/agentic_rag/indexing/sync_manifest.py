@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, NamedTuple, Optional
+
+
+class ManifestEntry(NamedTuple):
+    """State of one source file as of the last sync."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+    doc_id: Optional[str]
+
+
+class SyncManifest:
+    """
+    Record of the source files that make up the index.
+
+    Each file is stored with its size, mtime and content hash, plus the
+    doc_id of the parent document holding its content. Files whose size and
+    mtime are unchanged are skipped without being read; files whose content
+    is unchanged are only re-stamped. doc_id is shared by files with the same
+    content, and is None when the content was indexed outside the sync.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path of the SQLite file
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+            "content_hash TEXT NOT NULL, doc_id TEXT)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS files_content_hash ON files (content_hash)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS files_doc_id ON files (doc_id)")
+        self._conn.commit()
+
+    def entries(self) -> Dict[str, ManifestEntry]:
+        """Return every recorded file, keyed by path."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime_ns, content_hash, doc_id FROM files").fetchall()
+        return {row[0]: ManifestEntry(*row) for row in rows}
+
+    def doc_id_for(self, content_hash: str) -> Optional[str]:
+        """Return the doc_id already holding this content, if any file maps to one."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc_id FROM files WHERE content_hash = ? AND doc_id IS NOT NULL LIMIT 1",
+                (content_hash,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def is_referenced(self, doc_id: str) -> bool:
+        """Check whether any recorded file still maps to doc_id."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM files WHERE doc_id = ? LIMIT 1", (doc_id,)
+            ).fetchone() is not None
+
+    def upsert(self, entries: Iterable[ManifestEntry]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, content_hash, doc_id) "
+                "VALUES (?, ?, ?, ?, ?)",
+                list(entries),
+            )
+            self._conn.commit()
+
+    def delete(self, paths: Iterable[str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM files WHERE path = ?", ((path,) for path in paths))
+            self._conn.commit()
+
+    def copy_to(self, path: str) -> None:
+        """Write a consistent copy of the manifest to another SQLite file."""
+        target = sqlite3.connect(path)
+        try:
+            with self._lock:
+                self._conn.backup(target)
+        finally:
+            target.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
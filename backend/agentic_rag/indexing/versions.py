@@ -0,0 +1,201 @@
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+
+# Version ID of an index created before versioning, stored directly in the root
+LEGACY_VERSION = "."
+
+
+def read_index_info(path: str) -> Dict[str, Any]:
+    """Build information of the index in path (e.g. its embedding model); empty if not recorded."""
+    try:
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_index_info(path: str, info: Dict[str, Any]) -> None:
+    """Record build information of the index in path."""
+    # Written aside and renamed, so other processes never read a partial file
+    tmp_path = os.path.join(path, f"index.json.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(info, f)
+    os.replace(tmp_path, os.path.join(path, "index.json"))
+
+
+def mark_index_changed(path: str) -> str:
+    """
+    Give the documents of the index in path a new content version.
+
+    The version is a random token rather than a counter, so concurrent
+    writers can never leave behind a value that was already seen.
+
+    Args:
+        path: Directory of the index
+
+    Returns:
+        The new content version
+    """
+    info = read_index_info(path)
+    info["content_version"] = uuid.uuid4().hex
+    write_index_info(path, info)
+    return info["content_version"]
+
+
+class IndexVersions:
+    """
+    Versioned index snapshots under one root directory.
+
+    Each version is a complete index (vectorstore, docstore, registries) in
+    <root>/versions/<version_id>. The CURRENT file names the live version
+    and the ones it replaced; it is rewritten through os.replace, so
+    switching versions is a single atomic rename and readers never see a
+    half-written pointer.
+    """
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: Root directory of the index
+        """
+        self.root = root
+        self.versions_dir = os.path.join(root, "versions")
+        self.pointer_path = os.path.join(root, "CURRENT")
+
+    def _read_pointer(self) -> Dict[str, Any]:
+        try:
+            with open(self.pointer_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"current": None, "history": []}
+
+    def _write_pointer(self, pointer: Dict[str, Any]) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = f"{self.pointer_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(pointer, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.pointer_path)
+
+    def path(self, version: str) -> str:
+        """Directory of a version."""
+        if version == LEGACY_VERSION:
+            return self.root
+        return os.path.join(self.versions_dir, version)
+
+    def current(self) -> Optional[str]:
+        """ID of the live version; LEGACY_VERSION for an unversioned index, None if empty."""
+        current = self._read_pointer()["current"]
+        if current is None and os.path.exists(os.path.join(self.root, "chroma.sqlite3")):
+            return LEGACY_VERSION
+        return current
+
+    def history(self) -> List[str]:
+        """Previously live versions, most recent first."""
+        return list(self._read_pointer()["history"])
+
+    def list(self) -> List[str]:
+        """All built versions, oldest first."""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(os.listdir(self.versions_dir))
+
+    def new_version(self) -> str:
+        """Reserve a new, empty version directory and return its ID."""
+        version = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        os.makedirs(self.path(version))
+        return version
+
+    def activate(self, version: str) -> None:
+        """Atomically make a version live, remembering the one it replaces."""
+        previous = self.current()
+        pointer = self._read_pointer()
+        history = [v for v in pointer["history"] if v != version]
+        if previous and previous != version:
+            history.insert(0, previous)
+        self._write_pointer({"current": version, "history": history})
+
+    def rollback(self) -> str:
+        """
+        Make the previously live version live again.
+
+        Returns:
+            ID of the version now live
+
+        Raises:
+            ValueError: If there is no previous version
+        """
+        pointer = self._read_pointer()
+        history = [v for v in pointer["history"] if os.path.isdir(self.path(v))]
+        if not history:
+            raise ValueError("No previous index version to roll back to")
+        version = history.pop(0)
+        self._write_pointer({"current": version, "history": history})
+        return version
+
+    def prune(self, keep: int) -> List[str]:
+        """
+        Delete old versions, keeping the live one and the `keep` most recent others.
+
+        Returns:
+            IDs of the deleted versions
+        """
+        pointer = self._read_pointer()
+        kept = {pointer["current"], *pointer["history"][:keep]}
+        removed = [v for v in self.list() if v not in kept]
+        for version in removed:
+            shutil.rmtree(self.path(version), ignore_errors=True)
+        if removed:
+            pointer["history"] = [v for v in pointer["history"] if v not in removed]
+            self._write_pointer(pointer)
+        return removed
+
+
+class SwappableRetriever(BaseRetriever):
+    """
+    Retriever that forwards to the live index version and can be swapped atomically.
+
+    Each query reads the `current` reference once, so it runs entirely
+    against one version; swap() replaces the reference and in-flight queries
+    finish on the version they started with. vectorstore and docstore
+    resolve to the live version.
+    """
+
+    current: BaseRetriever
+    version: Optional[str] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @property
+    def vectorstore(self):
+        return self.current.vectorstore
+
+    @property
+    def docstore(self):
+        return self.current.docstore
+
+    @property
+    def keyword_index(self):
+        return getattr(self.current, "keyword_index", None)
+
+    def swap(self, retriever: BaseRetriever, version: Optional[str]) -> None:
+        """Point all following queries at another index version."""
+        self.current = retriever
+        self.version = version
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.current.invoke(
+            query, config={"callbacks": run_manager.get_child()})
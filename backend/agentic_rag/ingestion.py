@@ -1,289 +1,1288 @@
-import hashlib
-import os
-import uuid
-from typing import List, Set
-
-from langchain.retrievers.multi_vector import MultiVectorRetriever
-from langchain.storage import InMemoryStore
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
-
-
-# Global set to track document hashes for duplicate detection
-document_hashes: Set[str] = set()
-
-
-def get_document_hash(content: str) -> str:
-    """
-    Generate a hash for document content to detect duplicates.
-
-    Args:
-        content: Document content to hash
-
-    Returns:
-        SHA256 hash of the content
-    """
-    return hashlib.sha256(content.encode('utf-8')).hexdigest()
-
-
-def is_duplicate_document(document: Document) -> bool:
-    """
-    Check if a document is a duplicate based on content hash.
-
-    Args:
-        document: Document to check
-
-    Returns:
-        True if document is a duplicate, False otherwise
-    """
-    content_hash = get_document_hash(document.page_content)
-    if content_hash in document_hashes:
-        return True
-    document_hashes.add(content_hash)
-    return False
-
-
-def load_documents(directory_path: str = "documents") -> List[Document]:
-    """
-    Load documents from a directory, filtering out duplicates.
-
-    Args:
-        directory_path: Path to directory containing documents
-
-    Returns:
-        List of loaded documents without duplicates
-    """
-    if not os.path.exists(directory_path):
-        print(
-            f"Directory {directory_path} not found. Creating empty directory.")
-        os.makedirs(directory_path, exist_ok=True)
-        return []
-
-    loader = DirectoryLoader(
-        directory_path,
-        loader_cls=TextLoader,
-        glob="**/*.txt",
-        loader_kwargs={"encoding": "utf-8"}
-    )
-    documents = loader.load()
-
-    # Filter out duplicate documents
-    unique_documents = []
-    duplicates_found = 0
-
-    for doc in documents:
-        if not is_duplicate_document(doc):
-            unique_documents.append(doc)
-        else:
-            duplicates_found += 1
-
-    print(
-        f"Loaded {len(unique_documents)} unique documents from {directory_path}")
-    if duplicates_found > 0:
-        print(f"Filtered out {duplicates_found} duplicate documents")
-
-    return unique_documents
-
-
-def create_multi_vector_retriever(
-    documents: List[Document],
-    persist_directory: str = "chroma_db"
-) -> MultiVectorRetriever:
-    """
-    Create and populate MultiVectorRetriever with duplicate prevention.
-
-    Args:
-        documents: Documents to add to vectorstore
-        persist_directory: Directory to persist the vectorstore
-
-    Returns:
-        MultiVectorRetriever instance
-    """
-    embeddings = OpenAIEmbeddings()
-
-    # Create the vector store for chunks
-    vectorstore = Chroma(
-        persist_directory=persist_directory,
-        embedding_function=embeddings
-    )
-
-    # Create the document store for full documents
-    store = InMemoryStore()
-
-    # Create MultiVectorRetriever
-    retriever = MultiVectorRetriever(
-        vectorstore=vectorstore,
-        docstore=store,
-        id_key="doc_id"
-    )
-
-    if documents:
-        # Add documents with unique IDs
-        doc_ids = []
-        chunks_to_add = []
-
-        for doc in documents:
-            # Generate unique ID for each document
-            doc_id = str(uuid.uuid4())
-            doc_ids.append(doc_id)
-
-            # Store the full document in docstore
-            store.mset([(doc_id, doc)])
-
-            # Create chunks for this document
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200,
-                length_function=len,
-                separators=["\n\n", "\n", " ", ""]
-            )
-
-            chunks = text_splitter.split_documents([doc])
-
-            # Add doc_id to each chunk's metadata
-            for chunk in chunks:
-                chunk.metadata["doc_id"] = doc_id
-
-            chunks_to_add.extend(chunks)
-
-        # Add chunks to vectorstore
-        if chunks_to_add:
-            retriever.vectorstore.add_documents(chunks_to_add)
-
-        print(
-            f"Created MultiVectorRetriever with {len(documents)} documents and {len(chunks_to_add)} chunks")
-
-    return retriever
-
-
-def load_or_create_multi_vector_retriever(
-    documents_dir: str = "documents",
-    persist_directory: str = "chroma_db"
-) -> MultiVectorRetriever:
-    """
-    Load existing MultiVectorRetriever or create new one from documents.
-
-    Args:
-        documents_dir: Directory containing source documents
-        persist_directory: Directory to persist vectorstore
-
-    Returns:
-        MultiVectorRetriever instance
-    """
-    embeddings = OpenAIEmbeddings()
-
-    # Check if vectorstore already exists
-    if os.path.exists(persist_directory):
-        print(f"Loading existing vectorstore from {persist_directory}")
-        vectorstore = Chroma(
-            persist_directory=persist_directory,
-            embedding_function=embeddings
-        )
-
-        # Create MultiVectorRetriever with existing vectorstore
-        store = InMemoryStore()
-        retriever = MultiVectorRetriever(
-            vectorstore=vectorstore,
-            docstore=store,
-            id_key="doc_id"
-        )
-        return retriever
-
-    # Create new MultiVectorRetriever
-    print("Creating new MultiVectorRetriever...")
-    documents = load_documents(documents_dir)
-
-    if not documents:
-        print("No documents found. Creating empty MultiVectorRetriever.")
-        vectorstore = Chroma(
-            persist_directory=persist_directory,
-            embedding_function=embeddings
-        )
-        store = InMemoryStore()
-        retriever = MultiVectorRetriever(
-            vectorstore=vectorstore,
-            docstore=store,
-            id_key="doc_id"
-        )
-        return retriever
-
-    retriever = create_multi_vector_retriever(documents, persist_directory)
-    return retriever
-
-
-def add_documents_to_retriever(
-    document_paths: List[str],
-    retriever: MultiVectorRetriever
-) -> None:
-    """
-    Add new documents to existing MultiVectorRetriever with duplicate detection.
-
-    Args:
-        document_paths: List of paths to documents to add
-        retriever: Existing MultiVectorRetriever to add documents to
-    """
-    new_documents = []
-
-    for path in document_paths:
-        if os.path.isfile(path):
-            loader = TextLoader(path, encoding="utf-8")
-            docs = loader.load()
-            new_documents.extend(docs)
-        elif os.path.isdir(path):
-            docs = load_documents(path)
-            new_documents.extend(docs)
-
-    # Filter out duplicates
-    unique_documents = []
-    duplicates_found = 0
-
-    for doc in new_documents:
-        if not is_duplicate_document(doc):
-            unique_documents.append(doc)
-        else:
-            duplicates_found += 1
-
-    if unique_documents:
-        chunks_to_add = []
-
-        for doc in unique_documents:
-            # Generate unique ID for each document
-            doc_id = str(uuid.uuid4())
-
-            # Store the full document in docstore
-            retriever.docstore.mset([(doc_id, doc)])
-
-            # Create chunks for this document
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200,
-                length_function=len,
-                separators=["\n\n", "\n", " ", ""]
-            )
-
-            chunks = text_splitter.split_documents([doc])
-
-            # Add doc_id to each chunk's metadata
-            for chunk in chunks:
-                chunk.metadata["doc_id"] = doc_id
-
-            chunks_to_add.extend(chunks)
-
-        # Add chunks to vectorstore
-        retriever.vectorstore.add_documents(chunks_to_add)
-        print(
-            f"Added {len(unique_documents)} new documents and {len(chunks_to_add)} chunks to retriever")
-
-        if duplicates_found > 0:
-            print(f"Filtered out {duplicates_found} duplicate documents")
-    else:
-        print("No new documents to add")
-
-
-# Initialize the MultiVectorRetriever
-retriever = load_or_create_multi_vector_retriever()
-
-print("Ingestion setup complete. MultiVectorRetriever with duplicate detection ready for use.")
+import functools
+import glob
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain.retrievers.multi_vector import MultiVectorRetriever
+from langchain_chroma import Chroma
+from langchain_community.document_loaders import DirectoryLoader, TextLoader
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_openai import OpenAIEmbeddings
+
+from indexing.chunking import (
+    document_id, hash_text_file, iter_load_and_split, iter_segment_documents, make_splitter,
+    split_document
+)
+from indexing.docstore import SQLiteDocStore
+from indexing.embedding_cache import CachedEmbeddings
+from indexing.embedding_pipeline import EmbeddingPipeline, RateLimitedEmbeddings, RateLimiter
+from indexing.grade_cache import GradeCache
+from indexing.hash_registry import ContentHashRegistry
+from indexing.hybrid_retriever import HybridRetriever
+from indexing.keyword_index import KeywordIndex
+from indexing.memmap_vectorstore import MemmapVectorStore
+from indexing.query_cache import QueryCachedEmbeddings, QueryEmbeddingCache
+from indexing.sync_manifest import ManifestEntry, SyncManifest
+from indexing.versions import (
+    IndexVersions,
+    SwappableRetriever,
+    mark_index_changed,
+    read_index_info,
+    write_index_info,
+)
+from settings import rag_settings
+
+
+# Provider quotas are per API key, so every embedding call of the process shares one limiter
+embedding_rate_limiter = RateLimiter(
+    requests_per_minute=rag_settings.EMBEDDING_REQUESTS_PER_MINUTE,
+    tokens_per_minute=rag_settings.EMBEDDING_TOKENS_PER_MINUTE
+)
+
+# Question vectors, shared by every index version of the process (keyed by model)
+query_embedding_cache = QueryEmbeddingCache(
+    max_bytes=int(rag_settings.QUERY_EMBEDDING_CACHE_MB * 1024 * 1024),
+    ttl_seconds=rag_settings.QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+    path=rag_settings.QUERY_EMBEDDING_CACHE_PATH or None
+)
+
+# Content hash registries for duplicate detection, one per vectorstore directory
+_hash_registries: Dict[str, ContentHashRegistry] = {}
+
+# BM25 keyword indexes for hybrid retrieval, one per vectorstore directory
+_keyword_indexes: Dict[str, KeywordIndex] = {}
+
+# Memoized document grades, one per vectorstore directory
+_grade_caches: Dict[str, GradeCache] = {}
+
+# Serializes writes to the live index with the catch-up and switch of a rebuild
+ingest_lock = threading.RLock()
+
+# State of the background index rebuild, reported by the API
+index_rebuild_status: Dict[str, Any] = {
+    "state": "idle", "version": None, "error": None, "started_at": None, "finished_at": None}
+_rebuild_thread: Optional[threading.Thread] = None
+_rebuild_start_lock = threading.Lock()
+
+# Live retriever of the process, opened on first use by get_retriever
+_retriever: Optional[SwappableRetriever] = None
+_retriever_lock = threading.Lock()
+
+
+def holding_ingest_lock(func):
+    """Run an ingestion function while holding ingest_lock."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with ingest_lock:
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def index_directory(retriever: MultiVectorRetriever) -> str:
+    """
+    Directory of the index version a retriever reads from.
+
+    Args:
+        retriever: MultiVectorRetriever or SwappableRetriever
+
+    Returns:
+        Directory holding the retriever's vectorstore and docstore
+    """
+    return os.path.dirname(retriever.docstore.path)
+
+
+def index_content_version(retriever: MultiVectorRetriever) -> str:
+    """
+    Identify the documents a retriever currently serves.
+
+    Combines the index version with the content version that every
+    ingestion into it renews, so it changes whenever an answer computed
+    from the index may be stale, whichever process changed it.
+
+    Args:
+        retriever: MultiVectorRetriever or SwappableRetriever
+
+    Returns:
+        Opaque version string
+    """
+    info = read_index_info(index_directory(retriever))
+    return f"{getattr(retriever, 'version', None)}:{info.get('content_version', '')}"
+
+
+def get_document_hash(content: str) -> str:
+    """
+    Generate a hash for document content to detect duplicates.
+
+    Args:
+        content: Document content to hash
+
+    Returns:
+        SHA256 hash of the content
+    """
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def iter_indexed_content_hashes(vectorstore: VectorStore, batch_size: int = 1000) -> Iterator[str]:
+    """
+    Yield the content hashes recorded in the chunk metadata of a vectorstore.
+
+    Args:
+        vectorstore: Vectorstore to scan
+        batch_size: Number of chunks read per page
+
+    Returns:
+        Iterator of hex content hashes (repeated once per chunk)
+    """
+    offset = 0
+    while True:
+        result = vectorstore.get(
+            include=["metadatas"], limit=batch_size, offset=offset)
+        metadatas = result["metadatas"]
+        if not metadatas:
+            break
+        for metadata in metadatas:
+            if metadata and metadata.get("content_hash"):
+                yield metadata["content_hash"]
+        offset += len(metadatas)
+
+
+def iter_indexed_chunks(
+    vectorstore: VectorStore,
+    docstore: SQLiteDocStore,
+    batch_size: int = 1000
+) -> Iterator[Tuple[str, Document]]:
+    """
+    Yield the chunks stored in a vectorstore, with their text.
+
+    Args:
+        vectorstore: Vectorstore to scan
+        docstore: Docstore holding the parents of span-referencing chunks
+        batch_size: Number of chunks read per page
+
+    Returns:
+        Iterator of (chunk_id, chunk) pairs
+    """
+    offset = 0
+    while True:
+        result = vectorstore.get(
+            include=["documents", "metadatas"], limit=batch_size, offset=offset)
+        if not result["ids"]:
+            break
+        chunks = docstore.materialize([
+            Document(page_content=text or "", metadata=metadata or {})
+            for text, metadata in zip(result["documents"], result["metadatas"])
+        ])
+        for chunk_id, chunk in zip(result["ids"], chunks):
+            if "doc_id" in chunk.metadata:
+                yield chunk_id, chunk
+        offset += len(result["ids"])
+
+
+def get_hash_registry(
+    persist_directory: str = "chroma_db",
+    vectorstore: Optional[VectorStore] = None
+) -> ContentHashRegistry:
+    """
+    Open the persistent content hash registry kept next to the vectorstore.
+
+    Args:
+        persist_directory: Directory of the vectorstore
+        vectorstore: Vectorstore used to rebuild the registry if its file is missing
+
+    Returns:
+        ContentHashRegistry instance
+    """
+    if persist_directory not in _hash_registries:
+        rebuild_from = None
+        if vectorstore is not None:
+            def rebuild_from():
+                return iter_indexed_content_hashes(vectorstore)
+        _hash_registries[persist_directory] = ContentHashRegistry(
+            os.path.join(persist_directory, "content_hashes.sqlite3"),
+            rebuild_from=rebuild_from
+        )
+    return _hash_registries[persist_directory]
+
+
+def get_keyword_index(
+    persist_directory: str = "chroma_db",
+    vectorstore: Optional[VectorStore] = None,
+    docstore: Optional[SQLiteDocStore] = None
+) -> Optional[KeywordIndex]:
+    """
+    Open the BM25 keyword index kept next to the vectorstore.
+
+    Args:
+        persist_directory: Directory of the vectorstore
+        vectorstore: Vectorstore used to build the index if it was never built
+        docstore: Docstore holding the parents of the vectorstore's chunks
+
+    Returns:
+        KeywordIndex instance, None if HYBRID_SEARCH is disabled
+    """
+    if not rag_settings.HYBRID_SEARCH:
+        return None
+    if persist_directory not in _keyword_indexes:
+        rebuild_from = None
+        if vectorstore is not None and docstore is not None:
+            def rebuild_from():
+                return iter_indexed_chunks(vectorstore, docstore)
+        _keyword_indexes[persist_directory] = KeywordIndex(
+            os.path.join(persist_directory, "keyword_index.sqlite3"),
+            rebuild_from=rebuild_from
+        )
+    return _keyword_indexes[persist_directory]
+
+
+def get_grade_cache(persist_directory: str = "chroma_db") -> Optional[GradeCache]:
+    """
+    Open the grade cache kept next to the vectorstore.
+
+    Args:
+        persist_directory: Directory of the vectorstore
+
+    Returns:
+        GradeCache instance, None if GRADE_CACHE is disabled
+    """
+    if not rag_settings.GRADE_CACHE:
+        return None
+    if persist_directory not in _grade_caches:
+        _grade_caches[persist_directory] = GradeCache(
+            os.path.join(persist_directory, "grade_cache.sqlite3"),
+            max_entries=rag_settings.GRADE_CACHE_MAX_ENTRIES
+        )
+    return _grade_caches[persist_directory]
+
+
+def invalidate_grades(retriever: MultiVectorRetriever, doc_ids: List[str]) -> None:
+    """
+    Forget the grades of documents being ingested again or removed.
+
+    Args:
+        retriever: MultiVectorRetriever holding the documents
+        doc_ids: IDs of the parent documents (their segments included)
+    """
+    grade_cache = get_grade_cache(index_directory(retriever))
+    if grade_cache is not None and doc_ids:
+        grade_cache.invalidate(doc_ids)
+
+
+def open_manifest(persist_directory: str = "chroma_db") -> SyncManifest:
+    """
+    Open the manifest of synced source files kept next to the vectorstore.
+
+    Args:
+        persist_directory: Directory of the vectorstore
+
+    Returns:
+        SyncManifest instance
+    """
+    return SyncManifest(os.path.join(persist_directory, "manifest.sqlite3"))
+
+
+def find_indexed_doc_id(vectorstore: VectorStore, content_hash: str) -> Optional[str]:
+    """
+    Find the doc_id of an already indexed document from its chunk metadata.
+
+    Args:
+        vectorstore: Vectorstore to search
+        content_hash: Content hash of the document
+
+    Returns:
+        doc_id, or None if no chunk carries this content hash
+    """
+    result = vectorstore.get(
+        where={"content_hash": content_hash}, limit=1, include=["metadatas"])
+    if not result["metadatas"]:
+        return None
+    metadata = result["metadatas"][0]
+    # Chunks of a streamed large file point to their segment; source_id is the file
+    return metadata.get("source_id") or metadata.get("doc_id")
+
+
+def is_duplicate_document(document: Document, registry: ContentHashRegistry) -> bool:
+    """
+    Check if a document is a duplicate based on content hash.
+
+    Args:
+        document: Document to check
+        registry: Registry of already indexed content hashes
+
+    Returns:
+        True if document is a duplicate, False otherwise
+    """
+    return get_document_hash(document.page_content) in registry
+
+
+def filter_duplicate_documents(
+    documents: List[Document],
+    registry: Optional[ContentHashRegistry] = None
+) -> Tuple[List[Document], int]:
+    """
+    Drop documents that are already indexed or repeated within the batch.
+
+    The content hash is stored in each kept document's metadata, so chunks
+    inherit it and the registry can be rebuilt from the vectorstore.
+
+    Args:
+        documents: Documents to filter
+        registry: Registry of already indexed content hashes, if any
+
+    Returns:
+        Tuple of (unique documents, number of duplicates found)
+    """
+    unique_documents = []
+    seen = set()
+    duplicates_found = 0
+
+    for doc in documents:
+        content_hash = get_document_hash(doc.page_content)
+        if content_hash in seen or (registry is not None and content_hash in registry):
+            duplicates_found += 1
+            continue
+        seen.add(content_hash)
+        doc.metadata["content_hash"] = content_hash
+        unique_documents.append(doc)
+
+    return unique_documents, duplicates_found
+
+
+def load_documents(
+    directory_path: str = "documents",
+    registry: Optional[ContentHashRegistry] = None
+) -> List[Document]:
+    """
+    Load documents from a directory, filtering out duplicates.
+
+    Args:
+        directory_path: Path to directory containing documents
+        registry: Registry of already indexed content hashes, if any
+
+    Returns:
+        List of loaded documents without duplicates
+    """
+    if not os.path.exists(directory_path):
+        print(
+            f"Directory {directory_path} not found. Creating empty directory.")
+        os.makedirs(directory_path, exist_ok=True)
+        return []
+
+    loader = DirectoryLoader(
+        directory_path,
+        loader_cls=TextLoader,
+        glob="**/*.txt",
+        loader_kwargs={"encoding": "utf-8"}
+    )
+    documents = loader.load()
+
+    # Filter out duplicate documents
+    unique_documents, duplicates_found = filter_duplicate_documents(
+        documents, registry)
+
+    print(
+        f"Loaded {len(unique_documents)} unique documents from {directory_path}")
+    if duplicates_found > 0:
+        print(f"Filtered out {duplicates_found} duplicate documents")
+
+    return unique_documents
+
+
+def get_embeddings(model: Optional[str] = None) -> Embeddings:
+    """
+    Create the embedding function, wrapped in the rate limiter and the embedding caches.
+
+    Args:
+        model: Embedding model name (EMBEDDING_MODEL if None, the provider default if empty)
+
+    Returns:
+        Embeddings instance; only texts missing from EMBEDDING_CACHE_DIR and
+        questions missing from the query embedding cache reach the provider
+    """
+    model = rag_settings.EMBEDDING_MODEL if model is None else model
+    embeddings = RateLimitedEmbeddings(
+        OpenAIEmbeddings(model=model) if model else OpenAIEmbeddings(),
+        embedding_rate_limiter,
+        max_retries=rag_settings.EMBEDDING_MAX_RETRIES
+    )
+    model_name = embeddings.model
+    if rag_settings.EMBEDDING_CACHE_DIR:
+        embeddings = CachedEmbeddings(
+            embeddings,
+            rag_settings.EMBEDDING_CACHE_DIR,
+            batch_size=rag_settings.EMBEDDING_BATCH_SIZE
+        )
+    if rag_settings.QUERY_EMBEDDING_CACHE_MB <= 0:
+        return embeddings
+    return QueryCachedEmbeddings(embeddings, query_embedding_cache, model_name)
+
+
+def open_docstore(persist_directory: str = "chroma_db") -> SQLiteDocStore:
+    """
+    Open the persistent parent-document store that lives next to the vectorstore.
+
+    Args:
+        persist_directory: Directory of the vectorstore
+
+    Returns:
+        SQLiteDocStore instance
+    """
+    return SQLiteDocStore(
+        os.path.join(persist_directory, "docstore.sqlite3"),
+        cache_size=rag_settings.DOCSTORE_CACHE_SIZE
+    )
+
+
+def new_index_info(embedding_model: str) -> Dict[str, str]:
+    """
+    Build information recorded in the index.json of a new index version.
+
+    Args:
+        embedding_model: Embedding model of the version
+
+    Returns:
+        Dict with the embedding model and the configured vectorstore backend
+    """
+    return {
+        "embedding_model": embedding_model,
+        "vectorstore_backend": rag_settings.VECTORSTORE_BACKEND,
+    }
+
+
+def open_vectorstore(
+    persist_directory: str,
+    embeddings: Embeddings,
+    backend: str = "chroma"
+) -> VectorStore:
+    """
+    Open the chunk vectorstore of an index.
+
+    Args:
+        persist_directory: Directory of the index
+        embeddings: Embedding function
+        backend: 'chroma' or 'memmap'
+
+    Returns:
+        Chroma or MemmapVectorStore instance
+    """
+    if backend == "memmap":
+        return MemmapVectorStore(
+            persist_directory,
+            embeddings,
+            quantization=rag_settings.VECTORSTORE_QUANTIZATION,
+            rescore_factor=rag_settings.VECTORSTORE_RESCORE_FACTOR,
+            brute_force_limit=rag_settings.VECTORSTORE_BRUTE_FORCE_LIMIT,
+            hnsw_m=rag_settings.HNSW_M,
+            hnsw_ef_construction=rag_settings.HNSW_EF_CONSTRUCTION,
+            hnsw_ef_search=rag_settings.HNSW_EF_SEARCH
+        )
+    if backend != "chroma":
+        raise ValueError(f"Unknown vectorstore backend: {backend}")
+    # Only used when the collection is created; existing collections keep their parameters.
+    # Cosine space makes relevance scores (1 - distance) cosine similarities whatever
+    # the norm of the embeddings, as in memmap stores
+    vectorstore = Chroma(
+        persist_directory=persist_directory,
+        embedding_function=embeddings,
+        collection_metadata={
+            "hnsw:space": "cosine",
+            "hnsw:M": rag_settings.HNSW_M,
+            "hnsw:construction_ef": rag_settings.HNSW_EF_CONSTRUCTION,
+            "hnsw:search_ef": rag_settings.HNSW_EF_SEARCH,
+        }
+    )
+    if (vectorstore._collection.metadata or {}).get("hnsw:space", "l2") != "cosine":
+        # Collections created before use squared L2; rebuild the index to move
+        # them to cosine space before calibrating the grading pre-filter
+        print(f"Warning: {persist_directory} uses L2 distances; "
+              f"retrieval similarities are not cosine similarities")
+    return vectorstore
+
+
+def build_retriever(
+    persist_directory: str = "chroma_db",
+    embeddings: Optional[Embeddings] = None
+) -> MultiVectorRetriever:
+    """
+    Build a MultiVectorRetriever over the persisted vectorstore and docstore.
+
+    Args:
+        persist_directory: Directory to persist the vectorstore
+        embeddings: Embedding function (by default, the model recorded in the
+            index's index.json; indexes without one were built with the provider default)
+
+    Returns:
+        HybridRetriever instance (dense only if HYBRID_SEARCH is disabled)
+    """
+    info = read_index_info(persist_directory)
+    embeddings = embeddings or get_embeddings(info.get("embedding_model", ""))
+
+    # Create the vector store for chunks, with the backend the index was built with
+    vectorstore = open_vectorstore(
+        persist_directory, embeddings, info.get("vectorstore_backend", "chroma"))
+
+    # Create the document store for full documents
+    store = open_docstore(persist_directory)
+
+    # Create MultiVectorRetriever, fusing its vector hits with BM25 keyword hits
+    return HybridRetriever(
+        vectorstore=vectorstore,
+        docstore=store,
+        id_key="doc_id",
+        search_kwargs={"k": rag_settings.RETRIEVAL_K},
+        keyword_index=get_keyword_index(persist_directory, vectorstore, store),
+        vector_weight=rag_settings.HYBRID_VECTOR_WEIGHT,
+        keyword_weight=rag_settings.HYBRID_KEYWORD_WEIGHT,
+        rrf_k=rag_settings.HYBRID_RRF_K,
+        candidates=rag_settings.HYBRID_CANDIDATES
+    )
+
+
+def make_embedding_pipeline(retriever: MultiVectorRetriever) -> EmbeddingPipeline:
+    """
+    Create the bulk embedding stage writing to the retriever's vectorstore.
+
+    Args:
+        retriever: MultiVectorRetriever receiving the chunks
+
+    Returns:
+        EmbeddingPipeline instance
+    """
+    return EmbeddingPipeline(
+        retriever.vectorstore.embeddings,
+        retriever.vectorstore,
+        batch_size=rag_settings.EMBEDDING_BATCH_SIZE,
+        batch_tokens=rag_settings.EMBEDDING_BATCH_TOKENS,
+        max_concurrency=rag_settings.EMBEDDING_MAX_CONCURRENCY,
+        store_chunk_text=rag_settings.STORE_CHUNK_TEXT,
+        keyword_index=getattr(retriever, "keyword_index", None)
+    )
+
+
+def index_documents(
+    documents: List[Document],
+    retriever: MultiVectorRetriever,
+    registry: ContentHashRegistry
+) -> int:
+    """
+    Split documents into chunks, store parents and chunks, and register their hashes.
+
+    Hashes are registered only after the chunks were added, so a failed
+    ingestion does not mark its documents as duplicates.
+
+    Args:
+        documents: Deduplicated documents carrying a content_hash in their metadata
+        retriever: MultiVectorRetriever to add documents to
+        registry: Registry of indexed content hashes
+
+    Returns:
+        Number of chunks added
+    """
+    # IDs are derived from content, so re-ingesting a document is idempotent
+    doc_ids = [document_id(doc.metadata["content_hash"]) for doc in documents]
+    splitter = make_splitter(rag_settings.CHUNK_SIZE, rag_settings.CHUNK_OVERLAP)
+
+    # Store the full documents in docstore in one batch
+    retriever.docstore.mset(list(zip(doc_ids, documents)))
+    invalidate_grades(retriever, doc_ids)
+
+    # Embed chunks in concurrent batches and add them to vectorstore
+    chunk_count = make_embedding_pipeline(retriever).add_chunks(
+        chunk
+        for doc, doc_id in zip(documents, doc_ids)
+        for chunk in split_document(doc, doc_id, splitter)
+    )
+
+    registry.add_many(doc.metadata["content_hash"] for doc in documents)
+    return chunk_count
+
+
+def iter_large_file_chunks(
+    path: str,
+    doc_id: str,
+    content_hash: str,
+    retriever: MultiVectorRetriever
+) -> Iterator[Tuple[str, Document]]:
+    """
+    Stream a large file into segment parents, yielding their chunks.
+
+    Each segment is written to the docstore before its chunks are yielded,
+    so memory depends on STREAM_WINDOW_CHARS and not on the file size.
+
+    Args:
+        path: Path of the text file
+        doc_id: ID of the file as a whole
+        content_hash: Content hash of the whole file
+        retriever: MultiVectorRetriever receiving the segments
+
+    Returns:
+        Iterator of (chunk_id, chunk) pairs
+    """
+    splitter = make_splitter(rag_settings.CHUNK_SIZE, rag_settings.CHUNK_OVERLAP)
+    invalidate_grades(retriever, [doc_id])
+    for segment_id, segment, chunks in iter_segment_documents(
+        path, doc_id, content_hash, splitter, rag_settings.STREAM_WINDOW_CHARS
+    ):
+        retriever.docstore.mset([(segment_id, segment)])
+        yield from chunks
+
+
+def remove_documents(
+    doc_ids: List[str],
+    retriever: MultiVectorRetriever,
+    registry: ContentHashRegistry,
+    content_hashes: List[str]
+) -> None:
+    """
+    Remove parent documents, their chunks and their content hashes from the index.
+
+    Segments of a streamed large file are removed along with the file's doc_id.
+
+    Args:
+        doc_ids: IDs of the parent documents to remove
+        retriever: MultiVectorRetriever to remove them from
+        registry: Registry of indexed content hashes
+        content_hashes: Content hashes of the removed documents
+    """
+    if not doc_ids:
+        return
+
+    chunk_ids = retriever.vectorstore.get(
+        where={"$or": [{"doc_id": {"$in": doc_ids}}, {"source_id": {"$in": doc_ids}}]},
+        include=[]
+    )["ids"]
+    if chunk_ids:
+        retriever.vectorstore.delete(ids=chunk_ids)
+    segment_ids = [
+        key for doc_id in doc_ids for key in retriever.docstore.yield_keys(prefix=f"{doc_id}:")]
+    retriever.docstore.mdelete(doc_ids + segment_ids)
+    keyword_index = getattr(retriever, "keyword_index", None)
+    if keyword_index is not None:
+        keyword_index.delete_documents(doc_ids + segment_ids)
+    invalidate_grades(retriever, doc_ids)
+    registry.discard_many(content_hashes)
+
+
+def seed_manifest(
+    manifest: SyncManifest,
+    docstore: SQLiteDocStore,
+    directory_path: str,
+    batch_size: int = 500
+) -> int:
+    """
+    Record the files of an index built before the manifest existed.
+
+    An index created before versioning (or before syncs) holds parents
+    loaded from directory_path but has no manifest, so a first sync would
+    index every file again. Parents whose source file is in directory_path
+    are recorded with an unknown size and mtime: the sync reads each file
+    once, keeps the parent if its content hash is unchanged and replaces it
+    otherwise.
+
+    Args:
+        manifest: Empty manifest of the index
+        docstore: Docstore of the index
+        directory_path: Directory of the source documents
+        batch_size: Number of parents read per batch
+
+    Returns:
+        Number of files recorded
+    """
+    root = os.path.abspath(directory_path)
+    # A streamed large file is stored as segments (doc_id:n); its first one stands for the file
+    keys = [key for key in docstore.yield_keys() if ":" not in key or key.endswith(":0")]
+    entries = []
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        for key, document in zip(batch, docstore.mget(batch)):
+            if document is None:
+                continue
+            source = document.metadata.get("source")
+            content_hash = document.metadata.get("content_hash")
+            if not source or not content_hash:
+                continue
+            path = os.path.relpath(os.path.abspath(source), root)
+            if (path == os.pardir or path.startswith(os.pardir + os.sep)
+                    or not os.path.isfile(os.path.join(root, path))):
+                continue
+            doc_id = document.metadata.get("source_id") or key
+            entries.append(ManifestEntry(path, -1, -1, content_hash, doc_id))
+    manifest.upsert(entries)
+    if entries:
+        print(f"Seeded the sync manifest with {len(entries)} files indexed before it existed")
+    return len(entries)
+
+
+@holding_ingest_lock
+def sync_documents(
+    directory_path: str,
+    retriever: MultiVectorRetriever,
+    persist_directory: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Incrementally sync the index with the text files of a directory.
+
+    Only new or changed files are loaded and embedded. Files whose size and
+    mtime match the manifest are not read at all. Documents of deleted or
+    replaced files are removed once no other file shares their content.
+
+    The manifest records paths relative to directory_path, so an index must
+    always be synced with the same directory: files missing from it count as
+    deleted. An index built before the manifest existed is seeded from its
+    docstore on the first sync (see seed_manifest).
+
+    Changed files are loaded and split on a process pool (INGEST_WORKERS)
+    and their chunks are streamed to the embedding pipeline in file order,
+    so memory stays flat however many files changed. Files above
+    LARGE_FILE_THRESHOLD_MB are streamed in windows instead of being loaded.
+
+    Args:
+        directory_path: Directory containing source documents
+        retriever: MultiVectorRetriever to sync
+        persist_directory: Directory of the retriever's vectorstore (derived from it if omitted)
+
+    Returns:
+        Dict with the added, changed and deleted paths, the unchanged file
+        count and per-stage throughput
+    """
+    start = time.perf_counter()
+    persist_directory = persist_directory or index_directory(retriever)
+    registry = get_hash_registry(persist_directory, retriever.vectorstore)
+    manifest = open_manifest(persist_directory)
+    if not len(manifest):
+        seed_manifest(manifest, retriever.docstore, directory_path)
+    known = manifest.entries()
+
+    report = {"added": [], "changed": [], "deleted": [], "unchanged": 0}
+    entries: List[ManifestEntry] = []
+    replaced: List[ManifestEntry] = []
+    new_hashes: List[str] = []
+    stats = {}
+
+    paths = glob.glob(os.path.join(directory_path, "**", "*.txt"), recursive=True)
+    current = set()
+    small_files = []
+    large_files = []
+    for full_path in sorted(paths):
+        path = os.path.relpath(full_path, directory_path)
+        current.add(path)
+        stat = os.stat(full_path)
+        entry = known.get(path)
+
+        if entry and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+            report["unchanged"] += 1
+            continue
+        stats[path] = stat
+        if stat.st_size > rag_settings.LARGE_FILE_THRESHOLD_MB * 1024 * 1024:
+            large_files.append(full_path)
+        else:
+            small_files.append(full_path)
+
+    load_stats = {"files": 0, "chunks": 0, "worker_seconds": 0.0}
+    pending: Dict[str, str] = {}
+
+    def record(path: str, content_hash: str, new_doc_id: str) -> bool:
+        """Record a loaded file in the manifest; True if its content still has to be indexed."""
+        stat = stats[path]
+        entry = known.get(path)
+
+        if entry and entry.content_hash == content_hash:
+            # Touched but not modified: only refresh the recorded stat
+            entries.append(entry._replace(
+                size=stat.st_size, mtime_ns=stat.st_mtime_ns))
+            report["unchanged"] += 1
+            return False
+
+        # Reuse the document already holding this content, if any
+        is_new = False
+        doc_id = None
+        if content_hash in pending:
+            doc_id = pending[content_hash]
+        elif content_hash in registry:
+            doc_id = manifest.doc_id_for(content_hash) or find_indexed_doc_id(
+                retriever.vectorstore, content_hash)
+        if doc_id is None:
+            # New content, or registered content whose document cannot be found
+            doc_id = pending[content_hash] = new_doc_id
+            new_hashes.append(content_hash)
+            is_new = True
+
+        entries.append(ManifestEntry(
+            path, stat.st_size, stat.st_mtime_ns, content_hash, doc_id))
+        if entry:
+            replaced.append(entry)
+            report["changed"].append(path)
+        else:
+            report["added"].append(path)
+        return is_new
+
+    def new_chunks() -> Iterator[Tuple[str, Document]]:
+        """Yield the chunks of new content, recording manifest entries on the way."""
+        parents: List[Tuple[str, Document]] = []
+        chunks: List[Tuple[str, Document]] = []
+
+        def flush() -> Iterator[Tuple[str, Document]]:
+            # Parents are stored before their chunks reach the vectorstore, so a
+            # query during the sync never hits a chunk without its parent
+            nonlocal parents, chunks
+            if parents:
+                retriever.docstore.mset(parents)
+                invalidate_grades(retriever, [doc_id for doc_id, _ in parents])
+            pending, parents, chunks = chunks, [], []
+            yield from pending
+
+        for loaded in iter_load_and_split(
+            small_files,
+            chunk_size=rag_settings.CHUNK_SIZE,
+            chunk_overlap=rag_settings.CHUNK_OVERLAP,
+            max_workers=rag_settings.INGEST_WORKERS
+        ):
+            load_stats["files"] += 1
+            load_stats["worker_seconds"] += loaded.seconds
+            path = os.path.relpath(loaded.path, directory_path)
+            if record(path, loaded.document.metadata["content_hash"], loaded.doc_id):
+                parents.append((loaded.doc_id, loaded.document))
+                chunks.extend(loaded.chunks)
+                load_stats["chunks"] += len(loaded.chunks)
+                if len(parents) >= 500 or len(chunks) >= rag_settings.EMBEDDING_BATCH_SIZE:
+                    yield from flush()
+
+        yield from flush()
+
+        # Large files are streamed in the main process, segment by segment
+        for full_path in large_files:
+            file_start = time.perf_counter()
+            content_hash = hash_text_file(full_path)
+            doc_id = document_id(content_hash)
+            is_new = record(
+                os.path.relpath(full_path, directory_path), content_hash, doc_id)
+            load_stats["files"] += 1
+            load_stats["worker_seconds"] += time.perf_counter() - file_start
+            if is_new:
+                for chunk in iter_large_file_chunks(full_path, doc_id, content_hash, retriever):
+                    load_stats["chunks"] += 1
+                    yield chunk
+
+    # Index new content before dropping old versions, so changed files stay searchable
+    pipeline = make_embedding_pipeline(retriever)
+    chunk_count = pipeline.add_chunks(new_chunks())
+    registry.add_many(new_hashes)
+
+    deleted = [entry for path, entry in known.items() if path not in current]
+    report["deleted"] = sorted(entry.path for entry in deleted)
+    manifest.upsert(entries)
+    manifest.delete(entry.path for entry in deleted)
+
+    stale = {
+        entry.doc_id: entry.content_hash
+        for entry in replaced + deleted
+        if entry.doc_id and not manifest.is_referenced(entry.doc_id)
+    }
+    remove_documents(list(stale), retriever, registry, list(stale.values()))
+    if report["added"] or report["changed"] or report["deleted"]:
+        mark_index_changed(persist_directory)
+
+    elapsed = time.perf_counter() - start
+    report["throughput"] = {
+        "files_loaded": load_stats["files"],
+        "load_split_worker_seconds": round(load_stats["worker_seconds"], 3),
+        "chunks_embedded": chunk_count,
+        "embedding_batches": pipeline.stats["batches"],
+        "embed_seconds": round(pipeline.stats["embed_seconds"], 3),
+        "write_seconds": round(pipeline.stats["write_seconds"], 3),
+        "wall_seconds": round(elapsed, 3),
+    }
+
+    print(
+        f"Synced {directory_path}: {len(report['added'])} added, "
+        f"{len(report['changed'])} changed, {len(report['deleted'])} deleted, "
+        f"{report['unchanged']} unchanged ({chunk_count} chunks embedded)")
+    if load_stats["files"]:
+        print(
+            f"  load+split: {load_stats['files']} files, {load_stats['chunks']} chunks, "
+            f"{load_stats['files'] / max(load_stats['worker_seconds'], 1e-9):.0f} files/s per worker")
+    if pipeline.stats["batches"]:
+        print(
+            f"  embed: {pipeline.stats['batches']} batches, "
+            f"{chunk_count / max(pipeline.stats['embed_seconds'], 1e-9):.0f} chunks/s per request; "
+            f"write: {chunk_count / max(pipeline.stats['write_seconds'], 1e-9):.0f} chunks/s")
+    print(f"  total: {elapsed:.2f}s, {chunk_count / max(elapsed, 1e-9):.0f} chunks/s")
+    return report
+
+
+def create_multi_vector_retriever(
+    documents: List[Document],
+    persist_directory: str = "chroma_db"
+) -> MultiVectorRetriever:
+    """
+    Create and populate MultiVectorRetriever with duplicate prevention.
+
+    Args:
+        documents: Documents to add to vectorstore
+        persist_directory: Directory to persist the vectorstore
+
+    Returns:
+        MultiVectorRetriever instance
+    """
+    retriever = build_retriever(persist_directory)
+    registry = get_hash_registry(persist_directory, retriever.vectorstore)
+
+    documents, _ = filter_duplicate_documents(documents, registry)
+    if documents:
+        chunk_count = index_documents(documents, retriever, registry)
+        print(
+            f"Created MultiVectorRetriever with {len(documents)} documents and {chunk_count} chunks")
+
+    return retriever
+
+
+def open_index_version(versions: IndexVersions, version: str) -> MultiVectorRetriever:
+    """
+    Open an existing index version with the embedding model it was built with.
+
+    Args:
+        versions: Versions of the index
+        version: ID of the version to open
+
+    Returns:
+        MultiVectorRetriever instance
+    """
+    path = versions.path(version)
+    # Parent documents are reloaded from the persistent docstore; the
+    # content hash registry is rebuilt lazily if it is missing
+    retriever = build_retriever(path)
+    get_hash_registry(path, retriever.vectorstore)
+    return retriever
+
+
+def load_or_create_multi_vector_retriever(
+    documents_dir: str = "documents",
+    persist_directory: str = "chroma_db"
+) -> SwappableRetriever:
+    """
+    Load the live index version or create a first one from documents.
+
+    Args:
+        documents_dir: Directory containing source documents
+        persist_directory: Root directory of the versioned index
+
+    Returns:
+        SwappableRetriever over the live MultiVectorRetriever
+    """
+    versions = IndexVersions(persist_directory)
+
+    # Check if an index version already exists
+    version = versions.current()
+    if version is not None:
+        print(f"Loading index version {version} from {versions.path(version)}")
+        return SwappableRetriever(
+            current=open_index_version(versions, version), version=version)
+
+    # Create new MultiVectorRetriever
+    print("Creating new MultiVectorRetriever...")
+    version = versions.new_version()
+    write_index_info(versions.path(version), new_index_info(rag_settings.EMBEDDING_MODEL))
+    retriever = build_retriever(versions.path(version))
+
+    if not os.path.exists(documents_dir):
+        print(
+            f"Directory {documents_dir} not found. Creating empty directory.")
+        os.makedirs(documents_dir, exist_ok=True)
+
+    # A first sync builds the index and records the manifest for later syncs
+    sync_documents(documents_dir, retriever)
+    versions.activate(version)
+    return SwappableRetriever(current=retriever, version=version)
+
+
+def copy_parents(
+    source: MultiVectorRetriever,
+    target: MultiVectorRetriever,
+    registry: ContentHashRegistry,
+    doc_ids: List[str],
+    batch_size: int = 500
+) -> int:
+    """
+    Re-split and re-embed parent documents of one index into another.
+
+    Parents keep their doc_id; chunks are rebuilt with the current chunk
+    settings and embedded with the target's embedding function.
+
+    Args:
+        source: Retriever to read parents from
+        target: Retriever to index parents into
+        registry: Content hash registry of the target
+        doc_ids: IDs of the parents to copy
+        batch_size: Number of parents read per docstore call
+
+    Returns:
+        Number of chunks added to the target
+    """
+    splitter = make_splitter(rag_settings.CHUNK_SIZE, rag_settings.CHUNK_OVERLAP)
+    content_hashes = []
+
+    def chunks() -> Iterator[Tuple[str, Document]]:
+        for start in range(0, len(doc_ids), batch_size):
+            batch_ids = doc_ids[start:start + batch_size]
+            parents = [
+                (doc_id, parent)
+                for doc_id, parent in zip(batch_ids, source.docstore.mget(batch_ids))
+                if parent is not None
+            ]
+            target.docstore.mset(parents)
+            for doc_id, parent in parents:
+                if parent.metadata.get("content_hash"):
+                    content_hashes.append(parent.metadata["content_hash"])
+                yield from split_document(parent, doc_id, splitter)
+
+    chunk_count = make_embedding_pipeline(target).add_chunks(chunks())
+    registry.add_many(content_hashes)
+    return chunk_count
+
+
+def rebuild_index(
+    retriever: SwappableRetriever,
+    persist_directory: str = "chroma_db",
+    embedding_model: Optional[str] = None
+) -> str:
+    """
+    Build a new index version from the live one and switch to it.
+
+    Queries keep using the live version during the build. Documents added
+    or removed meanwhile are caught up under ingest_lock, then the CURRENT
+    pointer is flipped and the retriever swapped in one step.
+
+    Args:
+        retriever: SwappableRetriever serving queries
+        persist_directory: Root directory of the versioned index
+        embedding_model: Embedding model of the new version (the live version's if omitted)
+
+    Returns:
+        ID of the new live version
+    """
+    versions = IndexVersions(persist_directory)
+    source = retriever.current
+    if embedding_model is None:
+        embedding_model = read_index_info(index_directory(source)).get("embedding_model", "")
+    version = versions.new_version()
+    path = versions.path(version)
+    print(f"Building index version {version} in {path}")
+
+    write_index_info(path, new_index_info(embedding_model))
+    target = build_retriever(path)
+    registry = get_hash_registry(path)
+    chunk_count = copy_parents(
+        source, target, registry, list(source.docstore.yield_keys()))
+
+    with ingest_lock:
+        # Catch up with uploads and syncs that ran during the build
+        source_ids = set(source.docstore.yield_keys())
+        target_ids = set(target.docstore.yield_keys())
+        chunk_count += copy_parents(
+            source, target, registry, sorted(source_ids - target_ids))
+        removed_ids = sorted(target_ids - source_ids)
+        removed_hashes = [
+            parent.metadata.get("content_hash")
+            for parent in target.docstore.mget(removed_ids) if parent is not None
+        ]
+        remove_documents(removed_ids, target, registry, [h for h in removed_hashes if h])
+        open_manifest(index_directory(source)).copy_to(
+            os.path.join(path, "manifest.sqlite3"))
+
+        versions.activate(version)
+        retriever.swap(target, version)
+
+    removed_versions = versions.prune(rag_settings.INDEX_VERSIONS_TO_KEEP)
+    print(f"Index version {version} is live ({chunk_count} chunks); "
+          f"pruned {len(removed_versions)} old versions")
+    return version
+
+
+def start_index_rebuild(
+    retriever: SwappableRetriever,
+    persist_directory: str = "chroma_db"
+) -> bool:
+    """
+    Start rebuild_index on a background thread.
+
+    Args:
+        retriever: SwappableRetriever serving queries
+        persist_directory: Root directory of the versioned index
+
+    Returns:
+        False if a rebuild is already running
+    """
+    global _rebuild_thread
+
+    def run():
+        try:
+            version = rebuild_index(retriever, persist_directory)
+            index_rebuild_status.update(state="done", version=version)
+        except Exception as e:
+            print(f"Index rebuild failed: {e}")
+            index_rebuild_status.update(state="failed", error=str(e))
+        index_rebuild_status["finished_at"] = time.time()
+
+    with _rebuild_start_lock:
+        if _rebuild_thread is not None and _rebuild_thread.is_alive():
+            return False
+        index_rebuild_status.update(
+            state="building", version=None, error=None, started_at=time.time(), finished_at=None)
+        _rebuild_thread = threading.Thread(target=run, name="index-rebuild", daemon=True)
+        _rebuild_thread.start()
+        return True
+
+
+@holding_ingest_lock
+def rollback_index(
+    retriever: SwappableRetriever,
+    persist_directory: str = "chroma_db"
+) -> str:
+    """
+    Switch back to the previously live index version.
+
+    Documents ingested after that version was replaced are not in it.
+
+    Args:
+        retriever: SwappableRetriever serving queries
+        persist_directory: Root directory of the versioned index
+
+    Returns:
+        ID of the version now live
+    """
+    versions = IndexVersions(persist_directory)
+    version = versions.rollback()
+    retriever.swap(open_index_version(versions, version), version)
+    print(f"Rolled back to index version {version}")
+    return version
+
+
+@holding_ingest_lock
+def reload_index(
+    retriever: SwappableRetriever,
+    persist_directory: str = "chroma_db"
+) -> Optional[str]:
+    """
+    Switch to the version named by CURRENT if another process changed it.
+
+    Rebuilds, rollbacks and embedding migrations run from other processes
+    (e.g. migrate_embeddings.py or another API worker) only flip the pointer.
+
+    Args:
+        retriever: SwappableRetriever serving queries
+        persist_directory: Root directory of the versioned index
+
+    Returns:
+        ID of the version switched to, None if already live
+    """
+    versions = IndexVersions(persist_directory)
+    version = versions.current()
+    if version is None or version == retriever.version:
+        return None
+    retriever.swap(open_index_version(versions, version), version)
+    print(f"Reloaded index version {version}")
+    return version
+
+
+def get_index_versions(persist_directory: str = "chroma_db") -> Dict[str, Any]:
+    """
+    Describe the index versions and the state of the background rebuild.
+
+    Args:
+        persist_directory: Root directory of the versioned index
+
+    Returns:
+        Dict with the live version, the rollback history, all built versions and the rebuild state
+    """
+    versions = IndexVersions(persist_directory)
+    return {
+        "current": versions.current(),
+        "history": versions.history(),
+        "versions": versions.list(),
+        "rebuild": dict(index_rebuild_status),
+    }
+
+
+@holding_ingest_lock
+def add_documents_to_retriever(
+    document_paths: List[str],
+    retriever: MultiVectorRetriever,
+    persist_directory: Optional[str] = None
+) -> None:
+    """
+    Add new documents to existing MultiVectorRetriever with duplicate detection.
+
+    Args:
+        document_paths: List of paths to documents to add
+        retriever: Existing MultiVectorRetriever to add documents to
+        persist_directory: Directory of the retriever's vectorstore (derived from it if omitted)
+    """
+    persist_directory = persist_directory or index_directory(retriever)
+    new_documents = []
+    large_files = []
+
+    for path in document_paths:
+        if os.path.isfile(path):
+            if os.path.getsize(path) > rag_settings.LARGE_FILE_THRESHOLD_MB * 1024 * 1024:
+                large_files.append(path)
+                continue
+            loader = TextLoader(path, encoding="utf-8")
+            docs = loader.load()
+            new_documents.extend(docs)
+        elif os.path.isdir(path):
+            docs = load_documents(path)
+            new_documents.extend(docs)
+
+    # Filter out duplicates, both within the upload and against the index
+    registry = get_hash_registry(persist_directory, retriever.vectorstore)
+    unique_documents, duplicates_found = filter_duplicate_documents(
+        new_documents, registry)
+
+    # Large files are hashed and split in windows rather than loaded whole
+    streamed_chunks = 0
+    for path in large_files:
+        content_hash = hash_text_file(path)
+        if content_hash in registry:
+            duplicates_found += 1
+            continue
+        doc_id = document_id(content_hash)
+        chunk_count = make_embedding_pipeline(retriever).add_chunks(
+            iter_large_file_chunks(path, doc_id, content_hash, retriever))
+        registry.add_many([content_hash])
+        mark_index_changed(persist_directory)
+        streamed_chunks += chunk_count
+        print(f"Streamed large file {path} into {chunk_count} chunks")
+
+    if unique_documents:
+        chunk_count = index_documents(unique_documents, retriever, registry)
+        mark_index_changed(persist_directory)
+        print(
+            f"Added {len(unique_documents)} new documents and {chunk_count} chunks to retriever")
+    elif not streamed_chunks:
+        print("No new documents to add")
+
+    if duplicates_found > 0:
+        print(f"Filtered out {duplicates_found} duplicate documents")
+
+
+def get_retriever() -> SwappableRetriever:
+    """
+    Get the live retriever of the process, loading or creating the index on first use.
+
+    Importing this module does not touch the index, so tools working on
+    other index versions (e.g. migrate_embeddings.py) never open the live one.
+
+    Returns:
+        SwappableRetriever over the live index version in CHROMA_DB_DIR
+    """
+    global _retriever
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = load_or_create_multi_vector_retriever(
+                rag_settings.DOCUMENTS_DIR, rag_settings.CHROMA_DB_DIR)
+            print("Ingestion setup complete. MultiVectorRetriever with duplicate detection ready for use.")
+        return _retriever
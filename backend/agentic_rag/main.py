@@ -1,5 +1,6 @@
 from dotenv import load_dotenv
 
+from graph.budget import new_budget
 from graph.graph import app
 
 
@@ -8,4 +9,4 @@ load_dotenv()
 
 if __name__ == "__main__":
     question = "What is agent memory in context of LLMs?"
-    print(app.invoke(input={"question": question}))
+    print(app.invoke(input={"question": question, **new_budget()}))
@@ -0,0 +1,321 @@
+"""
+Re-embed the live index with another embedding model and switch to it.
+
+Every stored chunk is re-embedded into a new index version with bounded
+parallelism. Chunk IDs, chunk boundaries and parents are kept, so only the
+vectors change. Progress is checkpointed per parent in
+CHROMA_DB_DIR/migration.sqlite3; running the command again after a crash
+resumes where it stopped. Before cutover the new version is checked against
+the live one: chunk and parent counts must match, and the top-k results of
+sampled chunks must overlap by at least --min-recall.
+
+Running API servers switch to the new version through
+POST /api/v1/documents/index-versions/reload (or on restart), and the old
+version stays available for rollback.
+
+Run from the agentic_rag directory:
+    python migrate_embeddings.py --model text-embedding-3-small
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Tuple
+
+from langchain.retrievers.multi_vector import MultiVectorRetriever
+from langchain_core.documents import Document
+
+from indexing.hash_registry import ContentHashRegistry
+from indexing.memmap_vectorstore import vector_collection
+from indexing.migration import MigrationCheckpoint, sample_recall
+from indexing.versions import IndexVersions, write_index_info
+from ingestion import (
+    build_retriever,
+    get_hash_registry,
+    make_embedding_pipeline,
+    new_index_info,
+    open_manifest,
+    remove_documents,
+)
+from settings import rag_settings
+
+
+def stored_chunks(
+    retriever: MultiVectorRetriever,
+    doc_ids: List[str]
+) -> List[Tuple[str, Document]]:
+    """
+    Read the chunks of some parents from the vectorstore, with their text.
+
+    Args:
+        retriever: MultiVectorRetriever to read from
+        doc_ids: IDs of the parents
+
+    Returns:
+        List of (chunk_id, chunk) pairs
+    """
+    if not doc_ids:
+        return []
+    result = vector_collection(retriever.vectorstore).get(
+        where={"doc_id": {"$in": doc_ids}}, include=["documents", "metadatas"])
+    chunks = [
+        Document(page_content=text or "", metadata=metadata or {})
+        for text, metadata in zip(result["documents"], result["metadatas"])
+    ]
+    # Chunks referencing a parent span have no text of their own
+    retriever.docstore.materialize(chunks)
+    return list(zip(result["ids"], chunks))
+
+
+def migrate_parents(
+    source: MultiVectorRetriever,
+    target: MultiVectorRetriever,
+    registry: ContentHashRegistry,
+    checkpoint: MigrationCheckpoint,
+    doc_ids: List[str],
+    max_concurrency: int,
+    batch_size: int = 500
+) -> int:
+    """
+    Copy parents and re-embed their stored chunks into the target index.
+
+    A parent is checkpointed once all of its chunks are written, so batches
+    completing out of order never mark unfinished work as done.
+
+    Args:
+        source: Retriever of the live version
+        target: Retriever of the version being built
+        registry: Content hash registry of the target
+        checkpoint: Migration checkpoint
+        doc_ids: IDs of the parents to migrate
+        max_concurrency: Number of embedding requests in flight
+        batch_size: Number of parents read per docstore call
+
+    Returns:
+        Number of chunks written
+    """
+    pending = Counter()
+    progress = {"parents": 0, "printed": time.monotonic()}
+
+    def chunks() -> Iterator[Tuple[str, Document]]:
+        for start in range(0, len(doc_ids), batch_size):
+            batch_ids = doc_ids[start:start + batch_size]
+            parents = [
+                (doc_id, parent)
+                for doc_id, parent in zip(batch_ids, source.docstore.mget(batch_ids))
+                if parent is not None
+            ]
+            target.docstore.mset(parents)
+            registry.add_many([
+                parent.metadata["content_hash"]
+                for _, parent in parents if parent.metadata.get("content_hash")
+            ])
+            batch_chunks = stored_chunks(source, [doc_id for doc_id, _ in parents])
+            pending.update(chunk.metadata["doc_id"] for _, chunk in batch_chunks)
+            checkpoint.mark_done(doc_id for doc_id, _ in parents if not pending[doc_id])
+            yield from batch_chunks
+
+    def on_write(batch: List[Tuple[str, Document]]) -> None:
+        finished = []
+        for _, chunk in batch:
+            doc_id = chunk.metadata["doc_id"]
+            pending[doc_id] -= 1
+            if pending[doc_id] <= 0:
+                del pending[doc_id]
+                finished.append(doc_id)
+        checkpoint.mark_done(finished)
+        progress["parents"] += len(finished)
+        if time.monotonic() - progress["printed"] >= 10:
+            progress["printed"] = time.monotonic()
+            print(f"  {progress['parents']}/{len(doc_ids)} parents migrated")
+
+    pipeline = make_embedding_pipeline(target)
+    pipeline.max_concurrency = max_concurrency
+    return pipeline.add_chunks(chunks(), on_write=on_write)
+
+
+def verify_migration(
+    source: MultiVectorRetriever,
+    target: MultiVectorRetriever,
+    sample_size: int,
+    k: int
+) -> Dict[str, Any]:
+    """
+    Compare counts and sample retrieval of the migrated index with the live one.
+
+    One random chunk is taken from each of sample_size random parents and
+    used as a query against both indexes.
+
+    Args:
+        source: Retriever of the live version
+        target: Retriever of the migrated version
+        sample_size: Number of sample queries
+        k: Number of results compared per query
+
+    Returns:
+        Dict with chunk and parent counts of both indexes and the sample_recall results
+    """
+    report = {
+        "source_chunks": vector_collection(source.vectorstore).count(),
+        "target_chunks": vector_collection(target.vectorstore).count(),
+        "source_parents": len(source.docstore),
+        "target_parents": len(target.docstore),
+    }
+
+    parent_ids = list(source.docstore.yield_keys())
+    sampled_parents = random.sample(parent_ids, min(sample_size, len(parent_ids)))
+    by_parent: Dict[str, List[Tuple[str, Document]]] = {}
+    for chunk_id, chunk in stored_chunks(source, sampled_parents):
+        by_parent.setdefault(chunk.metadata["doc_id"], []).append((chunk_id, chunk))
+    samples = [random.choice(parent_chunks) for parent_chunks in by_parent.values()]
+
+    report.update(sample_recall(
+        source.vectorstore,
+        target.vectorstore,
+        [chunk.page_content for _, chunk in samples],
+        [chunk_id for chunk_id, _ in samples],
+        k=k
+    ))
+    return report
+
+
+def migrate_embeddings(
+    model: str,
+    persist_directory: str = "chroma_db",
+    max_concurrency: int = 4,
+    sample_size: int = 200,
+    k: int = 10,
+    min_recall: float = 0.5,
+    cutover: bool = True,
+    force: bool = False,
+    restart: bool = False
+) -> Dict[str, Any]:
+    """
+    Re-embed the live index version with another model, resuming an unfinished run.
+
+    Args:
+        model: Embedding model of the new version
+        persist_directory: Root directory of the versioned index
+        max_concurrency: Number of embedding requests in flight
+        sample_size: Number of sample queries for the recall check
+        k: Number of results compared per sample query
+        min_recall: Minimum recall@k against the live version for cutover
+        cutover: Make the new version live once it passes verification
+        force: Cut over even if verification fails
+        restart: Discard the progress of an unfinished migration
+
+    Returns:
+        Verification report, with the migrated version and whether it went live
+    """
+    versions = IndexVersions(persist_directory)
+    checkpoint = MigrationCheckpoint(os.path.join(persist_directory, "migration.sqlite3"))
+    state = checkpoint.state()
+
+    if state is not None and (
+        restart
+        or state["embedding_model"] != model
+        or state["source_version"] != versions.current()
+        or not os.path.isdir(versions.path(state["target_version"]))
+    ):
+        print(f"Discarding unfinished migration to {state['target_version']}")
+        shutil.rmtree(versions.path(state["target_version"]), ignore_errors=True)
+        state = None
+
+    if state is None:
+        source_version = versions.current()
+        if source_version is None:
+            raise ValueError(f"No index found in {persist_directory}")
+        target_version = versions.new_version()
+        write_index_info(versions.path(target_version), new_index_info(model))
+        checkpoint.start(source_version, target_version, model)
+        print(f"Migrating index version {source_version} to {target_version} ({model})")
+    else:
+        source_version = state["source_version"]
+        target_version = state["target_version"]
+        print(f"Resuming migration of {source_version} to {target_version} "
+              f"({model}, {len(checkpoint)} parents done)")
+
+    source = build_retriever(versions.path(source_version))
+    target_path = versions.path(target_version)
+    target = build_retriever(target_path)
+    registry = get_hash_registry(target_path)
+
+    start = time.perf_counter()
+    done = checkpoint.done_ids()
+    doc_ids = [doc_id for doc_id in source.docstore.yield_keys() if doc_id not in done]
+    chunk_count = migrate_parents(source, target, registry, checkpoint, doc_ids, max_concurrency)
+
+    # Catch up with documents ingested or removed while migrating
+    source_ids = set(source.docstore.yield_keys())
+    chunk_count += migrate_parents(
+        source, target, registry, checkpoint,
+        sorted(source_ids - checkpoint.done_ids()), max_concurrency)
+    removed_ids = sorted(set(target.docstore.yield_keys()) - source_ids)
+    removed_hashes = [
+        parent.metadata.get("content_hash")
+        for parent in target.docstore.mget(removed_ids) if parent is not None
+    ]
+    remove_documents(removed_ids, target, registry, [h for h in removed_hashes if h])
+    print(f"Re-embedded {chunk_count} chunks in {time.perf_counter() - start:.1f}s")
+
+    report = verify_migration(source, target, sample_size, k)
+    report["passed"] = (
+        report["source_chunks"] == report["target_chunks"]
+        and report["source_parents"] == report["target_parents"]
+        and (report["recall_at_k"] is None or report["recall_at_k"] >= min_recall)
+    )
+    report.update(version=target_version, live=False)
+
+    if cutover and (report["passed"] or force):
+        open_manifest(versions.path(source_version)).copy_to(
+            os.path.join(target_path, "manifest.sqlite3"))
+        versions.activate(target_version)
+        versions.prune(rag_settings.INDEX_VERSIONS_TO_KEEP)
+        checkpoint.close(remove=True)
+        report["live"] = True
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True, help="Embedding model of the new version")
+    parser.add_argument("--persist-directory", default=rag_settings.CHROMA_DB_DIR)
+    parser.add_argument("--concurrency", type=int, default=rag_settings.EMBEDDING_MAX_CONCURRENCY)
+    parser.add_argument("--sample-size", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--min-recall", type=float, default=0.5)
+    parser.add_argument("--no-cutover", action="store_true",
+                        help="Build and verify the new version without making it live")
+    parser.add_argument("--force", action="store_true",
+                        help="Make the new version live even if verification fails")
+    parser.add_argument("--restart", action="store_true",
+                        help="Discard the progress of an unfinished migration")
+    args = parser.parse_args()
+
+    report = migrate_embeddings(
+        args.model,
+        args.persist_directory,
+        max_concurrency=args.concurrency,
+        sample_size=args.sample_size,
+        k=args.k,
+        min_recall=args.min_recall,
+        cutover=not args.no_cutover,
+        force=args.force,
+        restart=args.restart
+    )
+    print(json.dumps(report, indent=2))
+    if report["live"]:
+        print(f"Index version {report['version']} is live")
+    elif not report["passed"]:
+        print("Verification failed; the live version is unchanged (use --force to cut over)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
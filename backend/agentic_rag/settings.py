@@ -0,0 +1,160 @@
+"""Configuration settings for the agentic RAG pipeline."""
+
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+
+class RAGSettings:
+    """Agentic RAG settings."""
+
+    # Document Grading Settings
+    GRADING_MAX_CONCURRENCY: int = int(os.getenv("GRADING_MAX_CONCURRENCY", "4"))
+    # 'concurrent' grades each document separately, 'batch' grades all in one call
+    GRADING_MODE: str = os.getenv("GRADING_MODE", "concurrent")
+    BATCH_GRADING_TOKEN_BUDGET: int = int(
+        os.getenv("BATCH_GRADING_TOKEN_BUDGET", "12000"))
+    # Remember grades by question and document, next to the index
+    GRADE_CACHE: bool = os.getenv("GRADE_CACHE", "true").lower() == "true"
+    GRADE_CACHE_MAX_ENTRIES: int = int(os.getenv("GRADE_CACHE_MAX_ENTRIES", "200000"))
+
+    # Similarity Pre-filter Settings
+    # Documents whose best chunk has at least GRADE_ACCEPT_SIMILARITY cosine
+    # similarity to the question are relevant, those below
+    # GRADE_REJECT_SIMILARITY irrelevant, without an LLM call; only the band
+    # between them is graded. Empty disables a bound
+    # (calibrate from GRADE_LOG_PATH with benchmarks/grade_calibration.py)
+    GRADE_ACCEPT_SIMILARITY: Optional[float] = (
+        float(os.getenv("GRADE_ACCEPT_SIMILARITY")) if os.getenv("GRADE_ACCEPT_SIMILARITY") else None)
+    GRADE_REJECT_SIMILARITY: Optional[float] = (
+        float(os.getenv("GRADE_REJECT_SIMILARITY")) if os.getenv("GRADE_REJECT_SIMILARITY") else None)
+    # Fraction of pre-filtered documents still sent to the LLM, so the log
+    # keeps covering similarities outside the band
+    GRADE_AUDIT_RATE: float = float(os.getenv("GRADE_AUDIT_RATE", "0.05"))
+    # JSONL log of LLM grades with the document similarity, for calibration;
+    # empty (the default) disables it. The file is appended to without bound,
+    # so enable it for a calibration window only
+    GRADE_LOG_PATH: str = os.getenv("GRADE_LOG_PATH", "")
+
+    # Generation Grading Settings
+    # 'sequential' runs the hallucination grader then the answer grader,
+    # 'parallel' runs both at once and stops waiting for the answer check on
+    # hallucination (the async graph API also cancels its request). A request
+    # can override it with configurable.generation_grading_mode in the graph config
+    GENERATION_GRADING_MODE: str = os.getenv(
+        "GENERATION_GRADING_MODE", "sequential")
+
+    # Request Budget Settings
+    MAX_REGENERATIONS: int = int(os.getenv("MAX_REGENERATIONS", "2"))
+    MAX_WEB_SEARCHES: int = int(os.getenv("MAX_WEB_SEARCHES", "2"))
+    # LLM, retriever and web search calls in graph nodes are cut short when
+    # the deadline passes, and the best answer so far is returned as degraded
+    GRAPH_DEADLINE_SECONDS: float = float(
+        os.getenv("GRAPH_DEADLINE_SECONDS", "60"))
+
+    # LLM Response Cache Settings
+    # Exact-match cache of the temperature-0 chains, keyed by model, prompt and
+    # parameters and shared by all worker processes; kept under CHROMA_DB_DIR
+    # by default, an empty path disables it
+    LLM_CACHE_PATH: str = os.getenv(
+        "LLM_CACHE_PATH", os.path.join(os.getenv("CHROMA_DB_DIR", "chroma_db"), "llm_cache.sqlite3"))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "100000"))
+    # Chains using the cache
+    LLM_CACHE_CHAINS: str = os.getenv(
+        "LLM_CACHE_CHAINS",
+        "question_router,retrieval_grader,batch_retrieval_grader,hallucination_grader,answer_grader")
+
+    # Index Settings
+    DOCUMENTS_DIR: str = os.getenv("DOCUMENTS_DIR", "documents")
+    # Root of the versioned index; CHROMA_DB_DIR/CURRENT names the live version
+    CHROMA_DB_DIR: str = os.getenv("CHROMA_DB_DIR", "chroma_db")
+    # Previous versions kept for rollback after a rebuild
+    INDEX_VERSIONS_TO_KEEP: int = int(os.getenv("INDEX_VERSIONS_TO_KEEP", "2"))
+
+    # Chunking Settings
+    CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "1000"))
+    CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "200"))
+    # Worker processes for loading and splitting files during a sync
+    INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", str(min(os.cpu_count() or 1, 8))))
+    # Files above this size are streamed in windows and stored as segment parents
+    LARGE_FILE_THRESHOLD_MB: int = int(os.getenv("LARGE_FILE_THRESHOLD_MB", "32"))
+    STREAM_WINDOW_CHARS: int = int(os.getenv("STREAM_WINDOW_CHARS", "100000"))
+
+    # Vector Store Settings
+    # 'chroma' or 'memmap' (memory-mapped matrix shared by all worker processes).
+    # Applies to newly built index versions; each version records its backend
+    VECTORSTORE_BACKEND: str = os.getenv("VECTORSTORE_BACKEND", "chroma")
+    # First-pass vectors of new memmap stores: 'none', 'int8' (4x smaller) or
+    # 'binary' (32x smaller); the top VECTORSTORE_RESCORE_FACTOR * k candidates
+    # are re-scored with the float32 vectors kept on disk
+    # (compare settings with benchmarks/quantization.py)
+    VECTORSTORE_QUANTIZATION: str = os.getenv("VECTORSTORE_QUANTIZATION", "none")
+    VECTORSTORE_RESCORE_FACTOR: int = int(os.getenv("VECTORSTORE_RESCORE_FACTOR", "4"))
+    # Memmap stores up to this many vectors are searched exhaustively, larger ones through HNSW
+    VECTORSTORE_BRUTE_FORCE_LIMIT: int = int(
+        os.getenv("VECTORSTORE_BRUTE_FORCE_LIMIT", "20000"))
+    # HNSW graph parameters of Chroma collections and large memmap stores
+    # (tune with benchmarks/ann_tuning.py). M and ef_construction apply to
+    # newly built graphs; Chroma fixes ef_search when a collection is created,
+    # memmap stores apply it to every search
+    HNSW_M: int = int(os.getenv("HNSW_M", "16"))
+    HNSW_EF_CONSTRUCTION: int = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+    HNSW_EF_SEARCH: int = int(os.getenv("HNSW_EF_SEARCH", "64"))
+
+    # Retrieval Settings
+    # Parent documents returned per query
+    RETRIEVAL_K: int = int(os.getenv("RETRIEVAL_K", "4"))
+
+    # Hybrid Retrieval Settings
+    # Chunks are also indexed by BM25 (SQLite FTS5) and keyword hits are merged
+    # with vector hits by weighted reciprocal rank fusion
+    HYBRID_SEARCH: bool = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+    HYBRID_VECTOR_WEIGHT: float = float(os.getenv("HYBRID_VECTOR_WEIGHT", "1.0"))
+    HYBRID_KEYWORD_WEIGHT: float = float(os.getenv("HYBRID_KEYWORD_WEIGHT", "1.0"))
+    # Rank offset of the fusion; larger values flatten the advantage of top ranks
+    HYBRID_RRF_K: int = int(os.getenv("HYBRID_RRF_K", "60"))
+    # Chunks taken from each search before fusion
+    HYBRID_CANDIDATES: int = int(os.getenv("HYBRID_CANDIDATES", "20"))
+
+    # Document Store Settings
+    # Number of parent documents kept in the in-process LRU
+    DOCSTORE_CACHE_SIZE: int = int(os.getenv("DOCSTORE_CACHE_SIZE", "256"))
+    # Chunks reference (doc_id, span_start, span_end) in the parent; set to true
+    # to also keep a copy of their text in the vectorstore
+    STORE_CHUNK_TEXT: bool = os.getenv("STORE_CHUNK_TEXT", "false").lower() == "true"
+
+    # Embedding Model Settings
+    # Model of newly built index versions; each version records its own model,
+    # so changing this needs a migration (migrate_embeddings.py) to take effect
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "")
+
+    # Embedding Cache Settings
+    # Kept outside the vectorstore directory so it survives re-indexing; empty disables it
+    EMBEDDING_CACHE_DIR: str = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "512"))
+
+    # Query Embedding Cache Settings
+    # Question vectors kept per worker by (model, normalized question); 0 disables the cache
+    QUERY_EMBEDDING_CACHE_MB: float = float(os.getenv("QUERY_EMBEDDING_CACHE_MB", "32"))
+    QUERY_EMBEDDING_CACHE_TTL_SECONDS: float = float(
+        os.getenv("QUERY_EMBEDDING_CACHE_TTL_SECONDS", "86400"))
+    # SQLite file sharing the cache between the worker processes of a host; empty keeps it per process
+    QUERY_EMBEDDING_CACHE_PATH: str = os.getenv("QUERY_EMBEDDING_CACHE_PATH", "")
+
+    # Embedding Pipeline Settings
+    # Batches are capped by EMBEDDING_BATCH_SIZE chunks and EMBEDDING_BATCH_TOKENS tokens
+    EMBEDDING_BATCH_TOKENS: int = int(os.getenv("EMBEDDING_BATCH_TOKENS", "100000"))
+    EMBEDDING_MAX_CONCURRENCY: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+    # Provider quotas shared by all embedding calls of the process; 0 disables a limit
+    EMBEDDING_REQUESTS_PER_MINUTE: int = int(
+        os.getenv("EMBEDDING_REQUESTS_PER_MINUTE", "3000"))
+    EMBEDDING_TOKENS_PER_MINUTE: int = int(
+        os.getenv("EMBEDDING_TOKENS_PER_MINUTE", "1000000"))
+    EMBEDDING_MAX_RETRIES: int = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+
+
+rag_settings = RAGSettings()
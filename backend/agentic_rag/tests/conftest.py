@@ -0,0 +1,33 @@
+import hashlib
+import os
+import sys
+from typing import List
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+# Tests import modules the way the app does: agentic_rag and the FastAPI app directories on sys.path
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for directory in ("agentic_rag", "fastapi"):
+    path = os.path.join(BACKEND_DIR, directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic offline embeddings: the first bytes of the SHA256 of the text."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [byte - 127.5 for byte in hashlib.sha256(text.encode("utf-8")).digest()[:16]]
+
+
+@pytest.fixture
+def hash_embeddings():
+    return HashEmbeddings()
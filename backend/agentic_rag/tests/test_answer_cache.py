@@ -0,0 +1,80 @@
+import pytest
+
+from services import answer_cache
+from services.answer_cache import SemanticAnswerCache, parse_route_ttls
+
+
+class Clock:
+    """Stand-in for time.time that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(answer_cache.time, "time", clock)
+    return clock
+
+
+def make_cache(max_entries=4, ttls="vectorstore=60,websearch=0"):
+    return SemanticAnswerCache(max_entries, threshold=0.95, route_ttls=parse_route_ttls(ttls))
+
+
+def test_parse_route_ttls():
+    assert parse_route_ttls("vectorstore=3600, websearch=300,bad") == {
+        "vectorstore": 3600.0, "websearch": 300.0}
+
+
+def test_hits_similar_questions(clock):
+    cache = make_cache()
+    assert cache.store([1.0, 0.0, 0.0], "v1", "q", "vectorstore", {"answer": "a"})
+
+    entry, similarity = cache.lookup([0.99, 0.05, 0.0], "v1")
+    assert entry["response"] == {"answer": "a"}
+    assert similarity > 0.95
+    assert cache.lookup([0.0, 1.0, 0.0], "v1") is None
+
+
+def test_skips_routes_without_ttl(clock):
+    cache = make_cache()
+
+    assert not cache.store([1.0, 0.0, 0.0], "v1", "q", "websearch", {"answer": "a"})
+    assert not cache.store([1.0, 0.0, 0.0], "v1", "q", "unknown", {"answer": "a"})
+    assert cache.lookup([1.0, 0.0, 0.0], "v1") is None
+
+
+def test_expires_entries(clock):
+    cache = make_cache()
+    cache.store([1.0, 0.0, 0.0], "v1", "q", "vectorstore", {"answer": "a"})
+
+    clock.now += 60
+    assert cache.lookup([1.0, 0.0, 0.0], "v1") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_evicts_least_recently_used(clock):
+    cache = make_cache(max_entries=2)
+    cache.store([1.0, 0.0, 0.0], "v1", "a", "vectorstore", {"answer": "a"})
+    cache.store([0.0, 1.0, 0.0], "v1", "b", "vectorstore", {"answer": "b"})
+    cache.lookup([1.0, 0.0, 0.0], "v1")
+    cache.store([0.0, 0.0, 1.0], "v1", "c", "vectorstore", {"answer": "c"})
+
+    assert cache.lookup([0.0, 1.0, 0.0], "v1") is None
+    assert cache.lookup([1.0, 0.0, 0.0], "v1")[0]["question"] == "a"
+    assert cache.lookup([0.0, 0.0, 1.0], "v1")[0]["question"] == "c"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_drops_entries_when_index_changes(clock):
+    cache = make_cache()
+    cache.store([1.0, 0.0, 0.0], "v1", "q", "vectorstore", {"answer": "a"})
+
+    assert cache.lookup([1.0, 0.0, 0.0], "v2") is None
+    assert cache.stats()["invalidations"] == 1
+    assert cache.lookup([1.0, 0.0, 0.0], "v1") is None
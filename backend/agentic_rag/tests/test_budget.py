@@ -0,0 +1,190 @@
+import asyncio
+import time
+from typing import Optional, TypedDict
+
+import pytest
+from langgraph.graph import END, StateGraph
+
+from graph.budget import (
+    acall_within_deadline,
+    call_within_deadline,
+    can_regenerate,
+    can_web_search,
+    decide_after_generation_grading,
+    keep_best_generation,
+    new_budget,
+    within_deadline,
+)
+
+
+def test_new_budget_uses_settings_unless_overridden():
+    budget = new_budget(max_regenerations=0, deadline_seconds=10)
+
+    assert budget["max_regenerations"] == 0
+    assert budget["max_web_searches"] >= 0
+    assert budget["deadline"] == pytest.approx(time.time() + 10, abs=1)
+
+
+def test_regenerations_and_web_searches_are_bounded():
+    state = {**new_budget(max_regenerations=1, max_web_searches=1), "generation_count": 1}
+
+    assert can_regenerate(state) and can_web_search(state)
+    assert not can_regenerate({**state, "generation_count": 2})
+    assert not can_web_search({**state, "web_search_count": 1})
+    assert not can_regenerate({**state, "deadline": time.time() - 1})
+    assert not can_web_search({**state, "deadline": time.time() - 1})
+
+
+@pytest.mark.parametrize("best, latest, kept", [
+    ("not_supported", None, "latest"),
+    (None, "not_supported", "best"),
+    ("not_useful", "not_useful", "latest"),
+    ("useful", "not_useful", "best"),
+    ("not_useful", "useful", "latest"),
+])
+def test_best_generation_is_the_best_graded(best, latest, kept):
+    state = {"generation": "latest", "best_generation": "best", "best_generation_verdict": best}
+
+    update = keep_best_generation(state, latest)
+
+    assert update["generation_verdict"] == latest
+    assert update.get("best_generation", "best") == kept
+
+
+def test_first_generation_is_kept_whatever_its_grade():
+    assert keep_best_generation({"generation": "first"}, "not_supported") == {
+        "generation_verdict": "not_supported",
+        "best_generation": "first",
+        "best_generation_verdict": "not_supported",
+    }
+
+
+def test_missing_generation_is_not_kept():
+    assert keep_best_generation({"generation": None}, None) == {"generation_verdict": None}
+
+
+def test_next_step_respects_the_budget():
+    state = {**new_budget(max_regenerations=1, max_web_searches=1), "generation_count": 1}
+
+    assert decide_after_generation_grading({**state, "generation_verdict": "useful"}) == "useful"
+    assert decide_after_generation_grading(
+        {**state, "generation_verdict": "not_supported"}) == "not_supported"
+    assert decide_after_generation_grading(
+        {**state, "generation_verdict": "not_supported", "generation_count": 2}) == "budget_exhausted"
+    assert decide_after_generation_grading(
+        {**state, "generation_verdict": "not_useful", "web_search_count": 1}) == "budget_exhausted"
+    assert decide_after_generation_grading({**state, "generation_verdict": None}) == "budget_exhausted"
+
+
+def test_call_without_deadline_runs_to_completion():
+    assert call_within_deadline("step", lambda state: "done", lambda state: "fallback", {}) == "done"
+
+
+def test_call_after_deadline_is_skipped():
+    calls = []
+
+    result = call_within_deadline(
+        "step", calls.append, lambda state: "fallback", {"deadline": time.time() - 1})
+
+    assert result == "fallback"
+    assert calls == []
+
+
+def test_slow_call_gives_up_at_the_deadline():
+    start = time.perf_counter()
+
+    result = call_within_deadline(
+        "step", lambda state: time.sleep(2) or "done", lambda state: "fallback",
+        {"deadline": time.time() + 0.1})
+
+    assert result == "fallback"
+    assert time.perf_counter() - start < 1
+
+
+def test_slow_async_call_is_cancelled_at_the_deadline():
+    cancelled = []
+
+    async def slow(state):
+        try:
+            await asyncio.sleep(2)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "done"
+
+    result = asyncio.run(acall_within_deadline(
+        "step", slow, lambda state: "fallback", {"deadline": time.time() + 0.1}))
+
+    assert result == "fallback"
+    assert cancelled == [True]
+
+
+class State(TypedDict):
+    question: str
+    generation: Optional[str]
+    generation_count: int
+    max_regenerations: int
+    max_web_searches: int
+    deadline: float
+    degraded: bool
+    generation_verdict: Optional[str]
+    best_generation: Optional[str]
+    best_generation_verdict: Optional[str]
+
+
+def build_app(generation_latency):
+    """Generate -> grade -> regenerate loop of the RAG graph with stub LLM calls."""
+
+    def generate(state):
+        count = (state.get("generation_count") or 0) + 1
+        if count > 1:
+            time.sleep(generation_latency)
+        return {"generation": f"answer {count}", "generation_count": count}
+
+    def grade_generation(state):
+        return keep_best_generation(state, "not_supported")
+
+    def degraded_answer(state):
+        return {"generation": state.get("best_generation") or state.get("generation") or "",
+                "degraded": True}
+
+    flow = StateGraph(state_schema=State)
+    flow.add_node("generate", within_deadline(
+        "generate", generate, lambda state: {"generation": None}))
+    flow.add_node("grade_generation", within_deadline(
+        "grade_generation", grade_generation, lambda state: keep_best_generation(state, None)))
+    flow.add_node("degraded_answer", degraded_answer)
+    flow.set_entry_point("generate")
+    flow.add_edge("generate", "grade_generation")
+    flow.add_conditional_edges(
+        "grade_generation",
+        decide_after_generation_grading,
+        path_map={"useful": END, "not_useful": END,
+                  "not_supported": "generate", "budget_exhausted": "degraded_answer"},
+    )
+    flow.add_edge("degraded_answer", END)
+    return flow.compile()
+
+
+def test_slow_regeneration_ends_with_the_degraded_answer_in_time():
+    app = build_app(generation_latency=3)
+
+    start = time.perf_counter()
+    result = app.invoke({"question": "question", **new_budget(
+        max_regenerations=2, deadline_seconds=0.3)})
+
+    assert time.perf_counter() - start < 2
+    assert result["degraded"] is True
+    assert result["generation"] == "answer 1"
+    assert result["best_generation_verdict"] == "not_supported"
+
+
+def test_regenerations_within_budget_end_with_the_degraded_answer():
+    app = build_app(generation_latency=0)
+
+    result = app.invoke({"question": "question", **new_budget(
+        max_regenerations=1, deadline_seconds=10)})
+
+    assert result["degraded"] is True
+    assert result["generation_count"] == 2
+    assert result["generation"] == "answer 2"
@@ -0,0 +1,100 @@
+import hashlib
+
+import pytest
+
+from indexing import chunking
+from indexing.chunking import (
+    hash_text_file, iter_text_segments, make_splitter, split_with_offsets)
+
+
+class RewritingSplitter:
+    """Splitter whose chunks are not verbatim substrings of the text."""
+
+    def split_text(self, text):
+        return [text.upper()]
+
+
+def test_spans_of_repeated_passages_are_successive():
+    text = "same words here. " * 20
+    splitter = make_splitter(chunk_size=40, chunk_overlap=10)
+
+    spans = split_with_offsets(text, splitter)
+
+    assert [text[start:end] for start, end in spans] == splitter.split_text(text)
+    # Successive chunks overlap by at most chunk_overlap, not by a repeated phrase
+    for (start, end), (next_start, _) in zip(spans, spans[1:]):
+        assert end - 10 <= next_start < end
+
+
+def test_unmatched_chunk_raises_instead_of_storing_a_bogus_span():
+    with pytest.raises(ValueError):
+        split_with_offsets("lower case text", RewritingSplitter())
+
+
+def file_chunks(path, splitter, window_chars):
+    """(start, end, text) of every streamed chunk, in file character offsets."""
+    return [
+        (offset + start, offset + end, segment[start:end])
+        for offset, segment, spans in iter_text_segments(path, splitter, window_chars)
+        for start, end in spans
+    ]
+
+
+def test_segments_keep_chunk_overlap_across_windows(tmp_path):
+    text = "".join(f"Sentence {i} about naïve cafés. " for i in range(400))
+    path = tmp_path / "large.txt"
+    path.write_text(text, encoding="utf-8")
+    splitter = make_splitter(chunk_size=200, chunk_overlap=50)
+
+    chunks = file_chunks(str(path), splitter, window_chars=700)
+
+    assert all(text[start:end] == chunk for start, end, chunk in chunks)
+    assert all(len(chunk) <= 200 for _, _, chunk in chunks)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(text.rstrip())
+    for (start, end, _), (next_start, next_end, _) in zip(chunks, chunks[1:]):
+        # Successive chunks move forward and overlap, including across window edges
+        assert start < next_start < end < next_end
+    assert abs(len(chunks) - len(splitter.split_text(text))) <= 2
+
+
+def test_single_window_matches_whole_text_split(tmp_path):
+    text = "word " * 300
+    path = tmp_path / "small.txt"
+    path.write_text(text, encoding="utf-8")
+    splitter = make_splitter(chunk_size=100, chunk_overlap=20)
+
+    chunks = file_chunks(str(path), splitter, window_chars=10_000)
+
+    assert [chunk for _, _, chunk in chunks] == splitter.split_text(text)
+    assert hash_text_file(str(path), window_chars=64) == hashlib.sha256(
+        text.encode("utf-8")).hexdigest()
+
+
+def loaded_summary(loaded):
+    return [
+        (item.path, item.doc_id, [(chunk_id, chunk.page_content, chunk.metadata)
+                                  for chunk_id, chunk in item.chunks])
+        for item in loaded
+    ]
+
+
+def test_process_pool_matches_in_process_loading(tmp_path, monkeypatch):
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"doc{i}.txt"
+        path.write_text(f"Document {i}. " + "ünïcode text " * (20 + 15 * i), encoding="utf-8")
+        paths.append(str(path))
+
+    in_process = list(chunking.iter_load_and_split(paths, chunk_size=120, chunk_overlap=20))
+    monkeypatch.setattr(chunking, "MIN_FILES_PER_WORKER", 1)
+    pooled = list(chunking.iter_load_and_split(
+        paths, chunk_size=120, chunk_overlap=20, max_workers=2, window=1))
+
+    assert [item.path for item in pooled] == paths
+    assert loaded_summary(pooled) == loaded_summary(in_process)
+    first = in_process[0]
+    content_hash = hashlib.sha256(first.document.page_content.encode("utf-8")).hexdigest()
+    assert first.document.metadata["content_hash"] == content_hash
+    assert first.doc_id == chunking.document_id(content_hash)
+    assert [chunk_id for chunk_id, _ in first.chunks] == [
+        f"{first.doc_id}-{i}" for i in range(len(first.chunks))]
@@ -0,0 +1,78 @@
+import os
+
+from langchain_core.documents import Document
+
+from indexing.docstore import SQLiteDocStore
+
+TEXT = "Café au lait — naïve façade. 日本語のテキスト 🚀 and plain ASCII at the end."
+
+
+def byte_span(text: str, fragment: str):
+    """UTF-8 byte offsets of a fragment, as the chunker records them."""
+    start = len(text[:text.index(fragment)].encode("utf-8"))
+    return start, start + len(fragment.encode("utf-8"))
+
+
+def test_mget_round_trips_multibyte_text(tmp_path):
+    store = SQLiteDocStore(str(tmp_path / "docstore.sqlite3"))
+    store.mset([("doc", Document(page_content=TEXT, metadata={"source": "a.txt"}))])
+
+    [document] = store.mget(["doc"])
+    assert document.page_content == TEXT
+    assert document.metadata == {"source": "a.txt"}
+    assert store.mget(["missing"]) == [None]
+
+
+def test_mget_spans_slices_multibyte_text(tmp_path):
+    store = SQLiteDocStore(str(tmp_path / "docstore.sqlite3"))
+    store.mset([
+        ("other", Document(page_content="ünïcode first", metadata={})),
+        ("doc", Document(page_content=TEXT, metadata={})),
+    ])
+    fragments = ["Café", "naïve façade", "日本語", "🚀", "ASCII at the end."]
+
+    texts = store.mget_spans([("doc", *byte_span(TEXT, fragment)) for fragment in fragments])
+
+    assert texts == fragments
+    assert store.mget_spans([("missing", 0, 4)]) == [None]
+
+
+def test_spans_survive_reopening_without_cache(tmp_path):
+    path = str(tmp_path / "docstore.sqlite3")
+    SQLiteDocStore(path).mset([("doc", Document(page_content=TEXT, metadata={}))])
+
+    store = SQLiteDocStore(path, cache_size=0)
+    start, end = byte_span(TEXT, "日本語のテキスト")
+    chunk = Document(
+        page_content="", metadata={"doc_id": "doc", "span_start": start, "span_end": end})
+
+    [materialized] = store.materialize([chunk])
+    assert materialized.page_content == "日本語のテキスト"
+    assert store.mget(["doc"])[0].page_content == TEXT
+
+
+def test_mdelete_and_yield_keys(tmp_path):
+    store = SQLiteDocStore(str(tmp_path / "docstore.sqlite3"))
+    store.mset([(key, Document(page_content=key, metadata={})) for key in ["a", "a:0", "a:1", "b"]])
+
+    assert list(store.yield_keys(prefix="a:")) == ["a:0", "a:1"]
+    store.mdelete(["a", "a:0"])
+    assert list(store.yield_keys()) == ["a:1", "b"]
+    assert store.mget(["a"]) == [None]
+
+
+def test_mset_reuses_identical_text_and_counts_replaced_text(tmp_path):
+    store = SQLiteDocStore(str(tmp_path / "docstore.sqlite3"), cache_size=0)
+    store.mset([("doc", Document(page_content=TEXT, metadata={"v": 1}))])
+    size = os.path.getsize(store.text_path)
+
+    store.mset([("doc", Document(page_content=TEXT, metadata={"v": 2}))])
+    assert os.path.getsize(store.text_path) == size
+    assert store.dead_bytes() == 0
+    assert store.mget(["doc"])[0].metadata == {"v": 2}
+
+    store.mset([("doc", Document(page_content="replaced", metadata={}))])
+    assert store.mget(["doc"])[0].page_content == "replaced"
+    assert store.dead_bytes() == size
+    store.mdelete(["doc"])
+    assert store.dead_bytes() == os.path.getsize(store.text_path)
@@ -0,0 +1,53 @@
+from indexing.embedding_cache import CachedEmbeddings
+
+
+def expected(embeddings, texts):
+    """Vectors of the uncached provider, without counting a call."""
+    return [embeddings.embed_query(text) for text in texts]
+
+
+def test_only_unique_misses_reach_the_provider(tmp_path, hash_embeddings):
+    cache = CachedEmbeddings(hash_embeddings, str(tmp_path), model_name="model-a", batch_size=2)
+
+    texts = ["alpha", "beta", "alpha", "gamma", "delta"]
+    vectors = cache.embed_documents(texts)
+
+    assert vectors == expected(hash_embeddings, texts)
+    # Four unique texts in batches of two
+    assert hash_embeddings.calls == 2
+    assert (cache.hits, cache.misses) == (1, 4)
+
+    calls = hash_embeddings.calls
+    assert cache.embed_documents(["gamma", "alpha", "epsilon"]) == \
+        expected(hash_embeddings, ["gamma", "alpha", "epsilon"])
+    assert hash_embeddings.calls == calls + 1
+    assert (cache.hits, cache.misses) == (3, 5)
+
+
+def test_cache_survives_reopening_and_is_per_model(tmp_path, hash_embeddings):
+    CachedEmbeddings(hash_embeddings, str(tmp_path), model_name="org/model:v1") \
+        .embed_documents(["alpha", "beta"])
+
+    reopened = CachedEmbeddings(hash_embeddings, str(tmp_path), model_name="org/model:v1")
+    calls = hash_embeddings.calls
+    assert reopened.embed_documents(["beta", "alpha"]) == \
+        expected(hash_embeddings, ["beta", "alpha"])
+    assert hash_embeddings.calls == calls
+    assert reopened.dimensions == 16 and reopened.misses == 0
+
+    other_model = CachedEmbeddings(hash_embeddings, str(tmp_path), model_name="other")
+    other_model.embed_documents(["alpha"])
+    assert other_model.misses == 1
+
+
+def test_torn_row_of_a_crashed_writer_is_skipped(tmp_path, hash_embeddings):
+    cache = CachedEmbeddings(hash_embeddings, str(tmp_path), model_name="model-a")
+    cache.embed_documents(["alpha"])
+    with open(cache.vectors_path, "ab") as f:
+        f.write(b"\x00" * 10)
+
+    assert cache.embed_documents(["beta", "alpha"]) == \
+        expected(hash_embeddings, ["beta", "alpha"])
+    reopened = CachedEmbeddings(hash_embeddings, str(tmp_path), model_name="model-a")
+    assert reopened.embed_documents(["beta"]) == expected(hash_embeddings, ["beta"])
+    assert reopened.misses == 0
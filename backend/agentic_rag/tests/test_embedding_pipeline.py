@@ -0,0 +1,114 @@
+import types
+
+import pytest
+from langchain_core.documents import Document
+
+from indexing import embedding_pipeline
+from indexing.embedding_pipeline import EmbeddingPipeline, RateLimitedEmbeddings, RateLimiter
+
+
+class FakeClock:
+    """Replaces the time module of the pipeline: sleeping only advances the clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def perf_counter(self):
+        return self.now
+
+
+class Throttled(Exception):
+    status_code = 429
+
+
+class FlakyEmbeddings:
+    """Provider failing with the given errors before answering."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(embedding_pipeline, "time", clock)
+    monkeypatch.setattr(embedding_pipeline, "random", types.SimpleNamespace(uniform=lambda a, b: b))
+    return clock
+
+
+def test_requests_per_minute_bucket_starts_full_then_refills(clock):
+    limiter = RateLimiter(requests_per_minute=60)
+    for _ in range(60):
+        limiter.acquire()
+    assert clock.sleeps == []
+
+    limiter.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_tokens_per_minute_bucket_and_oversized_requests(clock):
+    limiter = RateLimiter(tokens_per_minute=600)
+    limiter.acquire(600)
+    limiter.acquire(300)
+    assert sum(clock.sleeps) == pytest.approx(30.0)
+
+    # Larger than the whole bucket: waits for the empty bucket to refill instead of forever
+    limiter.acquire(10_000)
+    assert sum(clock.sleeps) == pytest.approx(90.0)
+
+
+def test_pause_holds_back_every_caller(clock):
+    limiter = RateLimiter()
+    limiter.pause(5)
+    limiter.pause(2)
+    limiter.acquire()
+    assert sum(clock.sleeps) == pytest.approx(5.0)
+
+
+def test_throttled_calls_back_off_exponentially(clock):
+    provider = FlakyEmbeddings([Throttled(), Throttled(), Throttled()])
+    embeddings = RateLimitedEmbeddings(provider, RateLimiter(), initial_backoff=1.0)
+
+    assert embeddings.embed_documents(["abc"]) == [[3.0]]
+    assert provider.calls == 4
+    assert embeddings.retries == 3
+    assert clock.sleeps == [pytest.approx(1.0), pytest.approx(2.0), pytest.approx(4.0)]
+
+
+def test_retries_give_up_and_other_errors_are_not_retried(clock):
+    embeddings = RateLimitedEmbeddings(
+        FlakyEmbeddings([Throttled()] * 3), RateLimiter(), max_retries=2)
+    with pytest.raises(Throttled):
+        embeddings.embed_documents(["abc"])
+    assert embeddings.retries == 2
+
+    provider = FlakyEmbeddings([ValueError("bad input")])
+    embeddings = RateLimitedEmbeddings(provider, RateLimiter())
+    with pytest.raises(ValueError):
+        embeddings.embed_documents(["abc"])
+    assert provider.calls == 1 and clock.sleeps == [pytest.approx(1.0), pytest.approx(2.0)]
+
+
+def test_batches_are_bounded_by_count_and_tokens():
+    pipeline = EmbeddingPipeline(None, None, batch_size=3, batch_tokens=30)
+    items = [(str(i), Document(page_content="x" * 40)) for i in range(7)]
+
+    # 11 estimated tokens per chunk: two fit under 30 tokens
+    assert [len(batch) for batch in pipeline._batches(items)] == [2, 2, 2, 1]
+    pipeline.batch_tokens = 1000
+    assert [len(batch) for batch in pipeline._batches(items)] == [3, 3, 1]
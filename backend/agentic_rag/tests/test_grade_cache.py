@@ -0,0 +1,51 @@
+import pytest
+
+from indexing import grade_cache
+from indexing.grade_cache import GradeCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return GradeCache(str(tmp_path / "grades.sqlite3"))
+
+
+def test_grades_are_keyed_by_grader_and_normalized_question(cache):
+    cache.set_many("grader-1", "What is agent memory?", {"doc": "yes", "other": "no"})
+
+    assert cache.get_many("grader-1", "what is agent  memory", ["doc", "other", "new"]) == {
+        "doc": "yes", "other": "no"}
+    assert cache.get_many("grader-2", "What is agent memory?", ["doc"]) == {}
+    assert cache.get_many("grader-1", "What is task decomposition?", ["doc"]) == {}
+    assert cache.stats()["hits"] == 2
+
+
+def test_invalidate_drops_segments_of_a_document(cache):
+    cache.set_many("grader", "question", {
+        "doc": "yes", "doc:0": "yes", "doc:1": "no", "docs": "yes", "other:0": "no"})
+
+    cache.invalidate(["doc"])
+
+    assert cache.get_many("grader", "question", ["doc", "doc:0", "doc:1", "docs", "other:0"]) == {
+        "docs": "yes", "other:0": "no"}
+    # A segment ID invalidates the whole document it belongs to
+    cache.invalidate(["other:3"])
+    assert cache.get_many("grader", "question", ["other:0"]) == {}
+    assert len(cache) == 1
+
+
+def test_least_recently_used_grades_are_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(grade_cache.time, "time", lambda: now[0])
+    monkeypatch.setattr(GradeCache, "PRUNE_INTERVAL", 1)
+    cache = GradeCache(str(tmp_path / "grades.sqlite3"), max_entries=2)
+
+    cache.set_many("grader", "question", {"a": "yes"})
+    now[0] += 1
+    cache.set_many("grader", "question", {"b": "yes"})
+    now[0] += 1
+    cache.get_many("grader", "question", ["a"])
+    now[0] += 1
+    cache.set_many("grader", "question", {"c": "no"})
+
+    assert len(cache) == 2
+    assert cache.get_many("grader", "question", ["a", "b", "c"]) == {"a": "yes", "c": "no"}
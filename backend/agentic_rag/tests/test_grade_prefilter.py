@@ -0,0 +1,95 @@
+import pytest
+from langchain_core.documents import Document
+
+from graph import grading
+from graph.grade_prefilter import GradeLog, read_grade_log, similarity_verdict
+from graph.grading import grade_retrieved_documents
+from indexing.grade_cache import GradeCache
+from settings import rag_settings
+
+
+class LLMGrader:
+    """Grader stub answering 'yes' for documents whose text contains 'memory'."""
+
+    def __init__(self):
+        self.graded = []
+
+    def __call__(self, question, documents):
+        self.graded.extend(doc.metadata["doc_id"] for doc in documents)
+        return ["YES" if "memory" in doc.page_content else "no" for doc in documents]
+
+
+@pytest.fixture
+def thresholds(monkeypatch):
+    monkeypatch.setattr(rag_settings, "GRADE_ACCEPT_SIMILARITY", 0.8)
+    monkeypatch.setattr(rag_settings, "GRADE_REJECT_SIMILARITY", 0.3)
+    monkeypatch.setattr(rag_settings, "GRADE_AUDIT_RATE", 0.5)
+
+
+def document(doc_id, similarity, text="agent memory"):
+    return Document(page_content=text, metadata={"doc_id": doc_id, "similarity": similarity})
+
+
+def test_similarity_verdict_thresholds():
+    assert similarity_verdict(0.9, accept=0.8, reject=0.3) == "yes"
+    assert similarity_verdict(0.8, accept=0.8, reject=0.3) == "yes"
+    assert similarity_verdict(0.29, accept=0.8, reject=0.3) == "no"
+    assert similarity_verdict(0.5, accept=0.8, reject=0.3) is None
+    assert similarity_verdict(None, accept=0.8, reject=0.3) is None
+    assert similarity_verdict(0.99) is None
+
+
+def test_clear_cut_documents_skip_the_llm(thresholds, monkeypatch):
+    monkeypatch.setattr(grading.random, "random", lambda: 0.9)
+    grader = LLMGrader()
+    documents = [document("high", 0.9, "unrelated"), document("low", 0.1), document("band", 0.5)]
+
+    result = grade_retrieved_documents("question", documents, grader, "grader")
+
+    # The similarity verdict wins over what the LLM would have said
+    assert grader.graded == ["band"]
+    assert result["documents"] == [documents[0], documents[2]]
+    assert result["use_web_search"] is True
+
+
+def test_audited_documents_reach_the_llm_and_are_logged(thresholds, monkeypatch, tmp_path):
+    monkeypatch.setattr(grading.random, "random", lambda: 0.1)
+    grader = LLMGrader()
+    log = GradeLog(str(tmp_path / "grades.jsonl"))
+    documents = [document("high", 0.9, "unrelated"), document("band", 0.5)]
+
+    result = grade_retrieved_documents("question", documents, grader, "grader", grade_log=log)
+
+    assert grader.graded == ["high", "band"]
+    assert result["documents"] == [documents[1]]
+    records = [
+        {key: record[key] for key in ("grader", "doc_id", "grade", "prefilter", "weight")}
+        for record in read_grade_log(log.path)]
+    assert records == [
+        {"grader": "grader", "doc_id": "high", "grade": "no", "prefilter": "yes", "weight": 2.0},
+        {"grader": "grader", "doc_id": "band", "grade": "yes", "prefilter": None, "weight": 1},
+    ]
+
+
+def test_cached_grades_skip_the_llm(thresholds, tmp_path):
+    cache = GradeCache(str(tmp_path / "grades.sqlite3"))
+    cache.set_many("grader", "question", {"cached": "no"})
+    grader = LLMGrader()
+    # Web results have no docstore key
+    documents = [document("cached", 0.5), document("new", 0.5), document(None, None)]
+
+    result = grade_retrieved_documents(
+        "question", documents, grader, "grader", grade_cache=cache)
+
+    assert grader.graded == ["new", None]
+    assert result["documents"] == documents[1:]
+    # New grades are cached; documents without a docstore key are not
+    assert cache.get_many("grader", "question", ["cached", "new"]) == {"cached": "no", "new": "yes"}
+    assert len(cache) == 2
+
+    grader.graded.clear()
+    grade_retrieved_documents("question", documents[:2], grader, "grader", grade_cache=cache)
+    assert grader.graded == []
+    # Another grader does not reuse the grades
+    grade_retrieved_documents("question", documents[:2], grader, "other", grade_cache=cache)
+    assert grader.graded == ["cached", "new"]
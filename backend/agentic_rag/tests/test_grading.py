@@ -0,0 +1,252 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+from graph.grading import (
+    agrade_generation_in_parallel,
+    agrade_generation_sequentially,
+    format_documents,
+    generation_grading_mode,
+    grade_generation_in_parallel,
+    grade_generation_sequentially,
+    grade_in_batch,
+    grade_individually,
+    grade_retrieved_documents,
+    grade_with_fallback,
+)
+from settings import rag_settings
+
+
+class SlowGrader:
+    """Grader stub that sleeps per call and records how many calls overlap."""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def grade(self, inputs):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+        relevant = inputs["document"].endswith(("0", "2", "4"))
+        return SimpleNamespace(binary_score="yes" if relevant else "no")
+
+    def runnable(self):
+        return RunnableLambda(self.grade)
+
+
+def make_documents(count):
+    return [Document(page_content=f"document {i}") for i in range(count)]
+
+
+def test_grades_run_concurrently_and_keep_retrieval_order():
+    grader = SlowGrader()
+
+    grades = grade_individually(grader.runnable(), "question", make_documents(6), max_concurrency=3)
+
+    assert grades == ["yes", "no", "yes", "no", "yes", "no"]
+    assert grader.peak == 3
+
+
+def test_max_concurrency_one_grades_sequentially():
+    grader = SlowGrader(latency=0.01)
+
+    grade_individually(grader.runnable(), "question", make_documents(4), max_concurrency=1)
+
+    assert grader.peak == 1
+
+
+def test_pipeline_keeps_relevant_documents_and_flags_web_search():
+    grader = SlowGrader(latency=0)
+    documents = make_documents(4)
+
+    result = grade_retrieved_documents(
+        "question",
+        documents,
+        lambda question, docs: grade_individually(grader.runnable(), question, docs, 4),
+        grader_key="grader",
+    )
+
+    assert result["documents"] == [documents[0], documents[2]]
+    assert result["use_web_search"] is True
+    assert result["question"] == "question"
+
+
+class BatchGrader:
+    """Batch grader stub returning a fixed structured-output result."""
+
+    def __init__(self, grades=None, parsing_error=None):
+        self.grades = grades
+        self.parsing_error = parsing_error
+        self.calls = []
+
+    def grade(self, inputs):
+        self.calls.append(inputs)
+        parsed = None
+        if self.grades is not None:
+            parsed = SimpleNamespace(grades=[
+                SimpleNamespace(index=index, binary_score=score)
+                for index, score in self.grades])
+        return {"raw": None, "parsed": parsed, "parsing_error": self.parsing_error}
+
+    def runnable(self):
+        return RunnableLambda(self.grade)
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def test_batch_grades_are_returned_in_document_order():
+    grader = BatchGrader(grades=[(2, "YES"), (0, "no"), (1, "yes")])
+    documents = make_documents(3)
+
+    grades = grade_in_batch(grader.runnable(), count_words, "question", documents, 100)
+
+    assert grades == ["no", "yes", "yes"]
+    assert grader.calls == [{"question": "question", "documents": format_documents(documents)}]
+
+
+def test_batch_over_token_budget_is_not_sent():
+    grader = BatchGrader(grades=[(0, "yes"), (1, "yes"), (2, "yes")])
+
+    assert grade_in_batch(grader.runnable(), count_words, "question", make_documents(3), 5) is None
+    assert grader.calls == []
+
+
+def test_unparsed_batch_is_rejected():
+    grader = BatchGrader(parsing_error=ValueError("invalid JSON"))
+
+    assert grade_in_batch(grader.runnable(), count_words, "question", make_documents(2), 100) is None
+
+
+def test_incomplete_batch_is_rejected():
+    missing = BatchGrader(grades=[(0, "yes"), (2, "no")])
+    unknown = BatchGrader(grades=[(0, "yes"), (1, "no"), (3, "yes")])
+
+    assert grade_in_batch(missing.runnable(), count_words, "question", make_documents(3), 100) is None
+    assert grade_in_batch(unknown.runnable(), count_words, "question", make_documents(3), 100) is None
+
+
+def test_unusable_batch_falls_back_to_per_document_grading():
+    documents = make_documents(2)
+    graded_each = []
+
+    def grade_each(question, docs):
+        graded_each.append(docs)
+        return ["yes", "no"]
+
+    assert grade_with_fallback("question", documents, lambda q, d: None, grade_each) == ["yes", "no"]
+    assert graded_each == [documents]
+    # A usable batch grades every document in one call
+    assert grade_with_fallback(
+        "question", documents, lambda q, d: ["no", "no"], grade_each) == ["no", "no"]
+    assert len(graded_each) == 1
+
+
+def test_without_batch_grader_documents_are_graded_one_by_one():
+    assert grade_with_fallback(
+        "question", make_documents(1), None, lambda q, d: ["yes"]) == ["yes"]
+
+
+class Grader:
+    """Grader stub with sync and async calls that sleep, then answer a fixed score."""
+
+    def __init__(self, score, latency=0.0):
+        self.score = score
+        self.latency = latency
+        self.calls = 0
+        self.finished = 0
+        self.cancelled = False
+
+    def grade(self, inputs):
+        self.calls += 1
+        time.sleep(self.latency)
+        self.finished += 1
+        return SimpleNamespace(binary_score=self.score)
+
+    async def agrade(self, inputs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        self.finished += 1
+        return SimpleNamespace(binary_score=self.score)
+
+    def runnable(self):
+        return RunnableLambda(self.grade, afunc=self.agrade)
+
+
+@pytest.mark.parametrize("grade", [grade_generation_sequentially, grade_generation_in_parallel])
+@pytest.mark.parametrize("grounded, answers, verdict", [
+    ("yes", "yes", "useful"),
+    ("yes", "no", "not_useful"),
+    ("no", "yes", "not_supported"),
+])
+def test_generation_verdicts(grade, grounded, answers, verdict):
+    assert grade(Grader(grounded).runnable(), Grader(answers).runnable(),
+                 "question", [], "generation") == verdict
+
+
+@pytest.mark.parametrize("grade", [agrade_generation_sequentially, agrade_generation_in_parallel])
+@pytest.mark.parametrize("grounded, answers, verdict", [
+    ("yes", "yes", "useful"),
+    ("yes", "no", "not_useful"),
+    ("no", "yes", "not_supported"),
+])
+def test_async_generation_verdicts(grade, grounded, answers, verdict):
+    assert asyncio.run(grade(Grader(grounded).runnable(), Grader(answers).runnable(),
+                             "question", [], "generation")) == verdict
+
+
+def test_sequential_grading_skips_the_answer_check_on_hallucination():
+    answer_grader = Grader("yes")
+
+    grade_generation_sequentially(
+        Grader("no").runnable(), answer_grader.runnable(), "question", [], "generation")
+
+    assert answer_grader.calls == 0
+
+
+def test_parallel_grading_cancels_the_answer_check_on_hallucination():
+    answer_grader = Grader("yes", latency=5)
+
+    start = time.perf_counter()
+    verdict = asyncio.run(agrade_generation_in_parallel(
+        Grader("no", latency=0.01).runnable(), answer_grader.runnable(),
+        "question", [], "generation"))
+
+    assert verdict == "not_supported"
+    assert time.perf_counter() - start < 1
+    assert answer_grader.cancelled and answer_grader.finished == 0
+
+
+def test_parallel_grading_runs_both_graders_at_once():
+    start = time.perf_counter()
+    verdict = asyncio.run(agrade_generation_in_parallel(
+        Grader("yes", latency=0.2).runnable(), Grader("yes", latency=0.2).runnable(),
+        "question", [], "generation"))
+
+    assert verdict == "useful"
+    assert time.perf_counter() - start < 0.35
+
+
+def test_generation_grading_mode_can_be_set_per_request(monkeypatch):
+    monkeypatch.setattr(rag_settings, "GENERATION_GRADING_MODE", "sequential")
+
+    assert generation_grading_mode(None) == "sequential"
+    assert generation_grading_mode({"configurable": {}}) == "sequential"
+    assert generation_grading_mode(
+        {"configurable": {"generation_grading_mode": "parallel"}}) == "parallel"
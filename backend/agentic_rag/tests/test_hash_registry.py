@@ -0,0 +1,45 @@
+import hashlib
+
+from indexing.hash_registry import ContentHashRegistry
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def test_registered_hashes_are_found(tmp_path):
+    registry = ContentHashRegistry(str(tmp_path / "hashes.sqlite3"))
+    registry.add_many([content_hash("a"), content_hash("b")])
+
+    assert content_hash("a") in registry
+    assert content_hash("c") not in registry
+    assert len(registry) == 2
+
+
+def test_hashes_are_shared_and_discarded(tmp_path):
+    path = str(tmp_path / "hashes.sqlite3")
+    first = ContentHashRegistry(path)
+    second = ContentHashRegistry(path)
+    assert content_hash("a") not in second
+
+    # Picked up by a registry whose Bloom filter is already loaded
+    first.add_many([content_hash("a")])
+    assert content_hash("a") in second
+
+    second.discard_many([content_hash("a")])
+    assert content_hash("a") not in first
+    assert len(first) == 0
+
+
+def test_missing_registry_is_rebuilt_once(tmp_path):
+    path = str(tmp_path / "hashes.sqlite3")
+    calls = []
+
+    def indexed_hashes():
+        calls.append(1)
+        return [content_hash("a"), content_hash("b")]
+
+    registry = ContentHashRegistry(path, rebuild_from=indexed_hashes)
+    assert content_hash("b") in registry
+    assert len(ContentHashRegistry(path, rebuild_from=indexed_hashes)) == 2
+    assert len(calls) == 1
@@ -0,0 +1,60 @@
+from langchain_core.documents import Document
+
+from indexing.hybrid_retriever import reciprocal_rank_fusion
+from indexing.keyword_index import KeywordIndex, keyword_query
+
+
+def chunk(doc_id: str, text: str) -> Document:
+    return Document(page_content=text, metadata={"doc_id": doc_id})
+
+
+def test_keyword_query_drops_stopwords_and_keeps_identifiers():
+    assert keyword_query("What is the ERR_CONN_RESET error in http.client?") == (
+        '"ERR_CONN_RESET" OR "error" OR "http.client"')
+    assert keyword_query("what is it?") == ""
+
+
+def test_search_ranks_matching_chunks(tmp_path):
+    index = KeywordIndex(str(tmp_path / "keywords.sqlite3"))
+    index.add([
+        ("c1", chunk("d1", "Agents store long-term memory in a vector database.")),
+        ("c2", chunk("d2", "Task decomposition splits a goal into steps.")),
+        ("c3", chunk("d2", "Memory and planning are agent components; memory matters.")),
+    ])
+
+    hits = index.search("agent memory", k=5)
+    assert {chunk_id for chunk_id, _, _ in hits} == {"c1", "c3"}
+    assert [score for _, _, score in hits] == sorted((score for _, _, score in hits), reverse=True)
+    assert index.search("the of and") == []
+
+
+def test_chunks_are_replaced_and_deleted_by_parent(tmp_path):
+    index = KeywordIndex(str(tmp_path / "keywords.sqlite3"))
+    index.add([("c1", chunk("d1", "old text about planning")), ("c2", chunk("d2", "planning"))])
+    index.add([("c1", chunk("d1", "new text about reflection"))])
+
+    assert [hit[0] for hit in index.search("planning")] == ["c2"]
+    assert [hit[:2] for hit in index.search("reflection")] == [("c1", "d1")]
+    index.delete_documents(["d1"])
+    assert index.search("reflection") == []
+    assert len(index) == 1
+
+
+def test_empty_index_is_built_from_the_vectorstore_once(tmp_path):
+    path = str(tmp_path / "keywords.sqlite3")
+    calls = []
+
+    def indexed_chunks():
+        calls.append(1)
+        return [("c1", chunk("d1", "self-reflection improves agents"))]
+
+    assert [hit[0] for hit in KeywordIndex(path, indexed_chunks).search("reflection")] == ["c1"]
+    assert len(KeywordIndex(path, indexed_chunks)) == 1
+    assert len(calls) == 1
+
+
+def test_reciprocal_rank_fusion():
+    # b is second in both rankings and beats a, which only one ranking has first
+    assert reciprocal_rank_fusion([["a", "b", "c"], ["d", "b"]], [1.0, 1.0], k=1) == [
+        "b", "a", "d", "c"]
+    assert reciprocal_rank_fusion([["a", "b"], ["b", "c"]], [1.0, 0.0]) == ["a", "b"]
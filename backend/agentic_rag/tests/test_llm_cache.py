@@ -0,0 +1,101 @@
+import os
+
+import pytest
+from langchain_core.outputs import Generation
+
+from graph import llm_cache
+from graph.llm_cache import BoundedSQLiteCache, get_llm_cache, llm_cache_stats
+from settings import rag_settings
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    return now
+
+
+def response(text):
+    return [Generation(text=text)]
+
+
+def test_file_is_created_on_first_use(tmp_path):
+    path = tmp_path / "cache" / "llm.sqlite3"
+    cache = BoundedSQLiteCache(str(path), max_entries=10)
+    assert not path.parent.exists()
+
+    assert cache.lookup("prompt", "llm") is None
+    assert path.exists()
+
+
+def test_responses_are_keyed_by_prompt_and_llm(tmp_path):
+    cache = BoundedSQLiteCache(str(tmp_path / "llm.sqlite3"), max_entries=10)
+    cache.update("prompt", "llm-a", response("yes"))
+
+    assert cache.lookup("prompt", "llm-a") == response("yes")
+    assert cache.lookup("prompt", "llm-b") is None
+    assert cache.lookup("other prompt", "llm-a") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 1 / 3}
+    # Shared by every instance on the same file
+    assert BoundedSQLiteCache(cache.path, max_entries=10).lookup("prompt", "llm-a") == response("yes")
+
+
+def test_least_recently_used_responses_are_pruned(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(BoundedSQLiteCache, "PRUNE_INTERVAL", 1)
+    cache = BoundedSQLiteCache(str(tmp_path / "llm.sqlite3"), max_entries=2)
+    cache.update("a", "llm", response("a"))
+    clock[0] += 1
+    cache.update("b", "llm", response("b"))
+    clock[0] += 1
+    assert cache.lookup("a", "llm") == response("a")
+    clock[0] += 1
+
+    cache.update("c", "llm", response("c"))
+
+    assert cache.lookup("b", "llm") is None
+    assert cache.lookup("a", "llm") == response("a")
+    assert cache.lookup("c", "llm") == response("c")
+
+
+def test_pruning_runs_every_prune_interval_updates(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(BoundedSQLiteCache, "PRUNE_INTERVAL", 3)
+    cache = BoundedSQLiteCache(str(tmp_path / "llm.sqlite3"), max_entries=1)
+    for key in ("a", "b"):
+        cache.update(key, "llm", response(key))
+        clock[0] += 1
+    assert cache.lookup("a", "llm") is not None
+
+    cache.update("c", "llm", response("c"))
+
+    assert [cache.lookup(key, "llm") is not None for key in ("a", "b", "c")] == [False, False, True]
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "_chain_caches", {})
+    monkeypatch.setattr(rag_settings, "LLM_CACHE_PATH", str(tmp_path / "llm.sqlite3"))
+    monkeypatch.setattr(rag_settings, "LLM_CACHE_CHAINS", "question_router, answer_grader")
+    return rag_settings
+
+
+def test_cache_is_enabled_per_chain(settings, tmp_path):
+    router_cache = get_llm_cache("question_router")
+
+    assert router_cache is not None and router_cache.name == "question_router"
+    assert get_llm_cache("question_router") is router_cache
+    assert get_llm_cache("answer_grader") is not router_cache
+    assert get_llm_cache("generation") is None
+    assert set(llm_cache_stats()) == {"question_router", "answer_grader"}
+    # Nothing is written until a chain uses its cache
+    assert os.listdir(tmp_path) == []
+
+
+def test_empty_path_disables_the_cache(settings, monkeypatch):
+    monkeypatch.setattr(rag_settings, "LLM_CACHE_PATH", "")
+
+    assert get_llm_cache("question_router") is None
+
+
+def test_default_path_is_under_the_index_directory():
+    if os.getenv("LLM_CACHE_PATH") is None:
+        assert os.path.dirname(rag_settings.LLM_CACHE_PATH) == os.getenv("CHROMA_DB_DIR", "chroma_db")
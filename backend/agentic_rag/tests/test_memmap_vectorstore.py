@@ -0,0 +1,163 @@
+from typing import List
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from indexing import memmap_vectorstore
+from indexing.memmap_vectorstore import MemmapVectorStore
+
+DIMENSIONS = 16
+
+
+class UnusedEmbeddings(Embeddings):
+    """Embedding function for stores that are only given vectors."""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        raise AssertionError("Tests pass vectors directly")
+
+    def embed_query(self, text: str) -> List[float]:
+        raise AssertionError("Tests pass vectors directly")
+
+
+def random_vectors(count: int, seed: int) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, DIMENSIONS)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def open_store(path, **kwargs) -> MemmapVectorStore:
+    return MemmapVectorStore(str(path), UnusedEmbeddings(), **kwargs)
+
+
+def add(store: MemmapVectorStore, ids: List[str], vectors: np.ndarray, **metadata) -> None:
+    store.upsert(
+        ids, vectors.tolist(),
+        metadatas=[{"doc_id": id_, **metadata} for id_ in ids],
+        documents=[f"text of {id_}" for id_ in ids])
+
+
+def nearest(store: MemmapVectorStore, vector: np.ndarray, k: int = 1, where=None) -> List[str]:
+    return store.query([vector.tolist()], n_results=k, where=where)["ids"][0]
+
+
+def test_upsert_and_query(tmp_path):
+    store = open_store(tmp_path)
+    vectors = random_vectors(50, seed=0)
+    add(store, [f"v{i}" for i in range(50)], vectors)
+
+    assert store.count() == 50
+    result = store.query([vectors[7].tolist()], n_results=3)
+    assert result["ids"][0][0] == "v7"
+    assert result["documents"][0][0] == "text of v7"
+    assert result["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+    assert len(result["ids"][0]) == 3
+
+
+def test_upsert_replaces_vector_of_same_id(tmp_path):
+    store = open_store(tmp_path)
+    old, new = random_vectors(2, seed=1)
+    add(store, ["a"], old[None])
+    add(store, ["a"], new[None], version=2)
+
+    assert store.count() == 1
+    assert store.get(ids=["a"])["metadatas"] == [{"doc_id": "a", "version": 2}]
+    # The replaced row is dead: only the new vector answers
+    hits = store.query([old.tolist()], n_results=5)
+    assert hits["ids"] == [["a"]]
+    assert hits["distances"][0][0] == pytest.approx(1.0 - float(old @ new), abs=1e-5)
+
+
+def test_delete(tmp_path):
+    store = open_store(tmp_path)
+    vectors = random_vectors(10, seed=2)
+    add(store, [f"v{i}" for i in range(10)], vectors)
+
+    store.delete(["v3", "v4"])
+
+    assert store.count() == 8
+    assert store.get(ids=["v3", "v4"])["ids"] == []
+    assert "v3" not in nearest(store, vectors[3], k=10)
+
+
+def test_where_filter(tmp_path):
+    store = open_store(tmp_path)
+    vectors = random_vectors(20, seed=3)
+    add(store, [f"a{i}" for i in range(10)], vectors[:10], source_id="a")
+    add(store, [f"b{i}" for i in range(10)], vectors[10:], source_id="b")
+
+    assert store.get(where={"source_id": "b"})["ids"] == [f"b{i}" for i in range(10)]
+    assert store.get(where={"source_id": {"$in": ["a"]}}, limit=2)["ids"] == ["a0", "a1"]
+    # The nearest vector overall is a0, but the filter only lets b rows through
+    hits = nearest(store, vectors[0], k=3, where={"source_id": "b"})
+    assert len(hits) == 3 and all(id_.startswith("b") for id_ in hits)
+
+
+def test_reopened_store_sees_rows(tmp_path):
+    vectors = random_vectors(5, seed=4)
+    add(open_store(tmp_path), [f"v{i}" for i in range(5)], vectors)
+
+    store = open_store(tmp_path)
+    assert store.count() == 5
+    assert nearest(store, vectors[2]) == ["v2"]
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8", "binary"])
+def test_dead_rows_do_not_crowd_out_results(tmp_path, quantization):
+    store = open_store(tmp_path, quantization=quantization)
+    ids = [f"v{i}" for i in range(200)]
+    add(store, ids, random_vectors(200, seed=5))
+    # Replace most rows with new vectors: the files now hold 180 dead rows
+    replaced = random_vectors(180, seed=6)
+    add(store, ids[:180], replaced)
+
+    assert store.count() == 200
+    hits = nearest(store, replaced[0], k=10)
+    assert len(hits) == 10 and len(set(hits)) == 10
+    assert hits[0] == "v0"
+
+
+@pytest.mark.skipif(memmap_vectorstore.hnswlib is None, reason="hnswlib is not installed")
+def test_hnsw_search_skips_dead_rows(tmp_path):
+    store = open_store(tmp_path, brute_force_limit=50)
+    ids = [f"v{i}" for i in range(300)]
+    add(store, ids, random_vectors(300, seed=7))
+    assert nearest(store, random_vectors(1, seed=8)[0], k=5)
+    assert store._hnsw is not None
+
+    # Rows replaced after the graph was built leave dead nodes behind
+    replaced = random_vectors(100, seed=9)
+    add(store, ids[:100], replaced)
+
+    for i in (0, 50, 99):
+        hits = nearest(store, replaced[i], k=5)
+        assert len(hits) == 5 and len(set(hits)) == 5
+        assert hits[0] == ids[i]
+    store.delete(ids[:100])
+    hits = nearest(store, replaced[0], k=20)
+    assert len(hits) == 20 and not set(hits) & set(ids[:100])
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8", "binary"])
+def test_mmr_prefers_diverse_results(tmp_path, quantization):
+    store = open_store(tmp_path, quantization=quantization)
+    query = np.zeros(DIMENSIONS, dtype=np.float32)
+    query[0] = 1.0
+    near = query.copy()
+    near[1] = 0.1
+    duplicate = near.copy()
+    duplicate[2] = 0.01
+    other = query.copy()
+    other[3] = 0.5
+    vectors = np.stack([near, duplicate, other])
+    add(store, ["near", "duplicate", "other"], vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
+
+    relevant = store.max_marginal_relevance_search_by_vector(
+        query.tolist(), k=2, fetch_k=3, lambda_mult=1.0)
+    diverse = store.max_marginal_relevance_search_by_vector(
+        query.tolist(), k=2, fetch_k=3, lambda_mult=0.5)
+
+    assert [doc.metadata["doc_id"] for doc in relevant] == ["near", "duplicate"]
+    assert [doc.metadata["doc_id"] for doc in diverse] == ["near", "other"]
+    assert diverse[0].page_content == "text of near"
+    assert store.max_marginal_relevance_search_by_vector(
+        query.tolist(), k=2, filter={"doc_id": "other"})[0].metadata["doc_id"] == "other"
@@ -0,0 +1,60 @@
+import os
+
+from indexing.memmap_vectorstore import MemmapVectorStore
+from indexing.migration import MigrationCheckpoint, sample_recall
+
+
+def test_checkpoint_resumes_after_reopening(tmp_path):
+    path = str(tmp_path / "migration.sqlite3")
+    checkpoint = MigrationCheckpoint(path)
+    assert checkpoint.state() is None
+
+    checkpoint.start("v1", "v2", "text-embedding-3-small")
+    checkpoint.mark_done(["a", "b"])
+    checkpoint.mark_done(["b", "c"])
+    checkpoint.close()
+
+    resumed = MigrationCheckpoint(path)
+    assert resumed.state() == {
+        "source_version": "v1", "target_version": "v2",
+        "embedding_model": "text-embedding-3-small"}
+    assert resumed.done_ids() == {"a", "b", "c"}
+    assert len(resumed) == 3
+
+
+def test_new_migration_forgets_progress_and_finished_one_is_removed(tmp_path):
+    path = str(tmp_path / "migration.sqlite3")
+    checkpoint = MigrationCheckpoint(path)
+    checkpoint.start("v1", "v2", "model-a")
+    checkpoint.mark_done(["a"])
+
+    checkpoint.start("v1", "v3", "model-b")
+    assert checkpoint.done_ids() == set()
+    assert checkpoint.state()["target_version"] == "v3"
+
+    checkpoint.close(remove=True)
+    assert not os.path.exists(path)
+
+
+def test_sample_recall_of_identical_collections(tmp_path, hash_embeddings):
+    texts = [f"chunk number {i}" for i in range(30)]
+    stores = []
+    for name in ("source", "target"):
+        store = MemmapVectorStore(str(tmp_path / name), hash_embeddings)
+        store.add_texts(texts, ids=[f"c{i}" for i in range(30)])
+        stores.append(store)
+
+    report = sample_recall(stores[0], stores[1], texts[:5], [f"c{i}" for i in range(5)], k=3)
+
+    assert report["queries"] == 5
+    assert report["recall_at_k"] == 1.0
+    assert report["source_self_hit_rate"] == report["target_self_hit_rate"] == 1.0
+
+
+def test_importing_the_migration_does_not_open_the_index(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import ingestion
+    import migrate_embeddings  # noqa: F401
+
+    assert ingestion._retriever is None
+    assert os.listdir(tmp_path) == []
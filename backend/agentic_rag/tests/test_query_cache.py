@@ -0,0 +1,72 @@
+import pytest
+
+from indexing import query_cache
+from indexing.query_cache import QueryEmbeddingCache
+
+VECTOR_BYTES = 4 * 4 + 32
+
+
+class Clock:
+    """Stand-in for time.time that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(query_cache.time, "time", clock)
+    return clock
+
+
+def test_hits_normalized_questions(clock):
+    cache = QueryEmbeddingCache(max_bytes=10 * VECTOR_BYTES, ttl_seconds=60)
+    cache.put("model", "What is agent memory?", [1.0, 2.0, 3.0, 4.0])
+
+    assert cache.get("model", "  what is AGENT memory ") == [1.0, 2.0, 3.0, 4.0]
+    assert cache.get("other-model", "What is agent memory?") is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_expires_entries(clock):
+    cache = QueryEmbeddingCache(max_bytes=10 * VECTOR_BYTES, ttl_seconds=60)
+    cache.put("model", "question", [1.0, 0.0, 0.0, 0.0])
+
+    clock.now += 59
+    assert cache.get("model", "question") is not None
+    clock.now += 2
+    assert cache.get("model", "question") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_evicts_least_recently_used(clock):
+    cache = QueryEmbeddingCache(max_bytes=2 * VECTOR_BYTES, ttl_seconds=60)
+    cache.put("model", "a", [1.0] * 4)
+    cache.put("model", "b", [2.0] * 4)
+    cache.get("model", "a")
+    cache.put("model", "c", [3.0] * 4)
+
+    assert cache.get("model", "b") is None
+    assert cache.get("model", "a") == [1.0] * 4
+    assert cache.get("model", "c") == [3.0] * 4
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= stats["max_bytes"]
+
+
+def test_file_is_shared_and_expires(clock, tmp_path):
+    path = str(tmp_path / "queries.sqlite3")
+    writer = QueryEmbeddingCache(max_bytes=10 * VECTOR_BYTES, ttl_seconds=60, path=path)
+    reader = QueryEmbeddingCache(max_bytes=10 * VECTOR_BYTES, ttl_seconds=60, path=path)
+    writer.put("model", "question", [0.5] * 4)
+
+    assert reader.get("model", "question") == [0.5] * 4
+    assert reader.stats()["file_hits"] == 1
+    clock.now += 61
+    other = QueryEmbeddingCache(max_bytes=10 * VECTOR_BYTES, ttl_seconds=60, path=path)
+    assert other.get("model", "question") is None
@@ -0,0 +1,138 @@
+import os
+
+import pytest
+
+import ingestion
+from indexing.versions import write_index_info
+from settings import rag_settings
+
+
+@pytest.fixture
+def documents_dir(tmp_path):
+    path = tmp_path / "documents"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def retriever(tmp_path, hash_embeddings):
+    persist_directory = tmp_path / "index"
+    persist_directory.mkdir()
+    write_index_info(str(persist_directory), {
+        "embedding_model": "hash", "vectorstore_backend": "memmap"})
+    return ingestion.build_retriever(str(persist_directory), embeddings=hash_embeddings)
+
+
+def write(directory, name, text):
+    path = directory / name
+    path.write_text(text, encoding="utf-8")
+    # Bump the mtime so a rewrite within the clock resolution still counts as a change
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    return path
+
+
+def chunk_ids(retriever):
+    return set(retriever.vectorstore.get(include=[])["ids"])
+
+
+def parent_ids(retriever):
+    return set(retriever.docstore.yield_keys())
+
+
+def sync(documents_dir, retriever):
+    return ingestion.sync_documents(str(documents_dir), retriever)
+
+
+def test_sync_adds_changes_and_deletes_files(documents_dir, retriever):
+    write(documents_dir, "a.txt", "Agents plan tasks step by step.")
+    write(documents_dir, "b.txt", "Memory stores past observations.")
+
+    report = sync(documents_dir, retriever)
+    assert report["added"] == ["a.txt", "b.txt"]
+    assert len(parent_ids(retriever)) == 2
+    first_chunks = chunk_ids(retriever)
+
+    report = sync(documents_dir, retriever)
+    assert (report["added"], report["changed"], report["deleted"]) == ([], [], [])
+    assert report["unchanged"] == 2
+
+    write(documents_dir, "a.txt", "Agents decompose tasks into subgoals.")
+    report = sync(documents_dir, retriever)
+    assert report["changed"] == ["a.txt"]
+    assert len(parent_ids(retriever)) == 2
+    # The old version of a.txt is gone, b.txt is untouched
+    assert len(first_chunks & chunk_ids(retriever)) == len(first_chunks) - 1
+    assert [doc.page_content for doc in retriever.docstore.mget(sorted(parent_ids(retriever)))
+            ].count("Agents decompose tasks into subgoals.") == 1
+
+    os.remove(documents_dir / "b.txt")
+    report = sync(documents_dir, retriever)
+    assert report["deleted"] == ["b.txt"]
+    assert [doc.page_content for doc in retriever.docstore.mget(list(parent_ids(retriever)))] == [
+        "Agents decompose tasks into subgoals."]
+    assert len(chunk_ids(retriever)) == 1
+
+
+def test_touched_file_is_not_reindexed(documents_dir, retriever, hash_embeddings):
+    path = write(documents_dir, "a.txt", "Agents plan tasks step by step.")
+    sync(documents_dir, retriever)
+    calls = hash_embeddings.calls
+
+    write(documents_dir, "a.txt", path.read_text(encoding="utf-8"))
+    report = sync(documents_dir, retriever)
+
+    assert report["unchanged"] == 1 and report["changed"] == []
+    assert hash_embeddings.calls == calls
+
+
+def test_files_with_the_same_content_share_a_document(documents_dir, retriever):
+    write(documents_dir, "a.txt", "Shared content.")
+    write(documents_dir, "copy.txt", "Shared content.")
+    sync(documents_dir, retriever)
+    assert len(parent_ids(retriever)) == 1
+
+    os.remove(documents_dir / "a.txt")
+    report = sync(documents_dir, retriever)
+
+    assert report["deleted"] == ["a.txt"]
+    # Still referenced by copy.txt
+    assert len(parent_ids(retriever)) == 1
+    assert len(chunk_ids(retriever)) == 1
+
+
+def test_registered_content_without_a_document_is_indexed(documents_dir, retriever):
+    write(documents_dir, "a.txt", "Orphaned content.")
+    registry = ingestion.get_hash_registry(
+        ingestion.index_directory(retriever), retriever.vectorstore)
+    registry.add_many([ingestion.get_document_hash("Orphaned content.")])
+
+    report = sync(documents_dir, retriever)
+
+    assert report["added"] == ["a.txt"]
+    manifest = ingestion.open_manifest(ingestion.index_directory(retriever))
+    doc_id = manifest.entries()["a.txt"].doc_id
+    assert doc_id is not None
+    assert retriever.docstore.mget([doc_id])[0].page_content == "Orphaned content."
+
+
+def test_index_without_manifest_is_not_duplicated(documents_dir, retriever, monkeypatch):
+    write(documents_dir, "a.txt", "Agents plan tasks step by step.")
+    write(documents_dir, "b.txt", "Memory stores past observations.")
+    sync(documents_dir, retriever)
+    parents, chunks = parent_ids(retriever), chunk_ids(retriever)
+    # An index built before the manifest existed
+    manifest_path = os.path.join(ingestion.index_directory(retriever), "manifest.sqlite3")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(manifest_path + suffix):
+            os.remove(manifest_path + suffix)
+    write(documents_dir, "b.txt", "Memory stores and recalls past observations.")
+
+    report = sync(documents_dir, retriever)
+
+    assert report["changed"] == ["b.txt"]
+    assert report["added"] == []
+    assert report["unchanged"] == 1
+    assert len(parent_ids(retriever)) == len(parents)
+    assert len(chunk_ids(retriever)) == len(chunks)
+    assert len(parent_ids(retriever) & parents) == 1
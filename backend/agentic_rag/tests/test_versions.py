@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+from typing import List
+
+import pytest
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+import ingestion
+from indexing.versions import LEGACY_VERSION, IndexVersions, SwappableRetriever, write_index_info
+
+
+class StaticRetriever(BaseRetriever):
+    """Retriever returning one fixed document, optionally after waiting for an event."""
+
+    text: str
+    started: threading.Event = None
+    release: threading.Event = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        if self.release is not None:
+            self.started.set()
+            self.release.wait(5)
+        return [Document(page_content=self.text)]
+
+
+def read_pointer(versions):
+    with open(versions.pointer_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_activate_swaps_current_and_remembers_the_previous_version(tmp_path):
+    versions = IndexVersions(str(tmp_path))
+    assert versions.current() is None
+
+    first, second = versions.new_version(), versions.new_version()
+    versions.activate(first)
+    versions.activate(second)
+
+    assert versions.current() == second
+    assert versions.history() == [first]
+    assert read_pointer(versions) == {"current": second, "history": [first]}
+    # The pointer is replaced by a rename; no temporary file is left behind
+    assert sorted(os.listdir(tmp_path)) == ["CURRENT", "versions"]
+
+
+def test_rollback_returns_to_the_previous_version(tmp_path):
+    versions = IndexVersions(str(tmp_path))
+    first, second = versions.new_version(), versions.new_version()
+    versions.activate(first)
+    versions.activate(second)
+
+    assert versions.rollback() == first
+    assert versions.current() == first
+    with pytest.raises(ValueError):
+        versions.rollback()
+
+
+def test_rollback_skips_deleted_versions(tmp_path):
+    versions = IndexVersions(str(tmp_path))
+    first, second, third = (versions.new_version() for _ in range(3))
+    for version in (first, second, third):
+        versions.activate(version)
+    os.rmdir(versions.path(second))
+
+    assert versions.rollback() == first
+
+
+def test_unversioned_index_is_the_legacy_version(tmp_path):
+    versions = IndexVersions(str(tmp_path))
+    (tmp_path / "chroma.sqlite3").write_bytes(b"")
+
+    assert versions.current() == LEGACY_VERSION
+    assert versions.path(LEGACY_VERSION) == str(tmp_path)
+
+    version = versions.new_version()
+    versions.activate(version)
+    assert versions.history() == [LEGACY_VERSION]
+
+
+def test_prune_keeps_the_live_version_and_recent_history(tmp_path):
+    versions = IndexVersions(str(tmp_path))
+    built = [versions.new_version() for _ in range(4)]
+    for version in built:
+        versions.activate(version)
+
+    # IDs created within the same second do not sort in creation order
+    assert set(versions.prune(keep=1)) == set(built[:2])
+    assert set(versions.list()) == set(built[2:])
+    assert versions.history() == [built[2]]
+
+
+def test_queries_in_flight_finish_on_the_version_they_started_with():
+    release, started = threading.Event(), threading.Event()
+    retriever = SwappableRetriever(
+        current=StaticRetriever(text="old", started=started, release=release), version="v1")
+    results = []
+    query = threading.Thread(target=lambda: results.extend(retriever.invoke("question")))
+    query.start()
+    assert started.wait(5)
+
+    retriever.swap(StaticRetriever(text="new"), "v2")
+    release.set()
+    query.join(5)
+
+    assert [doc.page_content for doc in results] == ["old"]
+    assert [doc.page_content for doc in retriever.invoke("question")] == ["new"]
+    assert retriever.version == "v2"
+
+
+@pytest.fixture
+def live_index(tmp_path, monkeypatch, hash_embeddings):
+    """A versioned index with two documents, built with offline embeddings."""
+    monkeypatch.setattr(ingestion, "get_embeddings", lambda model=None: hash_embeddings)
+    documents_dir = tmp_path / "documents"
+    documents_dir.mkdir()
+    (documents_dir / "a.txt").write_text("Agents plan tasks step by step.", encoding="utf-8")
+    (documents_dir / "b.txt").write_text("Memory stores past observations.", encoding="utf-8")
+
+    persist_directory = str(tmp_path / "index")
+    versions = IndexVersions(persist_directory)
+    version = versions.new_version()
+    write_index_info(versions.path(version), {
+        "embedding_model": "hash", "vectorstore_backend": "memmap"})
+    current = ingestion.build_retriever(versions.path(version))
+    ingestion.sync_documents(str(documents_dir), current)
+    versions.activate(version)
+    return SwappableRetriever(current=current, version=version), persist_directory
+
+
+def test_rebuild_switches_to_a_new_version_with_the_same_documents(live_index):
+    retriever, persist_directory = live_index
+    old_version = retriever.version
+    old_parents = set(retriever.docstore.yield_keys())
+
+    new_version = ingestion.rebuild_index(retriever, persist_directory)
+
+    versions = IndexVersions(persist_directory)
+    assert new_version != old_version
+    assert retriever.version == versions.current() == new_version
+    assert versions.history() == [old_version]
+    assert set(retriever.docstore.yield_keys()) == old_parents
+    assert len(retriever.vectorstore.get(include=[])["ids"]) == 2
+    assert retriever.invoke("Agents plan tasks step by step.")
+    # The manifest follows the new version, so the next sync has nothing to do
+    assert ingestion.open_manifest(versions.path(new_version)).entries().keys() == {"a.txt", "b.txt"}
+
+    assert ingestion.rollback_index(retriever, persist_directory) == old_version
+    assert retriever.version == old_version
+
+
+def test_reload_picks_up_a_version_switched_by_another_process(live_index):
+    retriever, persist_directory = live_index
+    assert ingestion.reload_index(retriever, persist_directory) is None
+
+    other = SwappableRetriever(current=retriever.current, version=retriever.version)
+    new_version = ingestion.rebuild_index(other, persist_directory)
+
+    assert ingestion.reload_index(retriever, persist_directory) == new_version
+    assert retriever.version == new_version
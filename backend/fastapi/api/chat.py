@@ -1,4 +1,8 @@
+import json
+
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from database.connection import get_db
@@ -54,6 +58,50 @@ async def ask_question(
         )
 
 
+@chat_router.post("/ask-stream")
+async def ask_question_stream(
+    request: ChatRequest,
+    current_user=Depends(optional_auth),
+    db: Session = Depends(get_db)
+):
+    """
+    Ask a question and receive the answer as a Server-Sent Events stream.
+
+    Events, in order:
+    1. route: the data source chosen by the router
+    2. documents_retrieved / grading_done / web_search_done: graph progress
+    3. generation_started: a (re)generation begins, discard earlier tokens
+    4. token: a piece of the answer as the LLM produces it
+    5. final: the same fields as /ask returns (or error on failure)
+    """
+    async def event_stream():
+        async for event in rag_service.stream_question(
+            question=request.question,
+            user_id=current_user.id if current_user else None,
+            conversation_id=request.conversation_id,
+            db=db if current_user else None
+        ):
+            data = event["data"]
+            if event["event"] == "final":
+                # Same fields as ChatResponse
+                data = {
+                    "question": data["question"],
+                    "answer": data["answer"],
+                    "route_taken": data["route_taken"],
+                    "conversation_id": data.get("conversation_id") or 0,
+                    "documents_used": data["documents_used"],
+                    "processing_info": data["processing_info"]
+                }
+            payload = json.dumps(jsonable_encoder(data))
+            yield f"event: {event['event']}\ndata: {payload}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @chat_router.post("/ask-anonymous")
 async def ask_question_anonymous(request: ChatRequest):
     """
@@ -2,9 +2,12 @@ import os
 import tempfile
 import shutil
 from typing import List
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
 
-from models.schemas import DocumentUploadRequest, DocumentUploadResponse
+from auth.middleware import require_auth
+from models.schemas import (
+    DocumentUploadRequest, DocumentUploadResponse, DocumentSyncResponse
+)
 from services.rag_service import rag_service
 
 documents_router = APIRouter()
@@ -89,6 +92,74 @@ async def upload_document_files(files: List[UploadFile] = File(...)):
         )
 
 
+@documents_router.post("/sync", response_model=DocumentSyncResponse)
+async def sync_documents(current_user=Depends(require_auth)):
+    """
+    Incrementally sync the knowledge base with the documents directory.
+    
+    Only new or changed files are embedded; documents of deleted or replaced
+    files are removed. The directory is DOCUMENTS_DIR: the sync manifest
+    tracks one directory, and syncing another one would delete every
+    document indexed from it. Intended for scheduled corpus refreshes.
+    """
+    try:
+        result = await rag_service.sync_documents()
+        
+        return DocumentSyncResponse(
+            message="Documents synced successfully",
+            **result
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@documents_router.post("/reindex")
+async def reindex_documents(current_user=Depends(require_auth)):
+    """
+    Rebuild the index as a new version in the background.
+    
+    Parents are re-split and re-embedded with the current settings while
+    queries keep hitting the live version; the new version is switched in
+    atomically when complete.
+    """
+    try:
+        return rag_service.start_index_rebuild()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@documents_router.get("/index-versions")
+async def get_index_versions(current_user=Depends(require_auth)):
+    """Get the live index version, rollback history and rebuild state."""
+    try:
+        return rag_service.get_index_versions()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@documents_router.post("/index-versions/rollback")
+async def rollback_index(current_user=Depends(require_auth)):
+    """Switch back to the previously live index version."""
+    try:
+        return await rag_service.rollback_index()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@documents_router.post("/index-versions/reload")
+async def reload_index(current_user=Depends(require_auth)):
+    """Switch to the live index version after it was changed by another process."""
+    try:
+        return await rag_service.reload_index()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @documents_router.get("/stats")
 async def get_document_stats():
     """Get statistics about the document collection."""
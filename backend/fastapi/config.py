@@ -29,7 +29,16 @@ class Settings:
     CHROMA_DB_DIR: str = "chroma_db"
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
-    RETRIEVAL_K: int = 4
+    # Retrieval k is read by the RAG pipeline: rag_settings.RETRIEVAL_K (agentic_rag/settings.py)
+    # Maximum number of questions processed at once per worker
+    RAG_MAX_CONCURRENCY: int = int(os.getenv("RAG_MAX_CONCURRENCY", "8"))
+    # Semantic answer cache: questions without conversation context reuse the answer
+    # of a cached question at least ANSWER_CACHE_THRESHOLD cosine-similar; 0 entries disables it
+    ANSWER_CACHE_ENTRIES: int = int(os.getenv("ANSWER_CACHE_ENTRIES", "1000"))
+    ANSWER_CACHE_THRESHOLD: float = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+    # Seconds an answer stays valid per route; routes left out are not cached
+    ANSWER_CACHE_TTLS: str = os.getenv(
+        "ANSWER_CACHE_TTLS", "vectorstore=3600,direct_llm=3600,web_search=300")
     
     # Environment Variables
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
@@ -0,0 +1,84 @@
+"""
+Load test: check that concurrent questions overlap and /health stays responsive.
+
+Start the API (python run.py), then run:
+    python load_test.py --requests 8 --base-url http://localhost:8000
+
+If questions were serialized on the event loop, the batch wall time would be
+close to the sum of the individual latencies and /health would stall while
+they run. With questions offloaded to the RAG executor the wall time drops
+towards the slowest single request and /health stays in the milliseconds.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+
+QUESTION = "What is agent memory in context of LLMs?"
+
+
+async def ask(client: httpx.AsyncClient, question: str) -> float:
+    """Send one anonymous question and return its latency in seconds."""
+    start = time.perf_counter()
+    response = await client.post(
+        "/api/v1/chat/ask-anonymous", json={"question": question})
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event, latencies: List[float]):
+    """Hit /health every 100ms until stopped, recording latencies."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.1)
+
+
+async def run(base_url: str, requests: int, question: str):
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        stop = asyncio.Event()
+        health_latencies: List[float] = []
+        prober = asyncio.create_task(
+            probe_health(client, stop, health_latencies))
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(
+            *(ask(client, question) for _ in range(requests)))
+        wall_time = time.perf_counter() - start
+
+        stop.set()
+        await prober
+
+    total = sum(latencies)
+    print(f"Requests: {requests}")
+    print(f"Wall time: {wall_time:.2f}s")
+    print(f"Sum of request latencies: {total:.2f}s")
+    print(f"Overlap factor: {total / wall_time:.2f}x "
+          f"(1.0x means requests were serialized)")
+    print(f"Request latency p50/max: {statistics.median(latencies):.2f}s / "
+          f"{max(latencies):.2f}s")
+    if health_latencies:
+        print(f"/health latency p50/max during load: "
+              f"{statistics.median(health_latencies) * 1000:.0f}ms / "
+              f"{max(health_latencies) * 1000:.0f}ms "
+              f"({len(health_latencies)} probes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--question", default=QUESTION)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.requests, args.question))
+
+
+if __name__ == "__main__":
+    main()
@@ -37,6 +37,18 @@ class DocumentUploadResponse(BaseModel):
     total_documents_processed: int
 
 
+class DocumentSyncResponse(BaseModel):
+    """Response model for document sync, listing the files that changed."""
+    message: str
+    added: List[str]
+    changed: List[str]
+    deleted: List[str]
+    unchanged: int
+    total_documents_in_system: int
+    throughput: Optional[dict] = Field(
+        None, description="Per-stage timings of the load, embed and write stages")
+
+
 class HealthResponse(BaseModel):
     """Response model for health check."""
     status: str
@@ -0,0 +1,193 @@
+"""Semantic cache of answers, looked up by question embedding similarity."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def parse_route_ttls(value: str) -> Dict[str, float]:
+    """Parse 'route=seconds,route=seconds' into a dict."""
+    ttls = {}
+    for item in value.split(","):
+        if "=" in item:
+            route, seconds = item.split("=", 1)
+            ttls[route.strip()] = float(seconds)
+    return ttls
+
+
+class SemanticAnswerCache:
+    """
+    LRU cache of answers keyed by question embeddings.
+
+    A question hits when its embedding has at least `threshold` cosine
+    similarity with a cached question, so paraphrases of a recent question
+    reuse its answer. Each entry records the route that produced it and
+    expires after that route's TTL (routes without a TTL are not cached).
+    Entries belong to one index content version; they are all dropped as
+    soon as the index changes.
+
+    Vectors live in one preallocated matrix, so a lookup is a single
+    matrix-vector product over at most max_entries rows.
+    """
+
+    def __init__(self, max_entries: int, threshold: float, route_ttls: Dict[str, float]):
+        """
+        Args:
+            max_entries: Number of answers kept per worker
+            threshold: Minimum cosine similarity of a hit
+            route_ttls: Seconds an answer stays valid, by route
+        """
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.route_ttls = route_ttls
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._free = list(range(max_entries))
+        self._index_version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _check_version(self, index_version: str) -> None:
+        """Drop every entry once the index changed."""
+        if index_version != self._index_version:
+            if self._entries:
+                self.invalidations += len(self._entries)
+                self._clear()
+            self._index_version = index_version
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._free = list(range(self.max_entries))
+        if self._vectors is not None:
+            self._vectors[:] = 0
+
+    def _remove(self, slot: int) -> None:
+        del self._entries[slot]
+        self._vectors[slot] = 0
+        self._free.append(slot)
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(
+        self, vector: List[float], index_version: str
+    ) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Find the answer of the most similar cached question.
+
+        Args:
+            vector: Embedding of the question
+            index_version: Current index content version
+
+        Returns:
+            (cached entry, similarity), or None on a miss
+        """
+        query = self._normalize(vector)
+        now = time.time()
+        with self._lock:
+            self._check_version(index_version)
+            if not self._entries or self._vectors.shape[1] != len(query):
+                self.misses += 1
+                return None
+
+            scores = self._vectors @ query
+            for slot in np.argsort(-scores):
+                slot = int(slot)
+                if scores[slot] < self.threshold:
+                    break
+                entry = self._entries.get(slot)
+                if entry is None:
+                    continue
+                if now >= entry["expires_at"]:
+                    self._remove(slot)
+                    self.expirations += 1
+                    continue
+                self._entries.move_to_end(slot)
+                self.hits += 1
+                return entry, float(scores[slot])
+
+            self.misses += 1
+            return None
+
+    def store(
+        self,
+        vector: List[float],
+        index_version: str,
+        question: str,
+        route: str,
+        response: Dict[str, Any]
+    ) -> bool:
+        """
+        Cache the answer of a question.
+
+        Args:
+            vector: Embedding of the question
+            index_version: Index content version the answer was computed from
+            question: The question
+            route: Route that produced the answer
+            response: Response fields to return on a hit
+
+        Returns:
+            Whether the answer was cached (not if its route has no TTL)
+        """
+        ttl = self.route_ttls.get(route, 0)
+        if not self.enabled or ttl <= 0:
+            return False
+        vector = self._normalize(vector)
+        with self._lock:
+            self._check_version(index_version)
+            if self._vectors is None or self._vectors.shape[1] != len(vector):
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+                self._clear()
+            if not self._free:
+                slot, _ = self._entries.popitem(last=False)
+                self._vectors[slot] = 0
+                self._free.append(slot)
+                self.evictions += 1
+
+            slot = self._free.pop()
+            self._vectors[slot] = vector
+            self._entries[slot] = {
+                "question": question,
+                "route": route,
+                "response": response,
+                "created_at": time.time(),
+                "expires_at": time.time() + ttl,
+            }
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and size of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "route_ttls": self.route_ttls,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
@@ -1,7 +1,12 @@
+from services.answer_cache import SemanticAnswerCache, parse_route_ttls
 from services.conversation_service import conversation_service
+from config import settings
+import asyncio
+import functools
 import sys
 import os
-from typing import Dict, Any, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple
 from sqlalchemy.orm import Session
 
 # Add agentic_rag to path for imports
@@ -9,20 +14,55 @@ agentic_rag_path = os.path.join(os.path.dirname(__file__), '../../agentic_rag')
 sys.path.insert(0, agentic_rag_path)
 
 try:
+    from graph.budget import new_budget
+    from graph.llm_cache import llm_cache_stats
+    from graph.consts import ANSWER_TOKENS_TAG, DIRECT_LLM, GENERATE, GRADE_DOCUMENTS, RETRIEVE, WEBSEARCH
     from graph.graph import app as rag_app
-    from ingestion import retriever, add_documents_to_retriever
+    from ingestion import (
+        get_retriever, add_documents_to_retriever, sync_documents, start_index_rebuild, rollback_index,
+        reload_index, get_index_versions, index_content_version, query_embedding_cache,
+        get_grade_cache, index_directory
+    )
+    from settings import rag_settings
 except ImportError as e:
     print(f"Import error: {e}")
     print(f"Make sure agentic_rag is in path: {agentic_rag_path}")
     raise
 
 
+# The first graph node that runs tells which route the router chose
+ROUTE_BY_FIRST_NODE = {
+    RETRIEVE: "vectorstore",
+    WEBSEARCH: "web_search",
+    DIRECT_LLM: "direct_llm",
+}
+
+
 class RAGService:
     """Service class for RAG operations."""
 
     def __init__(self):
         self.rag_app = rag_app
-        self.retriever = retriever
+        self.retriever = get_retriever()
+        # Graph runs and database calls are blocking, so they run here
+        # instead of on the event loop
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.RAG_MAX_CONCURRENCY,
+            thread_name_prefix="rag-worker"
+        )
+        # Caps in-flight questions across /ask and the streaming endpoint
+        self.question_slots = asyncio.Semaphore(settings.RAG_MAX_CONCURRENCY)
+        self.answer_cache = SemanticAnswerCache(
+            max_entries=settings.ANSWER_CACHE_ENTRIES,
+            threshold=settings.ANSWER_CACHE_THRESHOLD,
+            route_ttls=parse_route_ttls(settings.ANSWER_CACHE_TTLS)
+        )
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking call on the bounded RAG executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs))
 
     async def ask_question(
         self,
@@ -44,71 +84,300 @@ class RAGService:
             Dict containing the result with additional metadata
         """
         try:
-            enhanced_question = question
-            conversation = None
-
-            # Handle conversation context if user and db provided
-            if user_id and db:
-                # Get or create conversation
-                if conversation_id:
-                    conversation = conversation_service.get_conversation(
-                        conversation_id, user_id, db)
-                    if not conversation:
-                        raise ValueError(
-                            f"Conversation {conversation_id} not found")
-                else:
-                    conversation = conversation_service.get_or_create_default_conversation(
-                        user_id, db)
-
-                # Load conversation context
-                context = conversation_service.get_conversation_context(
-                    conversation.id, db)
-
-                # Build enhanced prompt with context
-                if context["summary"] or context["recent_messages"]:
-                    enhanced_question = conversation_service.build_context_prompt(
-                        context, question)
+            async with self.question_slots:
+                return await self._run_blocking(
+                    self._ask_question_sync, question, user_id, conversation_id, db)
+
+        except Exception as e:
+            raise Exception(f"Error processing question: {str(e)}")
 
+    def _ask_question_sync(
+        self,
+        question: str,
+        user_id: Optional[int],
+        conversation_id: Optional[int],
+        db: Optional[Session]
+    ) -> Dict[str, Any]:
+        """Blocking body of ask_question, run on the RAG executor."""
+        enhanced_question, conversation = self._prepare_question(
+            question, user_id, conversation_id, db)
+
+        probe = self._probe_answer_cache(question, enhanced_question)
+        response = self._cached_response(question, probe, conversation)
+        if response is None:
             # Invoke the RAG graph with enhanced question
-            result = self.rag_app.invoke(input={"question": enhanced_question})
+            result = self.rag_app.invoke(
+                input={"question": enhanced_question, **new_budget()})
+
+            response = self._build_response(
+                question, enhanced_question, result, conversation)
+            self._store_answer(probe, question, response)
+
+        # Save messages to conversation if context available
+        if conversation and db:
+            self._save_exchange(
+                conversation, question, response["answer"], response["route_taken"], db)
+
+        return response
+
+    async def stream_question(
+        self,
+        question: str,
+        user_id: Optional[int] = None,
+        conversation_id: Optional[int] = None,
+        db: Optional[Session] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a question through the RAG system, yielding events as it runs.
+
+        Progress events are yielded as graph nodes start and finish, then the
+        answer tokens as the LLM produces them, and finally a "final" event
+        carrying the same fields ask_question returns.
+
+        Args:
+            question: The question to ask
+            user_id: ID of the user asking the question
+            conversation_id: ID of the conversation (optional)
+            db: Database session for conversation management
 
-            # Extract processing info
-            route_taken = self._extract_route_info(result)
-            documents_used = self._extract_documents_used(result)
-            answer = result.get("generation", "No answer generated")
+        Yields:
+            Dicts with an "event" name and a "data" payload
+        """
+        try:
+            enhanced_question, conversation = await self._run_blocking(
+                self._prepare_question, question, user_id, conversation_id, db)
+
+            probe = await self._run_blocking(
+                self._probe_answer_cache, question, enhanced_question)
+            cached = self._cached_response(question, probe, conversation)
+            if cached is not None:
+                yield {"event": "route", "data": {"route": cached["route_taken"]}}
+                if conversation and db:
+                    await self._run_blocking(
+                        self._save_exchange,
+                        conversation, question, cached["answer"], cached["route_taken"], db)
+                yield {"event": "final", "data": cached}
+                return
+
+            async with self.question_slots:
+                root_run_id = None
+                result: Dict[str, Any] = {}
+                route_announced = False
+                generation_attempt = 0
+
+                async for event in self.rag_app.astream_events(
+                    {"question": enhanced_question, **new_budget()}, version="v2"
+                ):
+                    kind = event["event"]
+                    if root_run_id is None:
+                        root_run_id = event["run_id"]
+
+                    if kind == "on_chat_model_stream" and ANSWER_TOKENS_TAG in event.get("tags", []):
+                        token = event["data"]["chunk"].content
+                        if token:
+                            yield {"event": "token", "data": {"token": token}}
+
+                    elif kind == "on_chain_start" and event["name"] == event.get("metadata", {}).get("langgraph_node"):
+                        node = event["name"]
+                        if not route_announced and node in ROUTE_BY_FIRST_NODE:
+                            route_announced = True
+                            yield {"event": "route", "data": {"route": ROUTE_BY_FIRST_NODE[node]}}
+                        if node == GENERATE:
+                            generation_attempt += 1
+                            yield {"event": "generation_started", "data": {"attempt": generation_attempt}}
+
+                    elif kind == "on_chain_stream" and event["run_id"] == root_run_id:
+                        for node, update in event["data"]["chunk"].items():
+                            update = update or {}
+                            result.update(update)
+                            progress = self._node_progress_event(node, update)
+                            if progress:
+                                yield progress
+
+                    elif kind == "on_chain_end" and event["run_id"] == root_run_id:
+                        result = event["data"].get("output") or result
+
+            response = self._build_response(
+                question, enhanced_question, result, conversation)
+            await self._run_blocking(self._store_answer, probe, question, response)
 
-            # Save messages to conversation if context available
             if conversation and db:
-                # Save user message
-                conversation_service.add_message(
-                    conversation.id, "user", question, None, db
-                )
+                await self._run_blocking(
+                    self._save_exchange,
+                    conversation, question, response["answer"], response["route_taken"], db)
 
-                # Save assistant message
-                conversation_service.add_message(
-                    conversation.id, "assistant", answer, route_taken, db
-                )
+            yield {"event": "final", "data": response}
 
-                # Check if summarization is needed
-                conversation_service.check_and_summarize_if_needed(
-                    conversation.id, db)
+        except Exception as e:
+            yield {"event": "error", "data": {"detail": f"Error processing question: {str(e)}"}}
 
-            return {
-                "question": question,
-                "answer": answer,
-                "route_taken": route_taken,
-                "documents_used": documents_used,
-                "conversation_id": conversation.id if conversation else None,
-                "processing_info": {
-                    "use_web_search": result.get("use_web_search", False),
-                    "documents_count": len(result.get("documents", [])),
-                    "context_used": enhanced_question != question,
-                    "raw_result": result
-                }
-            }
+    def _prepare_question(
+        self,
+        question: str,
+        user_id: Optional[int],
+        conversation_id: Optional[int],
+        db: Optional[Session]
+    ) -> Tuple[str, Optional[Any]]:
+        """Load the conversation and build the context-enhanced question."""
+        enhanced_question = question
+        conversation = None
+
+        # Handle conversation context if user and db provided
+        if user_id and db:
+            # Get or create conversation
+            if conversation_id:
+                conversation = conversation_service.get_conversation(
+                    conversation_id, user_id, db)
+                if not conversation:
+                    raise ValueError(
+                        f"Conversation {conversation_id} not found")
+            else:
+                conversation = conversation_service.get_or_create_default_conversation(
+                    user_id, db)
+
+            # Load conversation context
+            context = conversation_service.get_conversation_context(
+                conversation.id, db)
+
+            # Build enhanced prompt with context
+            if context["summary"] or context["recent_messages"]:
+                enhanced_question = conversation_service.build_context_prompt(
+                    context, question)
 
+        return enhanced_question, conversation
+
+    def _probe_answer_cache(
+        self,
+        question: str,
+        enhanced_question: str
+    ) -> Optional[Tuple[List[float], str]]:
+        """
+        Embed a question for the semantic answer cache.
+
+        Questions carrying conversation context are not cached, since their
+        answer depends on the conversation.
+
+        Returns:
+            (question embedding, index content version), or None if the cache does not apply
+        """
+        if not self.answer_cache.enabled or enhanced_question != question:
+            return None
+        try:
+            # Goes through the query embedding cache, so retrieval reuses the vector
+            vector = self.retriever.vectorstore.embeddings.embed_query(question)
+            return vector, index_content_version(self.retriever)
         except Exception as e:
-            raise Exception(f"Error processing question: {str(e)}")
+            print(f"Answer cache lookup skipped: {e}")
+            return None
+
+    def _cached_response(
+        self,
+        question: str,
+        probe: Optional[Tuple[List[float], str]],
+        conversation: Optional[Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Response of a semantically equivalent cached question, or None on a miss."""
+        if probe is None:
+            return None
+        hit = self.answer_cache.lookup(*probe)
+        if hit is None:
+            return None
+        entry, similarity = hit
+        response = dict(entry["response"])
+        response["question"] = question
+        response["conversation_id"] = conversation.id if conversation else None
+        response["processing_info"] = {
+            **response["processing_info"],
+            "cache_hit": True,
+            "cached_question": entry["question"],
+            "similarity": round(similarity, 4),
+        }
+        return response
+
+    def _store_answer(
+        self,
+        probe: Optional[Tuple[List[float], str]],
+        question: str,
+        response: Dict[str, Any]
+    ) -> None:
+        """Cache a fresh answer unless it is degraded or the index changed meanwhile."""
+        info = response["processing_info"]
+        info["cache_hit"] = False
+        if probe is None or info["degraded"] or not info["raw_result"].get("generation"):
+            return
+        vector, index_version = probe
+        try:
+            if index_content_version(self.retriever) != index_version:
+                return
+        except Exception:
+            return
+        self.answer_cache.store(
+            vector, index_version, question, response["route_taken"], response)
+
+    def _save_exchange(
+        self,
+        conversation: Any,
+        question: str,
+        answer: str,
+        route_taken: str,
+        db: Session
+    ) -> None:
+        """Save the user question and assistant answer to the conversation."""
+        # Save user message
+        conversation_service.add_message(
+            conversation.id, "user", question, None, db
+        )
+
+        # Save assistant message
+        conversation_service.add_message(
+            conversation.id, "assistant", answer, route_taken, db
+        )
+
+        # Check if summarization is needed
+        conversation_service.check_and_summarize_if_needed(
+            conversation.id, db)
+
+    def _build_response(
+        self,
+        question: str,
+        enhanced_question: str,
+        result: Dict[str, Any],
+        conversation: Optional[Any]
+    ) -> Dict[str, Any]:
+        """Build the response dict from the final graph state."""
+        # Extract processing info
+        route_taken = self._extract_route_info(result)
+        documents_used = self._extract_documents_used(result)
+        answer = result.get("generation") or "No answer generated"
+
+        return {
+            "question": question,
+            "answer": answer,
+            "route_taken": route_taken,
+            "documents_used": documents_used,
+            "conversation_id": conversation.id if conversation else None,
+            "processing_info": {
+                "use_web_search": result.get("use_web_search", False),
+                "documents_count": len(result.get("documents") or []),
+                "context_used": enhanced_question != question,
+                "degraded": bool(result.get("degraded")),
+                "raw_result": result
+            }
+        }
+
+    def _node_progress_event(self, node: str, update: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Translate a finished graph node into a progress event."""
+        if node == RETRIEVE:
+            return {"event": "documents_retrieved",
+                    "data": {"documents_count": len(update.get("documents") or [])}}
+        if node == GRADE_DOCUMENTS:
+            return {"event": "grading_done",
+                    "data": {"relevant_documents": len(update.get("documents") or []),
+                             "use_web_search": bool(update.get("use_web_search"))}}
+        if node == WEBSEARCH:
+            return {"event": "web_search_done",
+                    "data": {"documents_count": len(update.get("documents") or [])}}
+        return None
 
     def _extract_route_info(self, result: Dict[str, Any]) -> str:
         """Extract the route taken from the RAG result."""
@@ -165,7 +434,8 @@ class RAGService:
             initial_doc_count = self._get_document_count()
 
             # Add documents
-            add_documents_to_retriever(document_paths, self.retriever)
+            await self._run_blocking(
+                add_documents_to_retriever, document_paths, self.retriever)
 
             # Calculate statistics
             final_doc_count = self._get_document_count()
@@ -183,9 +453,68 @@ class RAGService:
         except Exception as e:
             raise Exception(f"Error uploading documents: {str(e)}")
 
+    async def sync_documents(self) -> Dict[str, Any]:
+        """
+        Incrementally sync the index with the documents directory (DOCUMENTS_DIR).
+
+        Returns:
+            Dict with the added, changed and deleted paths and the unchanged count
+        """
+        documents_dir = rag_settings.DOCUMENTS_DIR
+        if not os.path.isdir(documents_dir):
+            raise ValueError(f"Invalid documents directory: {documents_dir}")
+
+        try:
+            report = await self._run_blocking(
+                sync_documents, documents_dir, self.retriever)
+            report["total_documents_in_system"] = self._get_document_count()
+            return report
+        except Exception as e:
+            raise Exception(f"Error syncing documents: {str(e)}")
+
+    def start_index_rebuild(self) -> Dict[str, Any]:
+        """
+        Start building a new index version in the background.
+
+        Queries keep using the live version until the new one is switched in.
+
+        Returns:
+            Dict telling whether a build was started, plus the index versions
+        """
+        started = start_index_rebuild(self.retriever, rag_settings.CHROMA_DB_DIR)
+        return {"started": started, **get_index_versions(rag_settings.CHROMA_DB_DIR)}
+
+    def get_index_versions(self) -> Dict[str, Any]:
+        """Get the live index version, rollback history and rebuild state."""
+        return get_index_versions(rag_settings.CHROMA_DB_DIR)
+
+    async def rollback_index(self) -> Dict[str, Any]:
+        """
+        Switch back to the previously live index version.
+
+        Returns:
+            Dict with the index versions after the rollback
+        """
+        await self._run_blocking(
+            rollback_index, self.retriever, rag_settings.CHROMA_DB_DIR)
+        return get_index_versions(rag_settings.CHROMA_DB_DIR)
+
+    async def reload_index(self) -> Dict[str, Any]:
+        """
+        Switch to the live index version if another process changed it.
+
+        Returns:
+            Dict telling whether the version changed, plus the index versions
+        """
+        version = await self._run_blocking(
+            reload_index, self.retriever, rag_settings.CHROMA_DB_DIR)
+        return {"reloaded": version is not None, **get_index_versions(rag_settings.CHROMA_DB_DIR)}
+
     def _get_document_count(self) -> int:
         """Get the current number of documents in the system."""
         try:
+            if hasattr(self.retriever.docstore, '__len__'):
+                return len(self.retriever.docstore)
             if hasattr(self.retriever.docstore, 'store'):
                 return len(self.retriever.docstore.store)
             return 0
@@ -197,14 +526,21 @@ class RAGService:
         try:
             doc_count = self._get_document_count()
             vectorstore = self.retriever.vectorstore
+            grade_cache = get_grade_cache(index_directory(self.retriever))
 
             return {
                 "total_documents": doc_count,
                 "vectorstore_type": type(vectorstore).__name__,
                 "embedding_model": "OpenAI Embeddings",
-                "chunk_size": 1000,
-                "chunk_overlap": 200,
-                "retriever_type": "MultiVectorRetriever"
+                "chunk_size": rag_settings.CHUNK_SIZE,
+                "chunk_overlap": rag_settings.CHUNK_OVERLAP,
+                "retrieval_k": rag_settings.RETRIEVAL_K,
+                "query_embedding_cache": query_embedding_cache.stats(),
+                "answer_cache": self.answer_cache.stats(),
+                "llm_cache": llm_cache_stats(),
+                "grade_cache": grade_cache.stats() if grade_cache is not None else None,
+                "retriever_type": "MultiVectorRetriever",
+                "index_version": getattr(self.retriever, "version", None)
             }
         except Exception as e:
             raise Exception(f"Error getting system stats: {str(e)}")